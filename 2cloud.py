@@ -1,59 +1,203 @@
+import argparse
+import codecs
+import hashlib
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def process_json_file(input_file):
+from config import JSON_OUTPUT_DIR, ENCODE_OUTPUT_DIR
+from storage import NewsStore
+
+CHUNK_SIZE = 64 * 1024
+MANIFEST_NAME = '.manifest.json'  # 记录已转换输入文件的大小、修改时间和哈希
+
+
+class _HashingReader:
+    """按块读取文件并解码为文本，同时计算原始字节的哈希"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self.eof = False
+
+    def read(self, size: int) -> str:
+        data = self.f.read(size)
+        self.sha256.update(data)
+        if not data:
+            self.eof = True
+        return self.decoder.decode(data, final=self.eof)
+
+
+def iter_json_array(reader: _HashingReader):
+    """逐个返回JSON数组中的元素，内存中只保留当前元素和一个读取块"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+
+    def skip_whitespace():
+        nonlocal buf, pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf) or reader.eof:
+                return
+            buf, pos = reader.read(CHUNK_SIZE), 0
+
+    skip_whitespace()
+    if pos >= len(buf) or buf[pos] != '[':
+        raise ValueError('输入文件不是JSON数组')
+    pos += 1
+    expect_item = True
+    while True:
+        skip_whitespace()
+        if pos >= len(buf):
+            raise ValueError('JSON数组不完整')
+        if buf[pos] == ']':
+            return
+        if not expect_item:
+            if buf[pos] != ',':
+                raise ValueError(f'JSON数组格式错误: 意外的字符 {buf[pos]!r}')
+            pos += 1
+            expect_item = True
+            continue
+        # 当前元素可能跨越多个读取块；解码失败时继续读入更多数据（读取量逐次翻倍）
+        need = CHUNK_SIZE
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or reader.eof:
+                    break
+            except json.JSONDecodeError:
+                if reader.eof:
+                    raise
+            buf = buf[pos:] + reader.read(need)
+            pos = 0
+            need *= 2
+        yield item
+        buf, pos = buf[end:], 0
+        expect_item = False
+
+
+def process_json_file(input_file, encode_dir=ENCODE_OUTPUT_DIR):
+    """将JSON数组文件流式转换为每行一个对象的 *_encod.json
+
+    先写入临时文件再替换，转换中途失败不会留下不完整的输出。
+    返回 (输入文件名, 大小, 修改时间, 哈希, 对象数)。
+    """
     # 获取输入文件的基础名称（不含扩展名）
     base_name = os.path.splitext(os.path.basename(input_file))[0]
-    output_file = f"{base_name}_encod.json"
-    
-    # 创建 res/encode 文件夹（如果不存在）
-    encode_dir = 'res/encode'
-    if not os.path.exists(encode_dir):
-        os.makedirs(encode_dir)
-    
-    # 读取原始 JSON 文件
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = f.read()
-    
-    # 去掉开头和结尾的大括号
-    data = data.strip()[1:-1]
-    
-    # 分割对象并去除逗号
-    objects = data.split('},')
-    processed_objects = [obj.strip() + '}' for obj in objects[:-1]]
-    processed_objects.append(objects[-1].strip())  # 最后一个对象可能已经有结束括号
-    
-    # 将处理后的对象写入新文件
-    output_path = os.path.join(encode_dir, output_file)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        for obj in processed_objects:
-            f.write(obj + '\n')  # 每个对象写入一行
-    
-    print(f"处理完成：{output_path}")
+    output_path = os.path.join(encode_dir, f"{base_name}_encod.json")
+    tmp_path = output_path + '.tmp'
+
+    stat = os.stat(input_file)
+    count = 0
+    with open(input_file, 'rb') as f, open(tmp_path, 'w', encoding='utf-8') as out:
+        reader = _HashingReader(f)
+        for obj in iter_json_array(reader):
+            out.write(json.dumps(obj, ensure_ascii=False) + '\n')  # 每个对象写入一行
+            count += 1
+    os.replace(tmp_path, output_path)
+    return os.path.basename(input_file), stat.st_size, stat.st_mtime_ns, reader.sha256.hexdigest(), count
+
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def load_manifest(encode_dir):
+    try:
+        with open(os.path.join(encode_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(encode_dir, manifest):
+    path = os.path.join(encode_dir, MANIFEST_NAME)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def is_unchanged(input_path, output_path, entry):
+    """输入文件自上次转换后是否未变化：大小和修改时间相同，或内容哈希相同"""
+    if not entry or not os.path.exists(output_path):
+        return False
+    stat = os.stat(input_path)
+    if stat.st_size != entry['size']:
+        return False
+    if stat.st_mtime_ns == entry['mtime_ns']:
+        return True
+    if file_sha256(input_path) == entry['sha256']:
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+    return False
+
+
+def convert_all(input_dir=JSON_OUTPUT_DIR, encode_dir=ENCODE_OUTPUT_DIR, workers=None, force=False):
+    """转换 input_dir 下有变化的 JSON 文件，返回 (转换的文件数, 跳过的文件数)"""
+    os.makedirs(encode_dir, exist_ok=True)
+    json_files = sorted(f for f in os.listdir(input_dir) if f.endswith('.json'))
+    manifest = load_manifest(encode_dir)
+
+    pending = []
+    for json_file in json_files:
+        base_name = os.path.splitext(json_file)[0]
+        output_path = os.path.join(encode_dir, f"{base_name}_encod.json")
+        if not force and is_unchanged(os.path.join(input_dir, json_file), output_path, manifest.get(json_file)):
+            continue
+        pending.append(json_file)
+
+    converted = 0
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(process_json_file, os.path.join(input_dir, json_file), encode_dir): json_file
+                       for json_file in pending}
+            for future in as_completed(futures):
+                json_file = futures[future]
+                try:
+                    name, size, mtime_ns, sha256, count = future.result()
+                except Exception as e:
+                    print(f"处理文件 {json_file} 时出错：{str(e)}")
+                    continue
+                manifest[name] = {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256}
+                converted += 1
+                print(f"处理完成：{name}（{count} 条）")
+    save_manifest(encode_dir, manifest)
+    return converted, len(json_files) - len(pending)
+
 
 def main():
+    parser = argparse.ArgumentParser(description='Convert result JSON arrays to JSON Lines')
+    parser.add_argument('--input-dir', default=JSON_OUTPUT_DIR, help='Directory of sina_*.json files')
+    parser.add_argument('--output-dir', default=ENCODE_OUTPUT_DIR, help='Directory for *_encod.json files')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--force', action='store_true', help='Convert all files even if unchanged')
+    args = parser.parse_args()
+
     # 指定输入目录
-    input_dir = 'res/res'
-    
+    input_dir = args.input_dir
+
+    # 先把追加写日志中有更新的日期导出为合并后的 JSON 文件
+    NewsStore(json_dir=input_dir).export_all()
+
     # 确保输入目录存在
     if not os.path.exists(input_dir):
         print(f"输入目录 {input_dir} 不存在")
         return
-    
-    # 查找 res/res 目录下的所有 json 文件
-    json_files = [f for f in os.listdir(input_dir) if f.endswith('.json')]
-    
-    if not json_files:
+
+    if not any(f.endswith('.json') for f in os.listdir(input_dir)):
         print(f"{input_dir} 目录下没有找到 JSON 文件")
         return
-    
-    # 处理每个找到的 JSON 文件
-    for json_file in json_files:
-        try:
-            input_path = os.path.join(input_dir, json_file)
-            process_json_file(input_path)
-        except Exception as e:
-            print(f"处理文件 {json_file} 时出错：{str(e)}")
+
+    converted, skipped = convert_all(input_dir, args.output_dir, args.workers, args.force)
+    print(f"转换 {converted} 个文件，跳过 {skipped} 个未变化的文件")
+
 
 if __name__ == '__main__':
     main()
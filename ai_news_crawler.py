@@ -1,17 +1,38 @@
 import logging
-import json
 import hashlib
+import re
 import requests
+import socket
 import time
-from bs4 import BeautifulSoup
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import ExitStack
+from urllib.parse import urlparse
 from datetime import datetime
-from pathlib import Path
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional
 from requests.exceptions import RequestException, Timeout, TooManyRedirects
-from utils import download_image, save_to_json, save_context_with_images
+from utils import save_to_json, save_context_with_images
+from http_client import get_client
+from seen_index import SeenIndex
+from near_duplicate import NearDuplicateIndex
+from keyword_matcher import KeywordMatcher
+from article_extractor import ArticleExtractor
+from metrics import Metrics, get_metrics, write_run_report
+from rate_limiter import AdaptiveRateLimiter, SharedRateLimiter, parse_retry_after
+from resilience import CircuitOpenError
+from checkpoint import CrawlCheckpoint, CheckpointState
+from url_canon import UrlCanonicalizer
 import os
-import pandas as pd
-from config import KEYWORDS, FILTER_KEYWORDS
+from config import (KEYWORDS, FILTER_KEYWORDS, FETCH_MODE, FETCH_MODES, MAX_WORKERS,
+                    MAX_REQUESTS_PER_HOST, DEFAULT_HEADERS,
+                    HTTP_CACHE_ENABLED, ROLL_MAX_PAGES, ROLL_SEARCH_MAX_PAGE,
+                    METRICS_REPORT_DIR, METRICS_PROMETHEUS_TEXTFILE,
+                    NEAR_DUP_ENABLED, NEAR_DUP_ACTION,
+                    WORK_QUEUE_LEASE_SECONDS, WORK_QUEUE_POLL_INTERVAL)
+
+if TYPE_CHECKING:
+    # BeautifulSoup 只在解析列表页时才导入
+    from bs4 import BeautifulSoup
 
 class AiNewsCrawlerException(Exception):
     """自定义爬虫异常基类"""
@@ -26,62 +47,335 @@ class ParseError(AiNewsCrawlerException):
     pass
 
 class AiNewsCrawler:
-    def __init__(self, date: str):
+    FETCH_MODES = FETCH_MODES
+    # 表示主机正在限流的状态码，会降低该主机的请求速率
+    THROTTLE_STATUS = (429, 503)
+
+    # 爬取的入口：首页和滚动新闻
+    BASE_URLS = [
+        "https://tech.sina.com.cn/",  # 首页
+        "https://tech.sina.com.cn/roll/",  # 滚动新闻
+    ]
+    # 滚动新闻页面的选择器
+    ROLL_SELECTORS = ['ul.list_009 li a', '.listBlk a']
+    # 列表项中显示发布时间的节点
+    LISTING_TIME_SELECTOR = '.c_time, .time'
+    # 首页的选择器
+    HOME_SELECTORS = [
+        '.tech-news a',
+        '.feed-card-item h2 a',
+        '.news-list a',
+        '.main-list a',
+        'article a',
+        '.seo_data_list a',
+    ]
+
+    def __init__(self, date: str, fetch_mode: str = FETCH_MODE,
+                 max_workers: int = MAX_WORKERS,
+                 max_requests_per_host: int = MAX_REQUESTS_PER_HOST,
+                 use_cache: bool = HTTP_CACHE_ENABLED,
+                 prometheus_textfile: Optional[str] = METRICS_PROMETHEUS_TEXTFILE,
+                 from_date: Optional[str] = None):
+        if fetch_mode not in self.FETCH_MODES:
+            raise ValueError(f"不支持的抓取模式: {fetch_mode}")
+        # 目标日期区间 [from_date, date]，只抓一天时两者相同
         self.date = date
+        self.from_date = from_date or date
+        if self.from_date > self.date:
+            raise ValueError(f"起始日期 {self.from_date} 晚于结束日期 {self.date}")
         self.logger = logging.getLogger(__name__)
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
+        self.headers = dict(DEFAULT_HEADERS)
+        self.http = get_client()  # 与图片下载共享的连接池
+        self.use_cache = use_cache  # 列表页和文章页是否使用磁盘缓存
+        # 跨日期的已抓取URL索引，首次使用时从已有的JSON结果构建
+        self.seen_index = SeenIndex()
+        if self.seen_index.is_new:
+            self.seen_index.rebuild()
+        # 跨日期的近似重复指纹索引，同一稿件换了URL重新发布时在保存前识别
+        self.near_dup = NearDuplicateIndex() if NEAR_DUP_ENABLED else None
+        if self.near_dup is not None and self.near_dup.is_new:
+            self.near_dup.rebuild()
         self.keywords = KEYWORDS  # 使用配置文件中的关键词
+        # 关键词匹配器只构建一次，每次检查对文本单遍扫描
+        self.keyword_matcher = KeywordMatcher(self.keywords)
+        self.filter_matcher = KeywordMatcher(FILTER_KEYWORDS)
+        self.extractor = ArticleExtractor()
         self.processed_urls = set()
-        self.request_interval = 1  # 请求间隔(秒)
-        self.last_request_time = 0
+        # 链接规范化（含已知的重定向），去重和已抓取判断都使用规范化后的URL
+        self.urls = UrlCanonicalizer()
+        self._in_flight: Dict[str, Future] = {}  # 正在抓取的文章，同一URL的并发抓取共用一次请求
+        # 按主机自适应的请求速率，None 表示不限速
+        self.rate_limiter: Optional[AdaptiveRateLimiter] = AdaptiveRateLimiter()
+        self.fetch_mode = fetch_mode
+        self.max_workers = max(1, max_workers)
+        self.max_requests_per_host = max(1, max_requests_per_host)
+        # 按主机的并发槽位
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self._listing_pages = {}  # 本次运行中已获取的列表页
+        self._listed_urls = set()  # 守护模式下已在列表页上见过的目标日期链接
+        self._fetch_failures = set()  # 详情页请求失败（网络错误、熔断、5xx）的URL，稍后重试
+        # 各阶段耗时和计数，每次 run() 结束时输出运行报告
+        self.metrics = get_metrics()
+        self.prometheus_textfile = prometheus_textfile
+        self.checkpoint: Optional[CrawlCheckpoint] = None  # run() 期间的检查点
 
-    def run(self):
-        """运行爬虫主程序"""
+    def run(self, resume: bool = False):
+        """运行爬虫主程序
+
+        抓取进度随时写入检查点，保存完成后删除。resume 为 True 时从上次中断
+        留下的检查点继续，已处理的列表页和已抓取的文章不再重复请求。
+        """
         all_news = []
+        started_at = datetime.now()
+        start = time.perf_counter()
+        metrics_before = self.metrics.snapshot()
+        self.checkpoint = CrawlCheckpoint.for_range(self.from_date, self.date)
+        resume_state = None
+        if resume:
+            resume_state = self.checkpoint.load()
+            self.logger.info(
+                f"从检查点恢复: 已接受 {len(resume_state.articles)} 条新闻, "
+                f"已抓取 {len(resume_state.done_urls)} 篇文章, "
+                f"已处理 {sum(len(records) for records in resume_state.listings.values())} 个列表页"
+            )
+        elif self.checkpoint.exists():
+            self.logger.warning(f"丢弃未完成的检查点 {self.checkpoint.path}（使用 --resume 可从中断处继续）")
+        self.checkpoint.open(resume=resume)
         
         try:
             # 爬取新浪科技
             self.logger.info("开始爬取新浪科技新闻...")
-            sina_news = self.crawl_sina()
+            sina_news = self.crawl_sina(resume_state)
             all_news.extend(sina_news)
             self.logger.info(f"新浪科技新闻爬取完成，获取{len(sina_news)}条新闻")
             
             # 保存结果
             if all_news:
-                try:
-                    save_to_json(all_news, self.date)
-                    self.logger.info(f"成功保存{len(all_news)}条新闻到JSON文件")
-                except Exception as e:
-                    self.logger.error(f"保存新闻数据失败: {str(e)}")
-                    raise
+                self._save_news(all_news)
             else:
                 self.logger.warning("未找到符合条件的新闻")
+            self.checkpoint.clear()
 
         except Exception as e:
             self.logger.error(f"爬虫运行失败: {str(e)}")
             raise
+        finally:
+            self.checkpoint.close()
+            self.checkpoint = None
+            self.http.log_stats()
+            self._log_avoided_fetches(metrics_before)
+            if self.rate_limiter:
+                self.rate_limiter.log_stats()
+            self._write_run_report(started_at, time.perf_counter() - start, metrics_before, len(all_news))
 
-    def _respect_rate_limit(self):
-        """请求频率限制"""
-        current_time = time.time()
-        time_elapsed = current_time - self.last_request_time
-        if time_elapsed < self.request_interval:
-            time.sleep(self.request_interval - time_elapsed)
-        self.last_request_time = time.time()
-
-    def _make_request(self, url: str, retries: int = 3) -> Optional[requests.Response]:
-        """发送HTTP请求并处理重试"""
-        self._respect_rate_limit()
-        
+    def _save_news(self, news_list: List[Dict]):
+        """按发布日期分组保存新闻并登记到已抓取URL索引，多个日期并行写入"""
+        buckets: Dict[str, List[Dict]] = {}
+        for news in news_list:
+            date = self._normalize_date(news['createTime']) or self.date
+            buckets.setdefault(date, []).append(news)
+
+        def save(date):
+            save_to_json(buckets[date], date)
+            self.seen_index.add_many((news['url'], date) for news in buckets[date])
+            if self.near_dup is not None:
+                self.near_dup.commit(buckets[date], date)
+            self.logger.info(f"成功保存{len(buckets[date])}条 {date} 的新闻")
+
+        try:
+            if len(buckets) == 1:
+                save(next(iter(buckets)))
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(buckets))) as executor:
+                    list(executor.map(save, sorted(buckets)))
+        except Exception as e:
+            self.logger.error(f"保存新闻数据失败: {str(e)}")
+            if self.near_dup is not None:
+                # 已写入数据库的登记在 commit 时已移除，这里只撤销未保存的
+                self.near_dup.release(news['_id'] for news in news_list)
+            raise
+        finally:
+            # 布隆过滤器每次保存后落盘一次
+            self.seen_index.flush()
+
+    def set_date(self, date: str):
+        """切换目标日期（守护模式跨过零点时调用），清空按日期记录的状态"""
+        self.logger.info(f"目标日期切换: {self.date} -> {date}")
+        self.date = self.from_date = date
+        with self._lock:
+            self.processed_urls = set()
+        self._listed_urls = set()
+        self._fetch_failures = set()
+        self._listing_pages = {}
+
+    def poll(self) -> List[Dict]:
+        """增量轮询首页和滚动新闻（守护模式使用）
+
+        只抓取之前的轮询中没有在列表页上出现过的链接。滚动新闻从第1页开始，
+        某一页出现已见过的链接或更早日期时停止翻页，因此除首次轮询外，
+        每次轮询通常只需请求首页和滚动新闻第1页，再加上新文章的详情页。
+        """
+        news_list = []
+        self._listing_pages = {}
+        requests_before = self.metrics.snapshot().counters.get('requests', 0)
+        sources = [
+            ("https://tech.sina.com.cn/", self.HOME_SELECTORS, False),  # 首页
+            (self._roll_page_url(1), self.ROLL_SELECTORS, True),  # 滚动新闻
+        ]
+        with self.metrics.timer('poll'):
+            for url, selectors, paged in sources:
+                page = 1
+                while True:
+                    try:
+                        soup = self._fetch_listing(url, revalidate=True)
+                    except Exception as e:
+                        self.logger.error(f"处理页面失败: {url}, 错误: {str(e)}")
+                        break
+                    if soup is None:
+                        break
+                    news_items, page_dates, page_links = self._select_news_items(soup, selectors)
+                    new_links = {link for link in page_links if link not in self._listed_urls}
+                    news_items = [item for item in news_items
+                                  if self._canonical_url(item.get('href', '')) in new_links]
+                    self._collect_valid_news(news_items, news_list)
+                    # 详情页请求失败的链接不记为已见过，下次轮询重试
+                    self._listed_urls.update(link for link in page_links if not self._take_fetch_failure(link))
+
+                    if (not paged or not page_links or len(new_links) < len(page_links)
+                            or (page_dates and min(page_dates) < self.from_date)
+                            or page >= ROLL_MAX_PAGES):
+                        break
+                    page += 1
+                    url = self._roll_page_url(page)
+
+        if news_list:
+            self._save_news(news_list)
+        requests_made = self.metrics.snapshot().counters.get('requests', 0) - requests_before
+        self.logger.info(f"轮询完成: 新增 {len(news_list)} 条新闻, 请求 {int(requests_made)} 次")
+        self.metrics.inc('polls')
+        if self.prometheus_textfile:
+            self.metrics.write_prometheus(self.prometheus_textfile)
+        return news_list
+
+    def _write_run_report(self, started_at: datetime, wall_seconds: float, metrics_before, saved: int,
+                          worker: Optional[str] = None):
+        """输出本次运行的JSON报告，并按需更新 Prometheus textfile"""
+        try:
+            report = {
+                'date': self.date,
+                'from_date': self.from_date,
+                'started_at': started_at.isoformat(timespec='seconds'),
+                'wall_seconds': round(wall_seconds, 3),
+                'fetch_mode': self.fetch_mode,
+                'articles_saved': saved,
+                **self.metrics.report(since=metrics_before),
+                'connections': self.http.connection_stats(),
+                'rate_limits': self.rate_limiter.stats() if self.rate_limiter else {},
+            }
+            if worker:
+                report['worker'] = worker
+            write_run_report(report, METRICS_REPORT_DIR)
+            if self.prometheus_textfile:
+                self.metrics.write_prometheus(self.prometheus_textfile)
+        except Exception as e:
+            self.logger.error(f"写入运行报告失败: {str(e)}")
+
+    def _respect_rate_limit(self, url: str):
+        """按主机进行请求频率限制
+
+        从该主机的令牌桶预约一次请求，令牌不足或主机要求 Retry-After 时等待。
+        """
+        if self.rate_limiter is None:
+            return
+        waited = self.rate_limiter.acquire(urlparse(url).netloc)
+        if waited:
+            self.metrics.inc('rate_limit_sleep_seconds', waited)
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """限制同一主机同时进行的请求数的信号量"""
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.max_requests_per_host)
+                self._host_slots[host] = slot
+        return slot
+
+    def _network_slot(self, url: str, blocking: bool = True) -> Optional[ExitStack]:
+        """实际发出网络请求前占用主机并发槽位，并从限速器预约令牌
+
+        返回的上下文管理器在请求结束时释放槽位。blocking 为 False 时（对冲请求）
+        不等待：主机没有空闲槽位或限速器没有可用令牌时返回None。
+        """
+        slot = self._host_semaphore(url)
+        if not slot.acquire(blocking=blocking):
+            return None
+        try:
+            if blocking:
+                self._respect_rate_limit(url)
+            elif self.rate_limiter is not None and not self.rate_limiter.try_acquire(urlparse(url).netloc):
+                slot.release()
+                return None
+        except BaseException:
+            slot.release()
+            raise
+        held = ExitStack()
+        held.callback(slot.release)
+        return held
+
+    def _timed_get(self, url: str, stage: str, revalidate: bool = False) -> requests.Response:
+        """发出一次请求；实际发出网络请求时计入请求数，排队和请求耗时分别记录
+
+        等待主机并发槽位和限速令牌的时间记入 request_queue，其余耗时记入 stage，
+        缓存命中不计数也不计时。
+        """
+        queued = []
+
+        def acquire(target: str, blocking: bool = True) -> Optional[ExitStack]:
+            # 只有实际发出网络请求时才占用主机并发槽位和限速令牌，缓存命中直接返回
+            if not blocking:
+                return self._network_slot(target, blocking=False)
+            start = time.perf_counter()
+            gate = self._network_slot(target)
+            queued.append(time.perf_counter() - start)
+            self.metrics.inc('requests')
+            return gate
+
+        start = time.perf_counter()
+        try:
+            return self.http.get(url, use_cache=self.use_cache, revalidate=revalidate,
+                                 acquire=acquire, headers=self.headers, timeout=10)
+        finally:
+            if queued:
+                self.metrics.observe('request_queue', queued[0])
+                self.metrics.observe(stage, time.perf_counter() - start - queued[0])
+
+    def _make_request(self, url: str, stage: str, retries: int = 3,
+                      revalidate: bool = False) -> Optional[requests.Response]:
+        """发送HTTP请求并处理重试，stage 为记录请求耗时的阶段
+
+        429/503 和超时会降低该主机的请求速率（并遵守 Retry-After），
+        重试同样经过限速器排队，不再固定按指数退避等待。
+        """
+        host = urlparse(url).netloc
         for i in range(retries):
+            if i:
+                self.metrics.inc('retries')
             try:
-                response = requests.get(url, headers=self.headers, timeout=10)
+                response = self._timed_get(url, stage, revalidate)
+                if getattr(response, 'from_cache', False):
+                    self.metrics.inc('cache_hits')
+                else:
+                    self.metrics.inc('bytes_transferred', len(response.content))
+                    self._adapt_rate(host, response, response.elapsed.total_seconds())
                 response.raise_for_status()
                 return response
                 
             except Timeout:
+                self.metrics.inc('throttled')
+                if self.rate_limiter:
+                    self.rate_limiter.on_throttle(host, '请求超时')
                 self.logger.warning(f"请求超时 ({i+1}/{retries}): {url}")
                 if i == retries - 1:
                     raise NetworkError(f"请求多次超时: {url}")
@@ -89,183 +383,203 @@ class AiNewsCrawler:
             except TooManyRedirects:
                 self.logger.error(f"重定向次数过多: {url}")
                 raise NetworkError(f"重定向错误: {url}")
+
+            except CircuitOpenError as e:
+                # 主机已熔断，重试也会被拒绝
+                self.metrics.inc('circuit_rejected')
+                raise NetworkError(str(e))
                 
             except RequestException as e:
                 self.logger.warning(f"请求失败 ({i+1}/{retries}): {url}, 错误: {str(e)}")
                 if i == retries - 1:
                     raise NetworkError(f"请求失败: {url}, 错误: {str(e)}")
-                time.sleep(2 ** i)  # 指数退避
                 
         return None
 
+    def _adapt_rate(self, host: str, response: requests.Response, latency: float):
+        """根据响应调整主机的请求速率：限流时乘性下降，正常响应时加性增加"""
+        if response.status_code in self.THROTTLE_STATUS:
+            self.metrics.inc('throttled')
+            if self.rate_limiter:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                self.rate_limiter.on_throttle(host, f'返回{response.status_code}', retry_after)
+        elif response.status_code < 500 and self.rate_limiter:
+            self.rate_limiter.on_success(host, latency)
+
+    def _canonical_url(self, link: str) -> str:
+        """将列表页中的链接补全并规范化（scheme、主机别名、跟踪参数、已知的重定向）"""
+        return self.urls.canonical(link)
+
     def _validate_news_data(self, news: Dict) -> bool:
         """验证新闻数据完整性"""
         required_fields = ['title', 'content', 'createTime', 'url']
         return all(field in news and news[field] for field in required_fields)
 
     def _parse_sina_news(self, item) -> Optional[Dict]:
-        """解析新浪新闻数据"""
+        """解析新浪新闻数据
+
+        同一篇文章（规范化后的URL相同）同时只请求一次：其他线程中同时出现的调用等待
+        这次请求完成后直接返回None，文章由先发起请求的调用处理。
+        """
         try:
             # 提取新闻URL
             url = item.get('href', '')
             if not url:
                 return None
             
-            # 确保URL是完整的
-            if not url.startswith('http'):
-                url = 'https:' + url if url.startswith('//') else 'https://tech.sina.com.cn' + url
+            # 补全并规范化URL（已知的重定向直接换成目标URL）
+            url = self._canonical_url(url)
             
             # 检查URL是否有效
             if not url.endswith(('.html', '.shtml')) or 'sina.com.cn' not in url:
                 return None
             
-            if url in self.processed_urls:
+            with self._lock:
+                if url in self.processed_urls:
+                    return None
+                future = self._in_flight.get(url)
+                owner = future is None
+                if owner:
+                    future = self._in_flight[url] = Future()
+            if not owner:
+                self._avoided_fetch('fetches_coalesced')
+                future.result()
                 return None
-            
-            # 获取新闻详情页
             try:
-                response = self._make_request(url)
-                if not response:
+                if self.seen_index.contains(url):
                     return None
-                
-                # 设置正确的编码
-                response.encoding = 'utf-8'
-                soup = BeautifulSoup(response.text, 'lxml')
-                
-                # 提取标题
-                title = None
-                title_selectors = [
-                    'h1.main-title',
-                    'h1[class*="article-title"]',
-                    'h1[class*="main_title"]',
-                    'div.article-header h1'
-                ]
-                for selector in title_selectors:
-                    title_elem = soup.select_one(selector)
-                    if title_elem:
-                        title = title_elem.text.strip()
-                        break
-                
-                if not title:
-                    return None
-                
-                # 提取内容
-                content = ''
-                content_selectors = [
-                    'div.article',
-                    'div[id="article"]',
-                    'div[class*="article-content"]'
-                ]
-                
-                for selector in content_selectors:
-                    article_div = soup.select_one(selector)
-                    if article_div:
-                        # 只保留 p 和 img 标签，移除其他所有标签
-                        for tag in article_div.find_all(True):
-                            if tag.name not in ['p', 'img']:
-                                tag.unwrap()  # 移除标签但保留内容
-                        
-                        # 获取清理后的内容元素
-                        content_elements = article_div.find_all(['p', 'img'])
-                        if content_elements:
-                            # 清理标签属性
-                            for elem in content_elements:
-                                if elem.name == 'img':
-                                    # 对于img标签，保留src属性并添加自适应属性
-                                    src = elem.get('src', '')
-                                    elem.attrs = {
-                                        'src': src,
-                                        'width': '100%',
-                                        'height': 'auto'
-                                    }
-                                else:
-                                    # 对于p标签，清除所有属性
-                                    elem.attrs = {}
-                            
-                            # 将清理后的元素转换为字符串并组合
-                            content = ''.join([str(elem) for elem in content_elements])
-                            break
-                
-                if not content:
-                    return None
-                
-                # 清理广告内容
-                ad_indicators = [
-                    '产品答疑|网站律师|SINA English',
-                    'Copyright © 1996-2024 SINA Corporation',
-                    'All Rights Reserved 新浪公司 版权所有'
-                ]
-                
-                # 如果内容包含广告特征，直接返回None
-                if any(indicator in content for indicator in ad_indicators):
-                    self.logger.info(f"跳过广告内容: {url}")
-                    return None
-                
-                # 提取日期
-                date = None
-                date_selectors = [
-                    'span.date',
-                    'div.date-source span.date',
-                    'div[class*="article-info"] span.date',
-                    'div[class*="article-info"] span[class*="time"]'
-                ]
-                for selector in date_selectors:
-                    date_elem = soup.select_one(selector)
-                    if date_elem:
-                        date = date_elem.text.strip()
-                        break
-                
-                if not date:
-                    return None
-                
-                # 提取图片
-                image_url = None
-                image_selectors = [
-                    'div.img_wrapper img',
-                    'div[class*="article-content"] img',
-                    'div.article img'
-                ]
-                for selector in image_selectors:
-                    images = soup.select(selector)
-                    if images:  # 如果找到了图片
-                        first_img = images[0]  # 只检查第一张图片
-                        src = first_img.get('src', '')
-                        # 检查第一张图片是否为二维码或广告
-                        if (src and 
-                            not src.endswith(('.gif', 'icon')) and 
-                            'doc_qrcode' not in src and 
-                            'qrcode' not in src):
-                            image_url = src
-                            if not image_url.startswith('http'):
-                                image_url = 'https:' + image_url
-                        break  # 无论结果如何都退出循环
-                
-                # 构建新闻数据
-                news_data = {
-                    '_id': hashlib.md5(url.encode()).hexdigest(),
-                    'title': title,
-                    'brief': BeautifulSoup(content, 'lxml').get_text()[:100] + '...',
-                    'content': content,
-                    'createTime': date,
-                    'url': url,
-                    'imageUrl': image_url,  # 如果第一张图是二维码，这里就是None
-                    'isRecommend': False,
-                    'hasImage': image_url is not None  # 根据imageUrl是否为None来设置
-                }
-                
-                if self._validate_news_data(news_data):
-                    self.processed_urls.add(url)
-                    return news_data
-                
-                return None
+                return self._fetch_article(url)
+            finally:
+                with self._lock:
+                    del self._in_flight[url]
+                future.set_result(None)
+
+        except Exception as e:
+            self.logger.error(f"解析新闻失败: {str(e)}")
+            return None
 
-            except Exception as e:
-                self.logger.error(f"解析新闻详情失败 {url}: {str(e)}")
+    def _fetch_article(self, url: str) -> Optional[Dict]:
+        """获取并解析新闻详情页，请求被重定向时记录重定向，以目标URL作为新闻URL"""
+        try:
+            try:
+                response = self._make_request(url, 'detail_fetch')
+            except NetworkError:
+                self._record_fetch_failure(url)
+                raise
+            if not response:
+                self._record_fetch_failure(url)
+                return None
+            
+            if response.history:
+                target = self.urls.record_redirect(url, response.url)
+                if target != url:
+                    self.metrics.inc('redirects')
+                    with self._lock:
+                        processed = target in self.processed_urls
+                    if processed or self.seen_index.contains(target):
+                        return None
+                    url = target
+            
+            with self.metrics.timer('parse'):
+                news_data = self._build_news_data(url, response)
+            if news_data is None:
                 return None
+            self.metrics.inc('articles_parsed')
+            
+            if self._validate_news_data(news_data):
+                with self._lock:
+                    self.processed_urls.add(url)
+                return news_data
+            
+            return None
 
         except Exception as e:
-            self.logger.error(f"解析新闻失败: {str(e)}")
+            self.logger.error(f"解析新闻详情失败 {url}: {str(e)}")
+            return None
+
+    def _record_fetch_failure(self, url: str):
+        with self._lock:
+            self._fetch_failures.add(url)
+
+    def _take_fetch_failure(self, url: str) -> bool:
+        """url 的详情页请求是否失败过（网络层面），取出记录"""
+        with self._lock:
+            if url in self._fetch_failures:
+                self._fetch_failures.discard(url)
+                return True
+            return False
+
+    def _avoided_fetch(self, reason: str):
+        """记录一次因URL规范化、已知重定向或合并并发请求而省去的文章页请求"""
+        self.metrics.inc(reason)
+        self.metrics.inc('fetches_avoided')
+
+    def _log_avoided_fetches(self, metrics_before: Metrics):
+        """输出本次运行因URL规范化、已知重定向和合并并发请求而省去的文章页请求数"""
+        counters = self.metrics.report(since=metrics_before)['counters']
+        delta = {name: int(counters.get(name, 0))
+                 for name in ('duplicate_links', 'redirects_followed', 'fetches_coalesced', 'fetches_avoided', 'redirects')}
+        self.logger.info(
+            f"URL规范化省去 {delta['fetches_avoided']} 次文章页请求: 重复链接 {delta['duplicate_links']}, "
+            f"已知重定向 {delta['redirects_followed']}, 合并并发请求 {delta['fetches_coalesced']}; "
+            f"本次新发现重定向 {delta['redirects']} 个"
+        )
+
+    def _build_news_data(self, url: str, response: requests.Response) -> Optional[Dict]:
+        """从文章详情页提取新闻数据，非目标日期或内容无效时返回None"""
+        # 设置正确的编码
+        response.encoding = 'utf-8'
+        # 单次解析，所有字段的选择器在同一次遍历中求值
+        article = self.extractor.extract(response.text, urlparse(url).netloc)
+        
+        # 提取标题
+        title = article.title
+        if not title:
+            return None
+        
+        # 提取日期，并在清理正文之前先检查是否为目标日期
+        date = article.date
+        if not date:
+            return None
+        if not self._is_target_date(date):
+            with self._lock:
+                self.processed_urls.add(url)
+            return None
+        
+        # 提取内容（只保留 p 和 img 标签）
+        content = article.content
+        if not content:
             return None
+        
+        # 清理广告内容
+        ad_indicators = [
+            '产品答疑|网站律师|SINA English',
+            'Copyright © 1996-2024 SINA Corporation',
+            'All Rights Reserved 新浪公司 版权所有'
+        ]
+        
+        # 如果内容包含广告特征，直接返回None
+        if any(indicator in content for indicator in ad_indicators):
+            self.logger.info(f"跳过广告内容: {url}")
+            return None
+        
+        # 提取图片（如果第一张图是二维码或图标，这里就是None）
+        image_url = article.image_url
+        
+        # 构建新闻数据
+        news_data = {
+            '_id': hashlib.md5(url.encode()).hexdigest(),
+            'title': title,
+            'brief': article.brief,
+            'content': content,
+            'createTime': date,
+            'url': url,
+            'imageUrl': image_url,  # 如果第一张图是二维码，这里就是None
+            'isRecommend': False,
+            'hasImage': image_url is not None  # 根据imageUrl是否为None来设置
+        }
+
+        return news_data
 
     def _normalize_date(self, date_str: str) -> str:
         """标准化日期格式"""
@@ -302,8 +616,26 @@ class AiNewsCrawler:
             self.logger.error(f"日期格式化失败: {str(e)}")
             return ""
 
+    def _in_date_range(self, date: str) -> bool:
+        """yyyy-mm-dd 格式的日期是否在目标区间内"""
+        return self.from_date <= date <= self.date
+
+    def _range_days(self) -> int:
+        return (datetime.strptime(self.date, '%Y-%m-%d') - datetime.strptime(self.from_date, '%Y-%m-%d')).days + 1
+
+    def _is_target_date(self, date_str: str) -> bool:
+        """发布时间是否在目标日期区间内"""
+        return self._in_date_range(self._normalize_date(date_str))
+
     def _is_valid_news(self, news: Dict) -> bool:
         """验证新闻是否符合条件"""
+        with self.metrics.timer('validation'):
+            valid = self._check_news(news)
+        self.metrics.inc('articles_valid' if valid else 'articles_rejected')
+        return valid
+
+    def _check_news(self, news: Dict) -> bool:
+        """_is_valid_news 的具体检查：字段完整、目标日期、关键词"""
         try:
             if not self._validate_news_data(news):
                 return False
@@ -313,22 +645,21 @@ class AiNewsCrawler:
             if not news_date:
                 return False
             
-            target_date = datetime.strptime(self.date, '%Y-%m-%d').date()
-            news_date_obj = datetime.strptime(news_date, '%Y-%m-%d').date()
-            
-            if news_date_obj != target_date:
+            if not self._in_date_range(news_date):
                 return False
 
-            # 检查文本内容（转换为小写进行比较）
-            text = f"{news['title']} {news['content']}".lower()
+            # 检查文本内容（匹配器内部不区分大小写）
+            text = f"{news['title']} {news['content']}"
             
-            # 检查是否包含需要过滤的关键词（不区分大小写）
-            if any(keyword.lower() in text for keyword in FILTER_KEYWORDS):
-                self.logger.info(f"过滤包含关键词的新闻: {news['title']}")
+            with self.metrics.timer('keyword_filter'):
+                # 检查是否包含需要过滤的关键词
+                filter_hits = self.filter_matcher.find_all(text)
+                # 检查是否包含目标关键词
+                keyword_hit = not filter_hits and self.keyword_matcher.search(text)
+            if filter_hits:
+                self.logger.info(f"过滤包含关键词的新闻: {news['title']} (命中: {', '.join(sorted(filter_hits))})")
                 return False
-
-            # 检查是否包含目标关键词（不区分大小写）
-            if not any(keyword.lower() in text for keyword in self.keywords):
+            if not keyword_hit:
                 return False
 
             return True
@@ -337,131 +668,322 @@ class AiNewsCrawler:
             self.logger.error(f"验证新闻失败: {str(e)}")
             return False
 
-    def crawl_sina(self) -> List[Dict]:
-        """爬取新浪科技新闻"""
+    def _parse_news_items(self, items) -> List[Optional[Dict]]:
+        """解析一批新闻条目，返回结果与输入顺序一致
+
+        serial 模式逐条解析；thread 模式使用线程池并发抓取详情页，
+        每个主机的并发数和请求间隔仍受 _network_slot 约束。
+        """
+        if self.fetch_mode == 'serial' or len(items) <= 1:
+            return [self._fetch_news(item) for item in items]
+
+        # 同一批次中重复的链接（按规范化URL）只抓取一次，与串行模式下被 processed_urls 跳过的效果一致
+        unique_items = []
+        seen_urls = set()
+        for item in items:
+            url = self._canonical_url(item.get('href', ''))
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            unique_items.append(item)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self._fetch_news, unique_items))
+
+    def _check_near_duplicate(self, news: Dict) -> bool:
+        """检查是否与已保存或本次已接受的新闻近似重复，返回是否保留
+
+        NEAR_DUP_ACTION 为 link 时保留重复的新闻，并在 duplicateOf 中记录原文URL。
+        """
+        if self.near_dup is None:
+            return True
+        with self.metrics.timer('near_dup'):
+            match = self.near_dup.check_and_reserve(news)
+        if match is None:
+            return True
+        _, original_url, distance = match
+        self.metrics.inc('near_duplicates')
+        if NEAR_DUP_ACTION == 'link':
+            news['duplicateOf'] = original_url
+            self.logger.info(f"近似重复的新闻: {news['title']} (与 {original_url} 相似, 距离 {distance})")
+            return True
+        self.logger.info(f"跳过近似重复的新闻: {news['title']} (与 {original_url} 相似, 距离 {distance})")
+        return False
+
+    def _fetch_news(self, item) -> Optional[Dict]:
+        """抓取、解析并校验一条新闻，不符合条件时返回None
+
+        抓取过详情页的文章（无论是否通过校验）立即记录到检查点。
+        """
+        news = self._parse_sina_news(item)
+        valid = False
+        try:
+            valid = news is not None and self._is_valid_news(news) and self._check_near_duplicate(news)
+        except Exception as e:
+            self.logger.error(f"处理新闻失败: {str(e)}")
+        if self.checkpoint is not None:
+            url = news['url'] if news else self._canonical_url(item.get('href', ''))
+            # processed_urls 中的URL已请求过详情页（解析成功或不是目标日期）
+            with self._lock:
+                fetched = url in self.processed_urls
+            if fetched:
+                self.checkpoint.record_article(url, news if valid else None)
+        return news if valid else None
+
+    def _roll_page_url(self, page: int) -> str:
+        """滚动新闻第 page 页的URL"""
+        if page == 1:
+            return "https://tech.sina.com.cn/roll/"
+        return f"https://tech.sina.com.cn/roll/index_0_0_{page}.shtml"
+
+    def _fetch_listing(self, url: str, revalidate: bool = False) -> Optional['BeautifulSoup']:
+        """获取并解析列表页，同一次运行中重复请求的页面直接复用
+
+        revalidate 为 True 时即使缓存未过期也向服务器确认（守护模式轮询使用）。
+        """
+        if url in self._listing_pages:
+            return self._listing_pages[url]
+        response = self._make_request(url, 'listing_fetch', revalidate=revalidate)
+        soup = None
+        if response:
+            # 设置正确的编码
+            response.encoding = 'utf-8'
+            from bs4 import BeautifulSoup
+            soup = BeautifulSoup(response.text, 'lxml')
+        self._listing_pages[url] = soup
+        return soup
+
+    def _listing_item_date(self, item) -> Optional[str]:
+        """读取列表项旁显示的发布时间，返回 yyyy-mm-dd；没有时间信息时返回None
+
+        只读取时间节点（如 span.c_time），没有时间节点时读取链接以外的文字，
+        标题中出现的日期（如“9月10日发布会前瞻”）不会被当作发布时间。
+        """
+        container = item.find_parent('li') or item.parent
+        if container is None:
+            return None
+        time_node = container.select_one(self.LISTING_TIME_SELECTOR)
+        if time_node is not None:
+            text = time_node.get_text(' ', strip=True)
+        else:
+            text = ' '.join(node.get_text(' ', strip=True) if hasattr(node, 'get_text') else str(node)
+                            for node in container.children if node is not item)
+        # 同一段文字中有多个日期时取最后一个（时间一般在标题之后）
+        matches = list(re.finditer(r'(\d{4})[-年/](\d{1,2})[-月/](\d{1,2})|(\d{1,2})月(\d{1,2})日', text))
+        if not matches:
+            return None
+        year, month, day, short_month, short_day = matches[-1].groups()
+        try:
+            if year:
+                return datetime(int(year), int(month), int(day)).strftime('%Y-%m-%d')
+            return self._nearest_month_day(int(short_month), int(short_day))
+        except ValueError:
+            return None
+
+    def _nearest_month_day(self, month: int, day: int) -> str:
+        """列表只显示月日时，取离目标日期最近的年份补全（跨年时12月的新闻属于上一年）"""
+        target = datetime.strptime(self.date, '%Y-%m-%d')
+        candidates = []
+        for year in (target.year - 1, target.year, target.year + 1):
+            try:
+                candidates.append(datetime(year, month, day))
+            except ValueError:
+                continue
+        if not candidates:
+            raise ValueError(f"无效的日期: {month}月{day}日")
+        return min(candidates, key=lambda date: abs(date - target)).strftime('%Y-%m-%d')
+
+    def _roll_page_dates(self, page: int) -> Optional[List[str]]:
+        """返回滚动新闻某一页上所有列表项的日期，无法获取时返回None"""
+        soup = self._fetch_listing(self._roll_page_url(page))
+        if soup is None:
+            return None
+        dates = [self._listing_item_date(item)
+                 for selector in self.ROLL_SELECTORS for item in soup.select(selector)]
+        dates = [date for date in dates if date]
+        return dates or None
+
+    def _find_roll_start_page(self) -> Optional[int]:
+        """找到第一个包含目标日期（或更早）新闻的滚动页，找不到时返回None
+
+        滚动新闻按时间倒序排列。先从第1页开始倍增页码找到上界，
+        再在区间内二分查找，回填较早的日期时不必从第1页逐页翻。
+        """
+        def reached(page):
+            dates = self._roll_page_dates(page)
+            # 取不到日期时视为已到达，从该页开始按原有方式翻页
+            return dates is None or min(dates) <= self.date
+
+        if reached(1):
+            return 1
+        low, high = 1, 2
+        while not reached(high):
+            low, high = high, high * 2
+            if high > ROLL_SEARCH_MAX_PAGE:
+                self.logger.warning(f"在前 {ROLL_SEARCH_MAX_PAGE} 页内未找到日期 {self.date}，跳过滚动新闻")
+                return None
+        # 不变式: reached(low) 为假, reached(high) 为真
+        while high - low > 1:
+            middle = (low + high) // 2
+            if reached(middle):
+                high = middle
+            else:
+                low = middle
+        self.logger.info(f"日期 {self.date} 的滚动新闻从第 {high} 页开始")
+        return high
+
+    def _select_news_items(self, soup, selectors):
+        """从列表页中选出需要抓取详情页的新闻条目
+
+        返回 (条目列表, 本页列表项上显示的发布日期, 本页目标日期的全部链接)。
+        只保留目标日期（或没有日期信息）、未保存过且标题命中关键词的条目。
+        链接按规范化后的URL去重，同一篇文章在本页出现多次时只保留第一个条目。
+        """
+        news_items = []
+        page_dates = []
+        page_links = []
+        raw_links: Dict[str, str] = {}  # 规范化URL -> 本页第一次出现时的原始链接
+        for selector in selectors:
+            items = soup.select(selector)
+            for item in items:
+                # 检查链接是否存在
+                link = item.get('href', '')
+                if not link:
+                    continue
+                
+                # 列表项带有发布时间时，非目标日期的新闻不再抓取详情页
+                item_date = self._listing_item_date(item)
+                if item_date:
+                    page_dates.append(item_date)
+                    if not self._in_date_range(item_date):
+                        continue
+                
+                # 补全并规范化URL，已知的重定向换成目标URL
+                raw_link = link
+                link, redirected = self.urls.resolve(link)
+                if link in raw_links:
+                    # 原始链接不同（手机版、跟踪参数等）时，不规范化就会再请求一次
+                    if raw_links[link] != raw_link:
+                        self._avoided_fetch('duplicate_links')
+                    continue
+                raw_links[link] = raw_link
+                page_links.append(link)
+                
+                # 如果URL已经保存过（任意日期），跳过
+                if self.seen_index.contains(link):
+                    if redirected:
+                        self._avoided_fetch('redirects_followed')
+                    continue
+                
+                # 获取标题本
+                title = item.get_text(strip=True)
+                if not title:
+                    continue
+                
+                # 检查标题是否包含关键词（不区分大小写）
+                title_hits = self.keyword_matcher.find_all(title)
+                if title_hits:
+                    news_items.append(item)
+                    self.logger.info(f"找到新的相关标题: {title} (命中: {', '.join(sorted(title_hits))})")
+        return news_items, page_dates, page_links
+
+    def _collect_valid_news(self, news_items, news_list: List[Dict]):
+        """抓取并解析条目，将符合条件且未保存过的新闻追加到 news_list"""
+        for news in self._parse_news_items(news_items):
+            if news:
+                # 再次检查URL是否已存在
+                if self.seen_index.contains(news['url']):
+                    # 已保存过，撤销近似重复检查时的登记；列表中已有同一URL时 _id 相同，
+                    # 登记属于已保留的那一条，不能撤销
+                    if self.near_dup is not None:
+                        self.near_dup.release([news['_id']])
+                elif not any(existing['url'] == news['url'] for existing in news_list):
+                    news_list.append(news)
+                    self.logger.info(f"成功解析新闻: {news['title']}")
+
+    def _next_page(self, is_roll: bool, page: int, start_page: int, found_news: bool,
+                   page_dates: List[str]) -> Optional[int]:
+        """根据当前列表页决定下一页的页码，不再翻页时返回None"""
+        if not found_news and not page_dates and page > start_page:
+            # 列表没有时间信息时，当前页面未找到相关新闻则停止翻页
+            self.logger.info("当前页面未找到相关新闻，停止翻页")
+        elif is_roll and page_dates and min(page_dates) < self.from_date:
+            # 列表按时间倒序，本页已出现更早的日期，后面的页不会再有目标日期的新闻
+            self.logger.info(f"已翻过目标日期 {self.from_date}，停止翻页")
+        elif is_roll and (page_dates or found_news):
+            # 设置一个合理的翻页上限（按区间天数放大），防止无限循环
+            if page + 1 - start_page >= ROLL_MAX_PAGES * self._range_days():
+                self.logger.info("达到最大页数限制，停止翻页")
+            else:
+                return page + 1
+        return None
+
+    def crawl_sina(self, resume_state: Optional[CheckpointState] = None) -> List[Dict]:
+        """爬取新浪科技新闻
+
+        resume_state 为从检查点恢复的进度：已接受的新闻直接计入结果，
+        已记录的列表页不再请求，先抓取其中尚未完成的文章，再从记录的下一页继续翻页。
+        """
         news_list = []
-        existing_urls = set()
+        self._listing_pages = {}
+        if resume_state is not None:
+            news_list.extend(resume_state.articles.values())
+            with self._lock:
+                self.processed_urls.update(resume_state.done_urls)
+            if self.near_dup is not None:
+                # 恢复的新闻也参与本次运行的近似重复检查
+                for news in resume_state.articles.values():
+                    self.near_dup.check_and_reserve(news)
         
-        # 检查已有的JSON文件
-        json_path = f'res/res/sina_{self.date}.json'
-        if os.path.exists(json_path):
-            try:
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    existing_news = json.load(f)
-                    existing_urls = {news['url'] for news in existing_news}
-                    self.logger.info(f"从现有文件中读取到 {len(existing_urls)} 条新闻URL")
-            except Exception as e:
-                self.logger.error(f"读取现有JSON文件失败: {str(e)}")
+        # 已保存过的URL（包括其他日期）由 seen_index 判断，无需读取JSON文件
+        self.logger.info(f"已抓取URL索引中共有 {self.seen_index.count()} 条记录")
         
         try:
             # 爬取新浪科技首页和新闻列表页
-            base_urls = [
-                "https://tech.sina.com.cn/",  # 首页
-                "https://tech.sina.com.cn/roll/",  # 滚动新闻
-            ]
-            
-            for base_url in base_urls:
-                page = 1
+            for base_url in self.BASE_URLS:
+                is_roll = "roll" in base_url
+                records = resume_state.listings.get(base_url) if resume_state else None
+                if records:
+                    # 先补抓检查点中列表页上未完成的文章，再从记录的下一页继续
+                    pending = resume_state.pending_links(base_url)
+                    if pending:
+                        self.logger.info(f"继续抓取检查点中未完成的 {len(pending)} 篇文章: {base_url}")
+                        self._collect_valid_news([{'href': link} for link in pending], news_list)
+                    if records[-1]['next'] is None:
+                        continue
+                    start_page, page = records[-1]['start'], records[-1]['next']
+                else:
+                    # 滚动新闻按日期定位起始页，首页只有一页
+                    start_page = self._find_roll_start_page() if is_roll else 1
+                    if start_page is None:
+                        continue
+                    page = start_page
                 while True:
+                    # 构建URL（对于首页，page=1时使用原始URL，否则使用分页URL）
+                    url = self._roll_page_url(page) if is_roll else base_url
                     try:
-                        # 构建URL（对于首页，page=1时使用原始URL，否则使用分页URL）
-                        if "roll" in base_url:
-                            if page == 1:
-                                url = base_url
-                            else:
-                                url = f"https://tech.sina.com.cn/roll/index_0_0_{page}.shtml"
-                        else:
-                            if page > 1:
-                                break  # 首页不需要翻页
-                            url = base_url
-                        
                         self.logger.info(f"正在爬取页面: {url}")
-                        response = self._make_request(url)
-                        if not response:
+                        soup = self._fetch_listing(url)
+                        if soup is None:
                             break
                         
-                        # 设置正确的编码
-                        response.encoding = 'utf-8'
-                        soup = BeautifulSoup(response.text, 'lxml')
-                        
-                        # 获取新闻列表
-                        news_items = []
-                        
                         # 定义所有可能包含新闻链接的选择器
-                        if "roll" in url:
-                            # 滚动新闻页面的选择器
-                            selectors = {
-                                'ul.list_009 li a': True,
-                                '.listBlk a': True,
-                            }
-                        else:
-                            # 首页的选择器
-                            selectors = {
-                                '.tech-news a': True,
-                                '.feed-card-item h2 a': True,
-                                '.news-list a': True,
-                                '.main-list a': True,
-                                'article a': True,
-                                '.seo_data_list a': True,
-                            }
-                        
-                        # 遍历所有选择器获取链接和标题
-                        found_news = False
-                        for selector in selectors:
-                            items = soup.select(selector)
-                            for item in items:
-                                # 检查链接是否存在
-                                url = item.get('href', '')
-                                if not url:
-                                    continue
-                                
-                                # 确保URL是完整的
-                                if not url.startswith('http'):
-                                    url = 'https:' + url if url.startswith('//') else 'https://tech.sina.com.cn' + url
-                                
-                                # 如果URL已经存在于现有数据中，跳过
-                                if url in existing_urls:
-                                    continue
-                                
-                                # 获取标题本
-                                title = item.get_text(strip=True)
-                                if not title:
-                                    continue
-                                
-                                # 检查标题是否包含关键词（不区分大小写）
-                                title_lower = title.lower()
-                                if any(keyword.lower() in title_lower for keyword in self.keywords):
-                                    news_items.append(item)
-                                    found_news = True
-                                    self.logger.info(f"找到新的相关标题: {title}")
+                        selectors = self.ROLL_SELECTORS if is_roll else self.HOME_SELECTORS
+                        news_items, page_dates, _ = self._select_news_items(soup, selectors)
+                        found_news = bool(news_items)
                         
-                        if not found_news and page > 1:
-                            # 如果当前页面没有找到相关新闻，并且不是第一页，则停止翻页
-                            self.logger.info("当前页面未找到相关新闻，停止翻页")
-                            break
+                        # 在处理文章之前决定是否继续翻页，和本页待抓取的链接一起写入检查点
+                        next_page = self._next_page(is_roll, page, start_page, found_news, page_dates)
+                        if self.checkpoint is not None:
+                            links = [self._canonical_url(item.get('href', '')) for item in news_items]
+                            self.checkpoint.record_listing(base_url, url, page, start_page, links, next_page)
                         
                         # 处理每条新闻
-                        for item in news_items:
-                            try:
-                                news = self._parse_sina_news(item)
-                                if news and self._is_valid_news(news):
-                                    # 再次检查URL是否已存在
-                                    if news['url'] not in existing_urls and not any(existing['url'] == news['url'] for existing in news_list):
-                                        news_list.append(news)
-                                        self.logger.info(f"成功解析新闻: {news['title']}")
-                            except Exception as e:
-                                self.logger.error(f"处理新闻失败: {str(e)}")
-                                continue
+                        self._collect_valid_news(news_items, news_list)
                         
-                        # 检查是否需要继续翻页
-                        if "roll" not in url or not found_news:
-                            break
-                        
-                        page += 1
-                        # 设置一个合理的翻页上限，防止无限循环
-                        if page > 20:  # 最多爬取20页
-                            self.logger.info("达到最大页数限制，停止翻页")
+                        if next_page is None:
                             break
+                        page = next_page
                         
                     except Exception as e:
                         self.logger.error(f"处理页面失败: {url}, 错误: {str(e)}")
@@ -477,9 +999,152 @@ class AiNewsCrawler:
 
         return news_list
 
+    @staticmethod
+    def _listing_task(base_url: str, page: int, start_page: int) -> Dict:
+        return {'key': f'listing:{base_url}#{page}', 'kind': 'listing',
+                'payload': {'base': base_url, 'page': page, 'start': start_page}}
+
+    @staticmethod
+    def _article_task(url: str) -> Dict:
+        return {'key': f'article:{url}', 'kind': 'article', 'payload': {'url': url}}
+
+    def seed_queue(self, queue) -> int:
+        """把各入口的第一个列表页放入工作队列（滚动新闻先按日期定位起始页），返回新增的条目数"""
+        tasks = []
+        for base_url in self.BASE_URLS:
+            start_page = self._find_roll_start_page() if "roll" in base_url else 1
+            if start_page is not None:
+                tasks.append(self._listing_task(base_url, start_page, start_page))
+        self._listing_pages = {}
+        return queue.put_many(tasks)
+
+    def _run_task(self, task: Dict):
+        """处理一个队列条目，返回 (展开出的新条目, 新闻或None)
+
+        列表页展开为本页待抓取的文章和下一页；文章抓取、解析并校验。
+        请求在网络层面失败时抛出 NetworkError，由队列按租约和 max_attempts 重试。
+        """
+        payload = task['payload']
+        if task['kind'] == 'article':
+            url = payload['url']
+            news = self._fetch_news({'href': url})
+            if news is None and self._take_fetch_failure(self._canonical_url(url)):
+                raise NetworkError(f"文章请求失败: {url}")
+            if news is not None and self.near_dup is not None:
+                # 结果交给队列，由 collect_queue() 统一检查近似重复后保存，worker 不保留登记
+                self.near_dup.release([news['_id']])
+            return [], news
+        base_url, page, start_page = payload['base'], payload['page'], payload['start']
+        is_roll = "roll" in base_url
+        url = self._roll_page_url(page) if is_roll else base_url
+        self.logger.info(f"正在爬取页面: {url}")
+        try:
+            soup = self._fetch_listing(url)
+        finally:
+            # worker 长时间运行，列表页处理完即释放
+            self._listing_pages.pop(url, None)
+        if soup is None:
+            # 列表页失败时重试，否则这一入口之后的翻页都会丢失
+            raise NetworkError(f"列表页请求失败: {url}")
+        news_items, page_dates, _ = self._select_news_items(soup, self.ROLL_SELECTORS if is_roll else self.HOME_SELECTORS)
+        next_page = self._next_page(is_roll, page, start_page, bool(news_items), page_dates)
+        children = [self._article_task(self._canonical_url(item.get('href', ''))) for item in news_items]
+        if next_page is not None:
+            children.append(self._listing_task(base_url, next_page, start_page))
+        return children, None
+
+    def _work_task(self, queue, task: Dict, worker: str):
+        try:
+            children, news = self._run_task(task)
+        except Exception as e:
+            retry = queue.fail(task['key'], str(e), worker, task['attempts'])
+            self.logger.error(f"处理队列条目失败{'，稍后重试' if retry else ''}: {task['key']}, 错误: {str(e)}")
+            return
+        queue.complete(task['key'], children, news)
+
+    def work(self, queue) -> int:
+        """作为工作队列的 worker 运行，直到队列中没有待处理和处理中的条目，返回处理的条目数
+
+        thread 模式下同时处理 max_workers 个条目，serial 模式逐个处理。
+        限速器换成队列中共享状态的 SharedRateLimiter，所有 worker 合计不超过每个主机的速率；
+        max_requests_per_host 仍按进程计算。结果只写入队列，由 collect_queue() 统一保存。
+        """
+        if self.rate_limiter is not None and not isinstance(self.rate_limiter, SharedRateLimiter):
+            self.rate_limiter = SharedRateLimiter.from_limiter(self.rate_limiter, queue)
+        worker = f'{socket.gethostname()}-{os.getpid()}'
+        started_at = datetime.now()
+        start = time.perf_counter()
+        metrics_before = self.metrics.snapshot()
+        slots = self.max_workers if self.fetch_mode == 'thread' else 1
+        processed = 0
+        running = set()
+        with ThreadPoolExecutor(max_workers=slots) as executor:
+            while True:
+                if len(running) < slots:
+                    tasks = queue.lease(worker, slots - len(running), WORK_QUEUE_LEASE_SECONDS)
+                    running.update(executor.submit(self._work_task, queue, task, worker) for task in tasks)
+                if not running:
+                    if queue.drained():
+                        break
+                    time.sleep(WORK_QUEUE_POLL_INTERVAL)
+                    continue
+                done, running = wait(running, timeout=WORK_QUEUE_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                processed += len(done)
+        self.metrics.inc('queue_tasks', processed)
+        self.logger.info(f"worker {worker} 处理了 {processed} 个队列条目")
+        self._write_run_report(started_at, time.perf_counter() - start, metrics_before, 0, worker=worker)
+        return processed
+
+    def run_queue(self, queue, start_workers: Optional[Callable[[], list]] = None, resume: bool = False):
+        """分布式模式的协调进程：清空并填充队列，启动 worker，队列清空后统一保存结果
+
+        start_workers 启动本机的 worker 进程并返回进程列表。其他机器上的 worker
+        可以同时处理同一个队列（Redis 后端）。本机 worker 结束后协调进程也作为
+        worker 处理剩余条目，直到队列清空。resume 为 True 时保留上次中断的队列。
+        """
+        started_at = datetime.now()
+        start = time.perf_counter()
+        metrics_before = self.metrics.snapshot()
+        saved = []
+        try:
+            if not resume:
+                queue.clear()
+            added = self.seed_queue(queue)
+            self.logger.info(f"工作队列新增 {added} 个条目，当前状态: {queue.counts()}")
+            for process in (start_workers() if start_workers else []):
+                process.join()
+            self.work(queue)
+            saved = self.collect_queue(queue)
+            counts = queue.counts()
+            if counts['failed']:
+                self.logger.warning(f"{counts['failed']} 个队列条目多次处理失败，已放弃")
+            self.logger.info(f"分布式爬取完成，保存 {len(saved)} 条新闻")
+            queue.clear()
+        finally:
+            self.http.log_stats()
+            self._log_avoided_fetches(metrics_before)
+            if self.rate_limiter:
+                self.rate_limiter.log_stats()
+            self._write_run_report(started_at, time.perf_counter() - start, metrics_before, len(saved))
+        return saved
+
+    def collect_queue(self, queue) -> List[Dict]:
+        """保存队列中尚未保存的结果（按 _id 合并），返回本次保存的新闻
+
+        已保存过的URL跳过；近似重复在这里统一检查，不同 worker 抓到的重复稿件也能识别。
+        """
+        results = queue.pending_results()
+        news_list = [news for news in results
+                     if not self.seen_index.contains(news['url']) and self._check_near_duplicate(news)]
+        if news_list:
+            self._save_news(news_list)
+        queue.mark_collected(news['_id'] for news in results)
+        return news_list
+
     def get_article_content(self, url):
         try:
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.http.get(url, headers=self.headers, timeout=10)
+            from bs4 import BeautifulSoup
             soup = BeautifulSoup(response.text, 'html.parser')
             
             # 根据不同网站的结构选择合适的内容选择器
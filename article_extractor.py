@@ -0,0 +1,346 @@
+import re
+import threading
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree, html as lxml_html
+
+# 各字段的候选选择器，按优先级排列
+SINA_FIELD_SELECTORS = {
+    'title': [
+        'h1.main-title',
+        'h1[class*="article-title"]',
+        'h1[class*="main_title"]',
+        'div.article-header h1',
+    ],
+    'content': [
+        'div.article',
+        'div[id="article"]',
+        'div[class*="article-content"]',
+    ],
+    'date': [
+        'span.date',
+        'div.date-source span.date',
+        'div[class*="article-info"] span.date',
+        'div[class*="article-info"] span[class*="time"]',
+    ],
+    'image': [
+        'div.img_wrapper img',
+        'div[class*="article-content"] img',
+        'div.article img',
+    ],
+}
+
+_COMPOUND_RE = re.compile(
+    r'(?P<tag>[a-zA-Z][\w-]*)?'
+    r'(?P<rest>(?:\.[\w-]+|#[\w-]+|\[[\w-]+(?:[*^$]?="[^"]*")?\])*)$'
+)
+_PART_RE = re.compile(r'\.([\w-]+)|#([\w-]+)|\[([\w-]+)(?:([*^$]?)="([^"]*)")?\]')
+
+# 内容清理时保留的标签，其余标签去掉但保留其中的文本
+_KEEP_TAGS = ('p', 'img')
+
+
+class _Compound:
+    """单个复合选择器，如 div.article 或 span[class*="time"]"""
+
+    def __init__(self, text: str):
+        match = _COMPOUND_RE.match(text)
+        if not match or not text:
+            raise ValueError(f"不支持的选择器: {text}")
+        self.tag = match.group('tag')
+        self.classes = []
+        self.attrs = []  # (name, op, value)
+        for part in _PART_RE.finditer(match.group('rest')):
+            cls, id_, attr, op, value = part.groups()
+            if cls:
+                self.classes.append(cls)
+            elif id_:
+                self.attrs.append(('id', '=', id_))
+            elif '=' in part.group(0):
+                self.attrs.append((attr, op or '=', value))
+            else:
+                self.attrs.append((attr, None, None))
+
+    def match(self, el) -> bool:
+        if self.tag and el.tag != self.tag:
+            return False
+        if self.classes:
+            classes = (el.get('class') or '').split()
+            if not all(cls in classes for cls in self.classes):
+                return False
+        for name, op, value in self.attrs:
+            actual = el.get(name)
+            if actual is None:
+                return False
+            if op is None:
+                continue
+            if op == '*':
+                ok = value in actual
+            elif op == '^':
+                ok = actual.startswith(value)
+            elif op == '$':
+                ok = actual.endswith(value)
+            else:
+                ok = actual == value
+            if not ok:
+                return False
+        return True
+
+
+class Selector:
+    """由后代组合符连接的简单CSS选择器，直接在 lxml 元素上求值"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.compounds = [_Compound(part) for part in text.split()]
+        self.subject = self.compounds[-1]
+
+    def match(self, el, skip_ancestor=None) -> bool:
+        """判断元素是否匹配
+
+        skip_ancestor(el) 返回 True 的祖先元素视为不存在，
+        用于模拟内容清理时被去掉的标签。
+        """
+        if not self.subject.match(el):
+            return False
+        index = len(self.compounds) - 2
+        ancestor = el.getparent()
+        while index >= 0 and ancestor is not None:
+            if not (skip_ancestor and skip_ancestor(ancestor)) and self.compounds[index].match(ancestor):
+                index -= 1
+            ancestor = ancestor.getparent()
+        return index < 0
+
+
+def _escape_text(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def _quote_attr(value: str) -> str:
+    value = _escape_text(value)
+    if '"' in value:
+        if "'" in value:
+            return '"' + value.replace('"', '&quot;') + '"'
+        return "'" + value + "'"
+    return '"' + value + '"'
+
+
+class ArticleExtraction:
+    """一次提取的结果
+
+    title、date、image_url 在遍历时已经确定；content 和 brief 在第一次
+    访问时才从同一棵树生成，调用方可以先检查日期等字段再决定是否清理正文。
+    """
+
+    def __init__(self, title: Optional[str], date: Optional[str],
+                 content_roots: Iterable, images: List, image_selectors: List[Selector],
+                 on_selected):
+        self.title = title
+        self.date = date
+        self._content_roots = content_roots
+        self._images = images
+        self._image_selectors = image_selectors
+        self._on_selected = on_selected
+        self._content: Optional[Tuple[str, str]] = None
+        self._content_root = None
+        self._image_url = None
+        self._image_resolved = False
+
+    def _build_content(self) -> Tuple[str, str]:
+        for selector, root in self._content_roots:
+            elements = [el for el in root.iterdescendants(*_KEEP_TAGS)]
+            if not elements:
+                continue
+            html_parts = []
+            text_parts = []
+            for el in elements:
+                self._serialize(el, html_parts, text_parts)
+            self._content_root = root
+            self._on_selected('content', selector)
+            return ''.join(html_parts), ''.join(text_parts)
+        return '', ''
+
+    def _serialize(self, el, html_parts: List[str], text_parts: List[str]):
+        """按内容清理后的形式输出元素：只保留 p/img 标签，其余标签只保留文本"""
+        if el.tag == 'img':
+            # 属性按名称排序输出，与 BeautifulSoup 的序列化结果一致
+            html_parts.append(f'<img height="auto" src={_quote_attr(el.get("src", ""))} width="100%"/>')
+            return
+        html_parts.append('<p>')
+        self._serialize_inner(el, html_parts, text_parts)
+        html_parts.append('</p>')
+
+    def _serialize_inner(self, el, html_parts: List[str], text_parts: List[str]):
+        if el.text:
+            html_parts.append(_escape_text(el.text))
+            text_parts.append(el.text)
+        for child in el:
+            if isinstance(child, etree._Comment):
+                html_parts.append(f'<!--{child.text or ""}-->')
+            elif isinstance(child.tag, str):
+                if child.tag in _KEEP_TAGS:
+                    self._serialize(child, html_parts, text_parts)
+                else:
+                    self._serialize_inner(child, html_parts, text_parts)
+            if child.tail:
+                html_parts.append(_escape_text(child.tail))
+                text_parts.append(child.tail)
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = self._build_content()
+        return self._content[0]
+
+    @property
+    def brief(self) -> str:
+        if self._content is None:
+            self._content = self._build_content()
+        return self._content[1][:100] + '...'
+
+    @property
+    def image_url(self) -> Optional[str]:
+        """第一张有效配图的URL；二维码、图标等视为无图"""
+        if self._image_resolved:
+            return self._image_url
+        self._image_resolved = True
+        if self._content is None:
+            self._content = self._build_content()
+        root = self._content_root
+
+        def removed_by_cleaning(el):
+            # 正文清理会去掉内容区域内除 p/img 以外的标签
+            if root is None or el is root or el.tag in _KEEP_TAGS:
+                return False
+            return any(ancestor is root for ancestor in el.iterancestors())
+
+        for selector in self._image_selectors:
+            first_img = next((img for img in self._images if selector.match(img, removed_by_cleaning)), None)
+            if first_img is None:
+                continue
+            self._on_selected('image', selector)
+            src = first_img.get('src', '')
+            if (src and
+                not src.endswith(('.gif', 'icon')) and
+                'doc_qrcode' not in src and
+                'qrcode' not in src):
+                self._image_url = src if src.startswith('http') else 'https:' + src
+            break
+        return self._image_url
+
+
+class ArticleExtractor:
+    """单次解析的文章提取器
+
+    每个页面只用 lxml 解析一次，遍历一次文档树即可对所有字段的选择器求值。
+    对每个模板（按主机区分）记住上次命中的选择器，之后的页面只先尝试该选择器，
+    未命中时再回退到完整的候选列表。
+    """
+
+    def __init__(self, field_selectors: Optional[Dict[str, List[str]]] = None):
+        field_selectors = field_selectors or SINA_FIELD_SELECTORS
+        self.selectors = {field: [Selector(text) for text in texts]
+                          for field, texts in field_selectors.items()}
+        self._preferred: Dict[str, Dict[str, Selector]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse(text: str):
+        try:
+            return lxml_html.document_fromstring(text)
+        except ValueError:
+            # 带编码声明的XML文档不能以 str 形式解析
+            return lxml_html.document_fromstring(text.encode('utf-8'))
+
+    def _remember(self, template: str, field: str, selector: Selector):
+        with self._lock:
+            self._preferred.setdefault(template, {})[field] = selector
+
+    def preferred(self, template: str) -> Dict[str, str]:
+        """返回某模板下各字段当前优先使用的选择器"""
+        with self._lock:
+            return {field: selector.text for field, selector in self._preferred.get(template, {}).items()}
+
+    def _scan(self, tree, active: Dict[str, List[Selector]], collect_images: bool):
+        """遍历一次文档树，记录每个选择器按文档顺序的第一个匹配"""
+        first_match: Dict[Selector, object] = {}
+        pending = [selector for field in ('title', 'date', 'content') for selector in active[field]]
+        images = []
+        for el in tree.iter():
+            tag = el.tag
+            if not isinstance(tag, str):
+                continue
+            if collect_images and tag == 'img':
+                images.append(el)
+            if not pending:
+                if collect_images:
+                    continue
+                break
+            matched = False
+            for selector in pending:
+                if selector.match(el):
+                    first_match[selector] = el
+                    matched = True
+            if matched:
+                pending = [selector for selector in pending if selector not in first_match]
+        return first_match, images
+
+    def extract(self, text: str, template: str = '') -> ArticleExtraction:
+        tree = self.parse(text)
+        with self._lock:
+            preferred = dict(self._preferred.get(template, {}))
+        active = {
+            field: [preferred[field]] if field in preferred else selectors
+            for field, selectors in self.selectors.items()
+        }
+        first_match, images = self._scan(tree, active, collect_images=True)
+
+        # 优先选择器未命中的字段，用完整候选列表再遍历一次
+        missing = [field for field in ('title', 'date', 'content')
+                   if not any(selector in first_match for selector in active[field])]
+        if missing:
+            fallback = {field: (self.selectors[field] if field in missing else []) for field in self.selectors}
+            extra, _ = self._scan(tree, fallback, collect_images=False)
+            first_match.update(extra)
+            for field in missing:
+                active[field] = self.selectors[field]
+
+        def pick(field):
+            for selector in active[field]:
+                el = first_match.get(selector)
+                if el is not None:
+                    self._remember(template, field, selector)
+                    return el.text_content().strip()
+            return None
+
+        content_roots = [(selector, first_match[selector]) for selector in active['content']
+                         if selector in first_match]
+        if 'content' in preferred and preferred['content'] in first_match:
+            # 优先选择器的区域没有正文时，仍按完整候选列表依次尝试（惰性求值）
+            content_roots = chain(content_roots, (
+                (selector, el) for selector, el in self._content_fallback(tree, first_match)
+                if selector is not preferred['content']
+            ))
+        image_selectors = active['image']
+        if 'image' in preferred:
+            image_selectors = image_selectors + [s for s in self.selectors['image'] if s is not preferred['image']]
+
+        return ArticleExtraction(
+            title=pick('title'),
+            date=pick('date'),
+            content_roots=content_roots,
+            images=images,
+            image_selectors=image_selectors,
+            on_selected=lambda field, selector: self._remember(template, field, selector),
+        )
+
+    def _content_fallback(self, tree, first_match):
+        """按需为其余正文选择器求值（仅在优先选择器区域为空时才会用到）"""
+        for selector in self.selectors['content']:
+            if selector in first_match:
+                yield selector, first_match[selector]
+                continue
+            el = next((el for el in tree.iter() if isinstance(el.tag, str) and selector.match(el)), None)
+            if el is not None:
+                yield selector, el
@@ -0,0 +1,118 @@
+"""正文存储基准：对比正文内嵌在日志中与正文单独压缩保存两种存储方式
+
+用法:
+    python benchmarks/content_store_bench.py [--days 30] [--articles 200] [--compression zlib]
+
+文章正文由 benchmarks/fixtures/sina 中文章页的句子随机组合而成。
+输出两种方式的磁盘占用、只读元数据（标题、日期、URL）的扫描耗时、完整读取耗时，
+以及按 _id 随机读取单篇正文的耗时。
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content_store import ContentStore  # noqa: E402
+from storage import NewsStore  # noqa: E402
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'sina'
+
+
+def load_sentences():
+    sentences = set()
+    for path in FIXTURES.glob('article_*.shtml'):
+        text = path.read_text(encoding='utf-8')
+        for paragraph in re.findall(r'<p[^>]*>(.*?)</p>', text, re.S):
+            plain = re.sub(r'<[^>]+>|\s', '', paragraph)
+            sentences.update(part for part in re.split(r'[，。]', plain) if part)
+    return sorted(sentences)
+
+
+def make_article(rng: random.Random, sentences, date: str, index: int):
+    paragraphs = []
+    for i in range(rng.randint(8, 30)):
+        if i % 5 == 3:
+            paragraphs.append(f'<p><img height="auto" src="https://n.sinaimg.cn/{rng.getrandbits(32):x}.jpg" width="100%"/></p>')
+        text = '，'.join(rng.choice(sentences) for _ in range(rng.randint(3, 8)))
+        paragraphs.append(f'<p cms-style="font-L">　　{text}。</p>')
+    url = f'https://finance.sina.com.cn/tech/{date}/doc-{index:08d}.shtml'
+    return {
+        '_id': hashlib.md5(url.encode()).hexdigest(),
+        'title': rng.choice(sentences),
+        'brief': '，'.join(rng.choice(sentences) for _ in range(3)),
+        'createTime': f'{date} 10:{index % 60:02d}',
+        'url': url,
+        'imageUrl': '',
+        'isRecommend': False,
+        'hasImage': True,
+        'content': ''.join(paragraphs),
+    }
+
+
+def dir_size(path: str, pattern: str = '*') -> int:
+    return sum(file.stat().st_size for file in Path(path).rglob(pattern) if file.is_file())
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inline vs separate compressed content storage benchmark')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--articles', type=int, default=200, help='Articles per day')
+    parser.add_argument('--compression', default='zlib', choices=['zlib', 'zstd', 'none'])
+    parser.add_argument('--lookups', type=int, default=2000, help='Random content reads by _id')
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    sentences = load_sentences()
+    dates = [f'2024-{10 + day // 28:02d}-{day % 28 + 1:02d}' for day in range(args.days)]
+    archive = {date: [make_article(rng, sentences, date, i) for i in range(args.articles)] for date in dates}
+    ids = [news['_id'] for news_list in archive.values() for news in news_list]
+    total = len(ids)
+
+    workdir = tempfile.mkdtemp(prefix='content_store_bench_')
+    try:
+        results = {}
+        for label, separate in (('inline', False), ('separate', True)):
+            store_dir = os.path.join(workdir, label)
+            store = NewsStore(store_dir, os.path.join(workdir, 'json'), separate_content=separate)
+            if separate:
+                store.content.close()
+                store.content = ContentStore(os.path.join(store_dir, 'content'), args.compression)
+            write_s, _ = timed(lambda: [store.append(archive[date], date) for date in dates])
+            # 新建实例，避免读取时使用写入时的内存状态
+            store = NewsStore(store_dir, os.path.join(workdir, 'json'), separate_content=separate)
+            meta_s, _ = timed(lambda: [(news['title'], news['url']) for date in dates
+                                       for news in store.load(date, lazy=True)])
+            full_s, _ = timed(lambda: [len(news['content']) for date in dates for news in store.load(date)])
+            results[label] = (dir_size(store_dir), dir_size(store_dir, 'sina_*.jsonl'), write_s, meta_s, full_s)
+            if separate:
+                sample = [rng.choice(ids) for _ in range(args.lookups)]
+                lookup_s, _ = timed(lambda: [store.content_of(news_id) for news_id in sample])
+
+        print(f"归档: {args.days} 天, {total} 篇文章, 正文压缩: {args.compression}")
+        print(f"{'':>10} {'磁盘(MB)':>10} {'日志(MB)':>10} {'写入(s)':>9} {'元数据扫描(s)':>14} {'完整读取(s)':>12}")
+        for label, (size, log_size, write_s, meta_s, full_s) in results.items():
+            print(f"{label:>10} {size / 1e6:10.1f} {log_size / 1e6:10.2f} {write_s:9.2f} {meta_s:14.3f} {full_s:12.2f}")
+        inline, separate = results['inline'], results['separate']
+        print(f"磁盘占用减少 {inline[0] / separate[0]:.1f} 倍, 元数据扫描读取的字节减少 {inline[1] / separate[1]:.1f} 倍, "
+              f"扫描耗时减少 {inline[3] / separate[3]:.1f} 倍")
+        print(f"按 _id 读取正文: {lookup_s / args.lookups * 1e6:.0f} 微秒/篇")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
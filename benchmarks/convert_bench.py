@@ -0,0 +1,142 @@
+"""2cloud.py 转换吞吐基准：在生成的多日期归档上对比原有的字符串切分实现与流式转换
+
+用法:
+    python benchmarks/convert_bench.py [--days 30] [--articles 200] [--workers 4]
+
+输出各实现的耗时、文章/秒、MB/秒，以及第二次运行（输入未变化）时的增量跳过耗时。
+原有实现按 '},' 切分，正文中含有该字符序列的文章会被切坏，基准会统计各实现输出中无法解析的对象数。
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+converter = importlib.import_module('2cloud')  # noqa: E402
+
+CJK = [chr(code) for code in range(0x4E00, 0x4E00 + 2000)]
+
+
+def make_article(rng: random.Random, date: str, index: int):
+    def words(n):
+        return ''.join(rng.choice(CJK) for _ in range(n))
+
+    paragraphs = []
+    for i in range(rng.randint(8, 30)):
+        if i % 5 == 3:
+            paragraphs.append(f'<img height="auto" src="https://n.sinaimg.cn/{rng.getrandbits(32):x}.jpg" width="100%"/>')
+        text = words(rng.randint(60, 200))
+        if rng.random() < 0.05:
+            text += ' var cfg = {"a": {"b": 1}}, x = 2; '  # 正文中偶尔出现 '},'
+        paragraphs.append(f'<p>{text}</p>')
+    url = f'https://finance.sina.com.cn/tech/{date}/doc-{index:08d}.shtml'
+    return {
+        'url': url,
+        'title': words(20),
+        'date': date,
+        'content': ''.join(paragraphs),
+        'brief': words(100) + '...',
+        'hasImage': True,
+        'isRecommend': False,
+    }
+
+
+def make_archive(input_dir: str, days: int, articles: int, rng: random.Random) -> int:
+    os.makedirs(input_dir, exist_ok=True)
+    for day in range(days):
+        date = f'2024-{10 + day // 28:02d}-{day % 28 + 1:02d}'
+        news = [make_article(rng, date, i) for i in range(articles)]
+        with open(os.path.join(input_dir, f'sina_{date}.json'), 'w', encoding='utf-8') as f:
+            json.dump(news, f, ensure_ascii=False, indent=2)
+    return sum(os.path.getsize(os.path.join(input_dir, name)) for name in os.listdir(input_dir))
+
+
+def legacy_process_json_file(input_file, encode_dir):
+    """原有的 process_json_file：整文件读入后按 '},' 切分，返回切出的无法解析的对象数"""
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = f.read()
+    data = data.strip()[1:-1]
+    objects = data.split('},')
+    processed_objects = [obj.strip() + '}' for obj in objects[:-1]]
+    processed_objects.append(objects[-1].strip())
+    with open(os.path.join(encode_dir, f"{base_name}_encod.json"), 'w', encoding='utf-8') as f:
+        for obj in processed_objects:
+            f.write(obj + '\n')
+    bad = 0
+    for obj in processed_objects:
+        try:
+            json.loads(obj)
+        except ValueError:
+            bad += 1
+    return bad
+
+
+def count_bad_lines(encode_dir: str) -> int:
+    """按每行一个JSON对象检查输出，返回无法解析的行数"""
+    bad = 0
+    for name in os.listdir(encode_dir):
+        if not name.endswith('_encod.json'):
+            continue
+        with open(os.path.join(encode_dir, name), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    json.loads(line)
+                except ValueError:
+                    bad += 1
+    return bad
+
+
+def main():
+    parser = argparse.ArgumentParser(description='2cloud.py converter throughput benchmark')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--articles', type=int, default=200, help='Articles per day')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='convert_bench_')
+    try:
+        input_dir = os.path.join(workdir, 'res')
+        total_bytes = make_archive(input_dir, args.days, args.articles, random.Random(3))
+        total_articles = args.days * args.articles
+        print(f"归档: {args.days} 个文件, {total_articles} 篇文章, {total_bytes / 1e6:.1f} MB")
+
+        def report(label, elapsed, bad_objects):
+            bad = f", 无法解析的对象: {bad_objects}"
+            print(f"{label:>22}: {elapsed:7.2f}s  {total_articles / elapsed:8.0f} 篇/秒  "
+                  f"{total_bytes / 1e6 / elapsed:6.1f} MB/秒{bad}")
+
+        legacy_dir = os.path.join(workdir, 'legacy')
+        os.makedirs(legacy_dir)
+        start = time.perf_counter()
+        bad_objects = sum(legacy_process_json_file(os.path.join(input_dir, name), legacy_dir)
+                          for name in sorted(os.listdir(input_dir)))
+        report('legacy split', time.perf_counter() - start, bad_objects)
+
+        serial_dir = os.path.join(workdir, 'serial')
+        os.makedirs(serial_dir)
+        start = time.perf_counter()
+        for name in sorted(os.listdir(input_dir)):
+            converter.process_json_file(os.path.join(input_dir, name), serial_dir)
+        report('streaming, 1 process', time.perf_counter() - start, count_bad_lines(serial_dir))
+
+        parallel_dir = os.path.join(workdir, 'parallel')
+        start = time.perf_counter()
+        converter.convert_all(input_dir, parallel_dir, workers=args.workers)
+        report(f'streaming, {args.workers} procs', time.perf_counter() - start, count_bad_lines(parallel_dir))
+
+        start = time.perf_counter()
+        converted, skipped = converter.convert_all(input_dir, parallel_dir, workers=args.workers)
+        print(f"{'incremental rerun':>22}: {time.perf_counter() - start:7.3f}s  转换 {converted}, 跳过 {skipped}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+"""端到端离线爬取基准
+
+在子进程中启动本地替身服务器（benchmarks/standin_server.py），把爬虫对
+新浪主机的请求改写到替身服务器，然后在临时目录中完整运行一次 AiNewsCrawler.run()。
+
+输出指标:
+    articles_per_s         端到端每秒保存的文章数
+    detail_fetch_p99_s     文章详情页请求耗时的p99（按直方图桶上界估算）
+    rate_limits            各主机最终的请求速率、峰值速率和被限流次数
+    parse_cpu_ms           单篇文章页解析+清理+校验的CPU时间（基于录制的文章页）
+    peak_rss_mb            进程峰值常驻内存
+    storage_write_s        save_to_json 的总耗时
+
+--queue-workers N 时通过 SQLite 工作队列由 N 个 worker 进程分担抓取（共享每个主机的速率），
+requests 为协调进程和全部 worker 的请求数之和。
+
+结果写入 JSON 文件（默认 benchmarks/results/crawl-<提交>-<时间>.json），
+其中包含当前提交和全部参数，便于在不同提交之间对比。
+
+用法:
+    python benchmarks/crawl_bench.py [--pages 5] [--articles 40] [--latency-ms 20] [--error-rate 0.01]
+                                     [--fetch-mode thread --workers 8 --per-host 4] [--output result.json]
+                                     [--server-max-rps 8] [--fixed-rps 1]
+                                     [--slow-rate 0.05 --slow-ms 2000] [--no-hedge]
+                                     [--queue-workers 4]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlsplit
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import ai_news_crawler  # noqa: E402
+import http_client  # noqa: E402
+from rate_limiter import AdaptiveRateLimiter  # noqa: E402
+from storage import NewsStore  # noqa: E402
+from work_queue import open_queue, queue_name  # noqa: E402
+from config import METRICS_REPORT_DIR  # noqa: E402
+from standin_server import StandinConfig, Fixtures, serve  # noqa: E402
+
+RESULTS_DIR = REPO_DIR / 'benchmarks' / 'results'
+
+
+def start_standin(config: StandinConfig):
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(config, 0, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=10)
+
+
+def route_to_standin(port: int):
+    """把所有请求改写为 http://127.0.0.1:<port>/<原主机>/<原路径>"""
+    original_get = http_client.HttpClient.get
+
+    def get(self, url, use_cache=False, **kwargs):
+        parts = urlsplit(url)
+        local = f'http://127.0.0.1:{port}/{parts.netloc}{parts.path}'
+        if parts.query:
+            local += '?' + parts.query
+        acquire = kwargs.get('acquire')
+        if acquire:
+            # 并发槽位和限速仍按原主机计算
+            kwargs['acquire'] = lambda _, **options: acquire(url, **options)
+        return original_get(self, local, use_cache=use_cache, **kwargs)
+
+    http_client.HttpClient.get = get
+
+
+def time_storage():
+    """统计 save_to_json 的调用耗时"""
+    timings = []
+    original = ai_news_crawler.save_to_json
+
+    def save_to_json(news_list, date):
+        start = time.perf_counter()
+        try:
+            return original(news_list, date)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    ai_news_crawler.save_to_json = save_to_json
+    return timings
+
+
+def make_crawler(args, from_date):
+    crawler = ai_news_crawler.AiNewsCrawler(args.date, fetch_mode=args.fetch_mode,
+                                            max_workers=args.workers,
+                                            max_requests_per_host=args.per_host, use_cache=False,
+                                            from_date=from_date)
+    # 替身服务器的文章正文只有几篇录制页面，近似重复检查会把它们当作重复丢弃
+    crawler.near_dup = None
+    if args.fixed_rps == 0:
+        crawler.rate_limiter = None
+    elif args.fixed_rps:
+        crawler.rate_limiter = AdaptiveRateLimiter(args.fixed_rps, min_rate=args.fixed_rps,
+                                                   max_rate=args.fixed_rps)
+    return crawler
+
+
+def queue_worker(args, from_date, port):
+    """工作队列 worker 进程：与协调进程使用相同的替身服务器和参数"""
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    route_to_standin(port)
+    http_client.get_client().hedge = not args.no_hedge
+    crawler = make_crawler(args, from_date)
+    queue = open_queue(queue_name(from_date, args.date))
+    try:
+        crawler.work(queue)
+    finally:
+        queue.close()
+
+
+def queue_requests() -> float:
+    """各 worker 运行报告中的请求数之和"""
+    return sum(json.loads(path.read_text(encoding='utf-8'))['counters'].get('requests', 0)
+               for path in Path(METRICS_REPORT_DIR).glob('run_*_*.json'))
+
+
+def parse_cpu_ms(crawler, repeat: int) -> float:
+    """对录制的文章页测量单篇解析、正文清理和关键词校验的CPU时间"""
+    pages = Fixtures().articles
+    start = time.process_time()
+    for _ in range(repeat):
+        for page in pages:
+            article = crawler.extractor.extract(page, 'tech.sina.com.cn')
+            news = {'title': article.title, 'content': article.content, 'createTime': article.date,
+                    'url': 'https://tech.sina.com.cn/bench.shtml', 'brief': article.brief,
+                    'imageUrl': article.image_url}
+            crawler._is_valid_news(news)
+    return (time.process_time() - start) / (repeat * len(pages)) * 1000
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end crawl benchmark')
+    parser.add_argument('--date', default='2024-11-14')
+    parser.add_argument('--pages', type=int, default=5, help='Roll pages per day')
+    parser.add_argument('--days', type=int, default=1, help='Crawl a date range of this many days ending at --date')
+    parser.add_argument('--articles', type=int, default=40, help='Articles per roll page')
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=5.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--fetch-mode', choices=ai_news_crawler.AiNewsCrawler.FETCH_MODES, default='thread')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--per-host', type=int, default=4)
+    parser.add_argument('--server-max-rps', type=float, default=0.0,
+                        help='Stand-in answers 429 above this request rate (0 = unlimited)')
+    parser.add_argument('--fixed-rps', type=float,
+                        help='Use a fixed per-host rate instead of the adaptive limiter (0 = unlimited)')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Fraction of slow stand-in responses')
+    parser.add_argument('--slow-ms', type=float, default=2000.0, help='Extra latency of slow responses')
+    parser.add_argument('--no-hedge', action='store_true', help='Disable hedged requests')
+    parser.add_argument('--queue-workers', type=int, default=0,
+                        help='Crawl through the SQLite work queue with this many worker processes')
+    parser.add_argument('--parse-repeat', type=int, default=20)
+    parser.add_argument('--output', help='Result JSON path')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    config = StandinConfig(args.date, args.pages, args.articles, args.latency_ms,
+                           args.jitter_ms, args.error_rate, days=args.days, max_rps=args.server_max_rps,
+                           slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+    from_date = (datetime.strptime(args.date, '%Y-%m-%d') - timedelta(days=args.days - 1)).strftime('%Y-%m-%d')
+    server, port = start_standin(config)
+    commit = git_commit()
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"crawl-{(commit or 'unknown')[:7]}-{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    output = output.resolve()
+
+    workdir = tempfile.mkdtemp(prefix='crawl_bench_')
+    os.chdir(workdir)
+    try:
+        route_to_standin(port)
+        http_client.get_client().hedge = not args.no_hedge
+        storage_timings = time_storage()
+        crawler = make_crawler(args, from_date)
+
+        start = time.perf_counter()
+        if args.queue_workers:
+            context = multiprocessing.get_context('spawn')
+
+            def start_workers():
+                processes = [context.Process(target=queue_worker, args=(args, from_date, port))
+                             for _ in range(args.queue_workers)]
+                for process in processes:
+                    process.start()
+                return processes
+
+            queue = open_queue(queue_name(from_date, args.date))
+            crawler.run_queue(queue, start_workers)
+        else:
+            crawler.run()
+        wall = time.perf_counter() - start
+        store = NewsStore()
+        saved = sum(len(store.urls(date)) for date in store.dates())
+        detail = crawler.metrics.histograms.get('detail_fetch')
+        detail_p99 = detail.quantile(0.99) if detail else None
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        parse_ms = parse_cpu_ms(crawler, args.parse_repeat)
+    finally:
+        server.terminate()
+
+    result = {
+        'benchmark': 'crawl',
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'params': vars(args),
+        'metrics': {
+            'articles': saved,
+            'requests': crawler.metrics.counters.get('requests', 0) + (queue_requests() if args.queue_workers else 0),
+            'wall_s': round(wall, 3),
+            'articles_per_s': round(saved / wall, 2) if wall else None,
+            'detail_fetch_p99_s': detail_p99,
+            'parse_cpu_ms': round(parse_ms, 3),
+            'peak_rss_mb': round(peak_rss_mb, 1),
+            'storage_write_s': round(sum(storage_timings), 4),
+            'connections': crawler.http.connection_stats(),
+            'hedging': dict(crawler.http.hedge_stats),
+            'rate_limits': crawler.rate_limiter.stats() if crawler.rate_limiter else {},
+        },
+    }
+    if args.queue_workers:
+        # 共享限速器的状态保存在队列中，读取统计后再关闭
+        queue.close()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(json.dumps(result['metrics'], ensure_ascii=False, indent=2))
+    print(f"结果已写入 {output}")
+
+
+if __name__ == '__main__':
+    main()
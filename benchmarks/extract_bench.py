@@ -0,0 +1,143 @@
+"""文章提取基准：对比原有的 BeautifulSoup 多次解析实现与 ArticleExtractor
+
+用法:
+    python benchmarks/extract_bench.py [保存的HTML文件或目录 ...] [--repeat 20]
+
+不指定页面时使用生成的新浪文章模板页面。两种实现的输出会逐字段比较。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from article_extractor import ArticleExtractor, SINA_FIELD_SELECTORS  # noqa: E402
+
+CJK = [chr(code) for code in range(0x4E00, 0x4E00 + 2000)]
+
+
+def legacy_extract(text: str):
+    """_parse_sina_news 原有的提取逻辑（两次 BeautifulSoup 解析、逐个选择器查找）"""
+    soup = BeautifulSoup(text, 'lxml')
+    title = None
+    for selector in SINA_FIELD_SELECTORS['title']:
+        elem = soup.select_one(selector)
+        if elem:
+            title = elem.text.strip()
+            break
+    content = ''
+    for selector in SINA_FIELD_SELECTORS['content']:
+        article_div = soup.select_one(selector)
+        if article_div:
+            for tag in article_div.find_all(True):
+                if tag.name not in ['p', 'img']:
+                    tag.unwrap()
+            content_elements = article_div.find_all(['p', 'img'])
+            if content_elements:
+                for elem in content_elements:
+                    if elem.name == 'img':
+                        elem.attrs = {'src': elem.get('src', ''), 'width': '100%', 'height': 'auto'}
+                    else:
+                        elem.attrs = {}
+                content = ''.join([str(elem) for elem in content_elements])
+                break
+    date = None
+    for selector in SINA_FIELD_SELECTORS['date']:
+        elem = soup.select_one(selector)
+        if elem:
+            date = elem.text.strip()
+            break
+    image_url = None
+    for selector in SINA_FIELD_SELECTORS['image']:
+        images = soup.select(selector)
+        if images:
+            src = images[0].get('src', '')
+            if src and not src.endswith(('.gif', 'icon')) and 'doc_qrcode' not in src and 'qrcode' not in src:
+                image_url = src if src.startswith('http') else 'https:' + src
+            break
+    brief = BeautifulSoup(content, 'lxml').get_text()[:100] + '...'
+    return {'title': title, 'content': content, 'date': date, 'image_url': image_url, 'brief': brief}
+
+
+def new_extract(extractor: ArticleExtractor, text: str):
+    article = extractor.extract(text, 'finance.sina.com.cn')
+    return {'title': article.title, 'content': article.content, 'date': article.date,
+            'image_url': article.image_url, 'brief': article.brief}
+
+
+def make_page(rng: random.Random, paragraphs: int = 25) -> str:
+    """生成结构接近新浪财经/科技文章页的HTML"""
+    def words(n):
+        return ''.join(rng.choice(CJK) for _ in range(n))
+
+    nav = ''.join(f'<li><a href="https://finance.sina.com.cn/{i}.shtml">{words(4)}</a></li>' for i in range(60))
+    body = []
+    for i in range(paragraphs):
+        if i % 6 == 2:
+            body.append(f'<div class="img_wrapper"><img src="//n.sinaimg.cn/finance/{rng.getrandbits(32):x}.jpg" '
+                        f'alt="{words(3)}" style="width:600px"><span class="img_descr">{words(10)}</span></div>')
+        body.append(f'<p cms-style="font-L">{words(rng.randint(40, 160))}<span class="x">{words(5)} &amp; AI</span>'
+                    f'<a href="https://k.sina.com.cn/{i}">{words(3)}</a>{words(20)}</p>')
+    body.append('<div class="appendQr_wrap"><img src="//n.sinaimg.cn/doc_qrcode.png"></div>')
+    footer = ''.join(f'<div class="blk"><a href="#">{words(6)}</a><p>{words(30)}</p></div>' for _ in range(40))
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8"><title>t</title>'
+        + ''.join(f'<script>var a{i} = "{words(30)}";</script>' for i in range(10))
+        + f'</head><body><div class="top-nav"><ul>{nav}</ul></div>'
+        f'<div class="main-content"><h1 class="main-title">{words(18)} ChatGPT</h1>'
+        f'<div class="top-bar-wrap"><div class="date-source"><span class="date">2024年11月14日 10:{rng.randint(10, 59)}</span>'
+        f'<a class="source">{words(4)}</a></div></div>'
+        f'<div class="article" id="artibody">{"".join(body)}</div></div>'
+        f'<div class="footer">{footer}</div></body></html>'
+    )
+
+
+def load_pages(paths):
+    pages = []
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob('*.*html')) if path.is_dir() else [path]
+        for file in files:
+            pages.append(file.read_text(encoding='utf-8', errors='replace'))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Article extraction benchmark')
+    parser.add_argument('pages', nargs='*', help='Saved article HTML files or directories')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    pages = load_pages(args.pages) if args.pages else [make_page(rng) for _ in range(20)]
+    extractor = ArticleExtractor()
+
+    mismatches = 0
+    for page in pages:
+        old, new = legacy_extract(page), new_extract(extractor, page)
+        for field in old:
+            if old[field] != new[field]:
+                mismatches += 1
+                print(f"字段不一致: {field}\n  旧: {str(old[field])[:200]}\n  新: {str(new[field])[:200]}")
+
+    results = {}
+    for label, fn in (('legacy', legacy_extract), ('extractor', lambda page: new_extract(extractor, page))):
+        start = time.process_time()
+        for _ in range(args.repeat):
+            for page in pages:
+                fn(page)
+        results[label] = (time.process_time() - start) / (args.repeat * len(pages)) * 1000
+
+    print(f"页面数: {len(pages)}, 字段不一致: {mismatches}")
+    for label, value in results.items():
+        print(f"{label:>10}: {value:.2f} ms CPU/篇")
+    print(f"{'speedup':>10}: {results['legacy'] / results['extractor']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
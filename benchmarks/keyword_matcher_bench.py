@@ -0,0 +1,86 @@
+"""关键词匹配微基准：对比逐个关键词 `in` 检查与 KeywordMatcher
+
+用法:
+    python benchmarks/keyword_matcher_bench.py [--keywords 300] [--text-chars 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import KEYWORDS, FILTER_KEYWORDS  # noqa: E402
+from keyword_matcher import KeywordMatcher  # noqa: E402
+
+CJK = [chr(code) for code in range(0x4E00, 0x4E00 + 2000)]
+ASCII = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def make_keywords(count: int, rng: random.Random):
+    keywords = list(KEYWORDS) + list(FILTER_KEYWORDS)
+    while len(keywords) < count:
+        if rng.random() < 0.5:
+            keywords.append(''.join(rng.choice(CJK) for _ in range(rng.randint(2, 5))))
+        else:
+            keywords.append(''.join(rng.choice(ASCII) for _ in range(rng.randint(3, 8))))
+    return keywords
+
+
+def make_text(chars: int, rng: random.Random, hit: str = None):
+    """生成与正文类似的HTML：以中文为主，夹杂少量英文单词、数字和段落标签"""
+    words = ['Apple', 'iPhone', 'Google', 'Tesla', '2024', '5G', 'chip', 'CEO']
+    parts = []
+    length = 0
+    while length < chars:
+        paragraph = ''.join(rng.choice(CJK) if rng.random() < 0.97 else ' ' + rng.choice(words) + ' '
+                            for _ in range(rng.randint(80, 300)))
+        parts.append(f'<p>{paragraph}</p>')
+        length += len(paragraph)
+    body = ''.join(parts)
+    if hit:
+        pos = rng.randint(0, len(body))
+        body = body[:pos] + hit + body[pos:]
+    return body
+
+
+def loop_any(keywords, text):
+    """crawler 原有实现"""
+    text = text.lower()
+    return any(keyword.lower() in text for keyword in keywords)
+
+
+def loop_all(keywords, text):
+    text = text.lower()
+    return {keyword for keyword in keywords if keyword.lower() in text}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keyword matcher micro-benchmark')
+    parser.add_argument('--keywords', type=int, nargs='+', default=[12, 100, 300, 1000])
+    parser.add_argument('--text-chars', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    texts = [make_text(args.text_chars, rng), make_text(args.text_chars, rng, hit='ChatGPT')]
+    assert not KeywordMatcher(KEYWORDS + FILTER_KEYWORDS).search(texts[0])
+
+    print(f"{'keywords':>8} {'case':>6} {'loop any':>12} {'matcher':>12} {'loop all':>12} {'find_all':>12}")
+    for count in args.keywords:
+        keywords = make_keywords(count, rng)
+        matcher = KeywordMatcher(keywords)
+        for label, text in zip(('miss', 'hit'), texts):
+            assert loop_any(keywords, text) == matcher.search(text)
+            assert loop_all(keywords, text) == matcher.find_all(text)
+            results = [
+                timeit.timeit(lambda: fn(text), number=args.repeat) / args.repeat * 1e6
+                for fn in (lambda t: loop_any(keywords, t), matcher.search,
+                           lambda t: loop_all(keywords, t), matcher.find_all)
+            ]
+            print(f"{count:>8} {label:>6} " + ' '.join(f'{value:>10.1f}us' for value in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""下游文档库的本地替身，用于离线测试和基准测试 cloud_upload.py 的HTTP后端
+
+接口:
+    POST /<任意路径>   请求体为 {"documents": [...]}（可带 Content-Encoding: gzip），
+                       按 _id（没有时按 url）覆盖写入内存，返回 {"upserted": N}
+    GET  /_stats       返回请求数、收到的字节数（压缩后）、写入次数和文档数
+    DELETE /_stats     清空文档和统计
+
+可配置每个请求的延迟，以及按比例注入的 500/429 错误（整批不写入）。
+
+单独运行:
+    python benchmarks/mock_doc_store.py --port 8766 --latency-ms 20 --error-rate 0.05
+    python cloud_upload.py upload --url http://127.0.0.1:8766/news/_bulk
+"""
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockDocStoreHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency_ms = 0.0
+    error_rate = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/_stats':
+            self._send(404, {'error': 'not found'})
+            return
+        with self.lock:
+            self._send(200, dict(self.stats, documents=len(self.documents)))
+
+    def do_DELETE(self):
+        with self.lock:
+            self.documents.clear()
+            self.stats.update(requests=0, bytes=0, upserts=0, errors=0)
+        self._send(200, {})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytes'] += len(body)
+            fail = self.error_rate and self.rng.random() < self.error_rate
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if fail:
+            with self.lock:
+                self.stats['errors'] += 1
+            if self.rng.random() < 0.5:
+                self._send(429, {'error': 'too many requests'}, {'Retry-After': '0'})
+            else:
+                self._send(500, {'error': 'internal error'})
+            return
+        if self.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        try:
+            documents = json.loads(body)['documents']
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'error': f'bad request: {e}'})
+            return
+        with self.lock:
+            for document in documents:
+                self.documents[document.get('_id') or document['url']] = document
+            self.stats['upserts'] += len(documents)
+        self._send(200, {'upserted': len(documents)})
+
+
+def make_server(host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0,
+                error_rate: float = 0.0, seed: int = 0) -> ThreadingHTTPServer:
+    """创建替身服务器，文档保存在 server.RequestHandlerClass.documents 中"""
+    handler = type('Handler', (MockDocStoreHandler,), {
+        'latency_ms': latency_ms,
+        'error_rate': error_rate,
+        'documents': {},
+        'stats': {'requests': 0, 'bytes': 0, 'upserts': 0, 'errors': 0},
+        'lock': threading.Lock(),
+        'rng': random.Random(seed),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the downstream document store')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of bulk requests that fail')
+    args = parser.parse_args()
+    server = make_server(port=args.port, latency_ms=args.latency_ms, error_rate=args.error_rate)
+    print(f"文档库替身: http://127.0.0.1:{args.port}/news/_bulk")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""从线上新浪科技录制基准用的页面，覆盖 benchmarks/fixtures/sina 下的文件
+
+用法:
+    python benchmarks/record_fixtures.py [--articles 4]
+
+录制首页、滚动新闻第1页，以及滚动新闻中前几篇文章页。替身服务器只依赖
+ul.list_009、h1 标题和 span.date 的结构，录制的页面可以直接替换现有文件。
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from http_client import get_client  # noqa: E402
+
+FIXTURE_DIR = Path(__file__).resolve().parent / 'fixtures' / 'sina'
+
+
+def fetch(url: str) -> str:
+    response = get_client().get(url, timeout=10)
+    response.raise_for_status()
+    response.encoding = 'utf-8'
+    return response.text
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record Sina pages as benchmark fixtures')
+    parser.add_argument('--articles', type=int, default=4)
+    args = parser.parse_args()
+
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    (FIXTURE_DIR / 'home.html').write_text(fetch('https://tech.sina.com.cn/'), encoding='utf-8')
+    roll = fetch('https://tech.sina.com.cn/roll/')
+    (FIXTURE_DIR / 'roll.html').write_text(roll, encoding='utf-8')
+
+    links = [a.get('href', '') for a in BeautifulSoup(roll, 'lxml').select('ul.list_009 li a')]
+    links = [link for link in links if link.endswith('.shtml')][:args.articles]
+    for old in FIXTURE_DIR.glob('article_*'):
+        old.unlink()
+    for i, link in enumerate(links):
+        (FIXTURE_DIR / f'article_{i}.shtml').write_text(fetch(link), encoding='utf-8')
+        print(f"已录制 {link}")
+
+
+if __name__ == '__main__':
+    main()
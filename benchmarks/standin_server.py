@@ -0,0 +1,241 @@
+"""新浪科技的本地替身服务器，用于离线基准测试
+
+用 benchmarks/fixtures/sina 下录制的页面响应请求：
+    /<主机>/                     首页（home.html）
+    /<主机>/roll/                滚动新闻第1页
+    /<主机>/roll/index_0_0_N.shtml  滚动新闻第N页
+    其余 .shtml/.html 路径       文章页
+
+滚动列表页以 roll.html 为模板，替换 ul.list_009 中的列表项：从目标日期起
+往前 days 天，每天 pages 页、每页 articles 条新闻；之后的页为更早的一天，
+使爬虫在该页停止翻页。
+文章页按路径哈希选取一个录制的文章页，并把标题和发布时间改为与列表项一致。
+每页第8、18……条的标题中带有一个更早的日期（“9月10日发布会前瞻”），
+用于检查爬虫不会把标题中的日期当作发布时间而提前停止翻页。
+
+可配置每个请求的延迟（含抖动）、按比例出现的慢响应（长尾延迟）和按比例注入的
+错误（500/429/连接中断）。
+设置 max_rps 后，超过该速率的请求返回 429 和 Retry-After，用于模拟主机限流。
+
+单独运行:
+    python benchmarks/standin_server.py --port 8765 --latency-ms 50 --error-rate 0.02
+"""
+import argparse
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+FIXTURE_DIR = Path(__file__).resolve().parent / 'fixtures' / 'sina'
+
+_LIST_RE = re.compile(r'(<ul class="list_009">).*?(</ul>)', re.S)
+_TITLE_RES = [re.compile(r'(<h1 class="main-title">).*?(</h1>)', re.S),
+              re.compile(r'(<div class="article-header"><h1>).*?(</h1>)', re.S)]
+_DATE_RE = re.compile(r'(<span class="date">).*?(</span>)', re.S)
+_ROLL_PAGE_RE = re.compile(r'/roll/(?:index_0_0_(\d+)\.shtml)?$')
+_DOC_RE = re.compile(r'/bench/(\d{4}-\d{2}-\d{2})/doc-(\d+)-(\d+)\.shtml$')
+
+# 列表标题和文章标题中的关键词，保证会被爬虫选中
+TITLE_KEYWORDS = ['人工智能', 'AI', '大模型', 'ChatGPT', '机器人', '芯片']
+
+
+class StandinConfig:
+    def __init__(self, date: str, pages: int = 5, articles: int = 40,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0, days: int = 1, max_rps: float = 0.0,
+                 slow_rate: float = 0.0, slow_ms: float = 0.0):
+        self.date = date
+        self.days = days
+        self.max_rps = max_rps
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.pages = pages
+        self.articles = articles
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.seed = seed
+
+
+class Fixtures:
+    def __init__(self, fixture_dir: Path = FIXTURE_DIR):
+        self.home = (fixture_dir / 'home.html').read_text(encoding='utf-8')
+        self.roll = (fixture_dir / 'roll.html').read_text(encoding='utf-8')
+        self.articles = [path.read_text(encoding='utf-8') for path in sorted(fixture_dir.glob('article_*.*html'))]
+
+
+def article_title(page: int, index: int) -> str:
+    keyword = TITLE_KEYWORDS[(page * 31 + index) % len(TITLE_KEYWORDS)]
+    if index % 10 == 7:
+        # 标题中带有其他日期，列表项的发布时间只能从时间节点读取
+        return f'{keyword}产业观察：9月10日发布会前瞻（第{page}页第{index}条）'
+    return f'{keyword}产业观察：第{page}页第{index}条'
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    config: StandinConfig = None
+    fixtures: Fixtures = None
+    stats = None
+    _lock = threading.Lock()
+    _rng = None
+    _bucket = None  # 限流令牌桶 [令牌数, 上次更新时间]
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def _roll_date(self, page: int) -> str:
+        days_back = min((page - 1) // self.config.pages, self.config.days)
+        date = datetime.strptime(self.config.date, '%Y-%m-%d') - timedelta(days=days_back)
+        return date.strftime('%Y-%m-%d')
+
+    def _roll_page(self, page: int) -> str:
+        date = self._roll_date(page)
+        month_day = f'{int(date[5:7])}月{int(date[8:10])}日'
+        items = ''.join(
+            f'<li><span class="c_chl">[科技]</span>'
+            f'<a href="https://tech.sina.com.cn/bench/{date}/doc-{page}-{i}.shtml" target="_blank">{article_title(page, i)}</a>'
+            f'<span class="c_time">({month_day} {23 - i % 24:02d}:{i % 60:02d})</span></li>'
+            for i in range(self.config.articles)
+        )
+        return _LIST_RE.sub(lambda m: m.group(1) + items + m.group(2), self.fixtures.roll, count=1)
+
+    def _article(self, path: str) -> str:
+        html = self.fixtures.articles[zlib.crc32(path.encode()) % len(self.fixtures.articles)]
+        match = _DOC_RE.search(path)
+        if match:
+            date, page, index = match.group(1), int(match.group(2)), int(match.group(3))
+            title = article_title(page, index)
+        else:
+            date, title = self.config.date, None
+        if title:
+            for title_re in _TITLE_RES:
+                html = title_re.sub(lambda m: m.group(1) + title + m.group(2), html, count=1)
+        published = f'{date[:4]}年{date[5:7]}月{date[8:10]}日 10:00'
+        return _DATE_RE.sub(lambda m: m.group(1) + published + m.group(2), html, count=1)
+
+    def _inject_error(self) -> bool:
+        with self._lock:
+            roll = self._rng.random()
+            kind = self._rng.random()
+        if roll >= self.config.error_rate:
+            return False
+        self._count('errors')
+        if kind < 0.4:
+            self._send(500, b'Internal Server Error', 'text/plain')
+        elif kind < 0.8:
+            self._send(429, b'Too Many Requests', 'text/plain', {'Retry-After': '1'})
+        else:
+            # 不返回响应直接断开连接
+            self.close_connection = True
+            self.connection.shutdown(2)
+        return True
+
+    def _over_rate(self) -> bool:
+        """超过 max_rps 时返回429（令牌桶容量为1秒的请求数）"""
+        if not self.config.max_rps:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._bucket
+            tokens = min(self.config.max_rps, tokens + (now - updated) * self.config.max_rps)
+            limited = tokens < 1
+            self._bucket[:] = [tokens if limited else tokens - 1, now]
+        if limited:
+            self._count('throttled')
+            self._send(429, b'Too Many Requests', 'text/plain', {'Retry-After': '1'})
+        return limited
+
+    def _send(self, status: int, body: bytes, content_type: str, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._count('requests')
+        delay = self.config.latency_ms
+        with self._lock:
+            if self.config.jitter_ms:
+                delay += self._rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+            slow = self.config.slow_rate and self._rng.random() < self.config.slow_rate
+        if slow:
+            self._count('slow')
+            delay += self.config.slow_ms
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if self._over_rate() or self._inject_error():
+            return
+
+        # 路径的第一段是被替身的主机名
+        path = '/' + urlsplit(self.path).path.lstrip('/').partition('/')[2]
+        roll_match = _ROLL_PAGE_RE.search(path)
+        if path == '/':
+            body = self.fixtures.home
+        elif roll_match:
+            body = self._roll_page(int(roll_match.group(1) or 1))
+        elif path.endswith(('.shtml', '.html')):
+            body = self._article(path)
+        else:
+            self._count('not_found')
+            self._send(404, b'Not Found', 'text/plain')
+            return
+        self._send(200, body.encode('utf-8'), 'text/html; charset=utf-8')
+
+
+def make_server(config: StandinConfig, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    handler = type('Handler', (StandinHandler,), {
+        'config': config,
+        'fixtures': Fixtures(),
+        'stats': {},
+        '_rng': random.Random(config.seed),
+        '_bucket': [config.max_rps, time.monotonic()],
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(config: StandinConfig, port: int, ready=None):
+    """在当前进程中运行替身服务器（可作为子进程入口）"""
+    server = make_server(config, port=port)
+    if ready is not None:
+        ready.put(server.server_port)
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for tech.sina.com.cn')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--pages', type=int, default=5, help='Roll pages per day')
+    parser.add_argument('--days', type=int, default=1, help='Days covered by the roll feed, ending at --date')
+    parser.add_argument('--articles', type=int, default=40, help='Articles per roll page')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail')
+    parser.add_argument('--max-rps', type=float, default=0.0, help='Answer 429 above this request rate (0 = unlimited)')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Fraction of requests delayed by --slow-ms')
+    parser.add_argument('--slow-ms', type=float, default=0.0)
+    args = parser.parse_args()
+    config = StandinConfig(args.date, args.pages, args.articles, args.latency_ms, args.jitter_ms,
+                           args.error_rate, days=args.days, max_rps=args.max_rps,
+                           slow_rate=args.slow_rate, slow_ms=args.slow_ms)
+    print(f"替身服务器: http://127.0.0.1:{args.port}/tech.sina.com.cn/")
+    serve(config, args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""启动耗时基准：按 python -X importtime 统计各入口模块的导入耗时，超出预算时失败
+
+用法:
+    python benchmarks/startup_bench.py [--runs 5] [--budget-scale 1.0] [--top 8] [--output result.json]
+
+每个入口模块在新的解释器中导入 --runs 次，取累计导入耗时（不含解释器自身的
+site 初始化）的中位数，与 BUDGETS 中的预算比较；同时检查导入后是否加载了该入口
+不应加载的重型依赖（例如 main 不应在解析命令行参数前加载 requests、bs4）。
+另外测量 `python main.py --help` 的进程总耗时。
+
+任一入口超出预算（预算乘以 --budget-scale，较慢的机器上可以调大）或加载了
+不应加载的模块时，退出码为1，可用于CI检查启动耗时回归。
+结果写入 JSON 文件（默认 benchmarks/results/startup-<提交>-<时间>.json）。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from crawl_bench import REPO_DIR, RESULTS_DIR, git_commit  # noqa: E402
+
+# 只在具体功能中使用的重型依赖
+HEAVY = {'requests', 'bs4', 'lxml', 'pandas', 'numpy', 'pyarrow', 'schedule', 'zstandard', 'redis', 'jieba'}
+# 抓取本身需要 requests 和 lxml（文章页解析），其余按功能导入
+CRAWL_HEAVY = HEAVY - {'requests', 'lxml'}
+
+# 入口模块: (导入耗时预算(毫秒), 导入后不应加载的模块)
+BUDGETS = {
+    'main': (50, HEAVY | {'multiprocessing'}),
+    'ai_news_crawler': (300, CRAWL_HEAVY),
+    'storage': (80, HEAVY),
+    'content_store': (80, HEAVY),
+    'seen_index': (80, HEAVY),
+    'near_duplicate': (80, HEAVY),
+    'search_index': (80, HEAVY),
+    'columnar_export': (80, HEAVY),
+    'work_queue': (80, HEAVY),
+    'url_canon': (80, HEAVY),
+    'cloud_upload': (100, HEAVY),
+    '2cloud': (100, HEAVY),
+}
+
+
+def import_profile(module: str):
+    """在新的解释器中导入 module，返回 (累计导入耗时(毫秒), {模块: 自身耗时(毫秒)}, 已加载的顶层包)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'__import__({module!r})'],
+                            cwd=REPO_DIR, capture_output=True, text=True, check=True)
+    total = None
+    self_ms = {}
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        self_ms[name] = int(self_us) / 1000
+        loaded.add(name.split('.')[0])
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, self_ms, loaded
+
+
+def wall_ms(args) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=REPO_DIR, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import-time budget check for the entry points')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per entry point')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiply every budget (slow machines)')
+    parser.add_argument('--top', type=int, default=8, help='Slowest imports to list for each failing entry point')
+    parser.add_argument('--module', action='append', help='Only check these entry points')
+    parser.add_argument('--output', help='Result JSON path')
+    args = parser.parse_args()
+
+    results = {}
+    failed = False
+    print(f"{'入口':<18} {'导入(ms)':>9} {'预算(ms)':>9}  结果")
+    for module in args.module or BUDGETS:
+        budget, forbidden = BUDGETS[module]
+        budget *= args.budget_scale
+        profiles = [import_profile(module) for _ in range(args.runs)]
+        total = statistics.median(profile[0] for profile in profiles)
+        self_ms, loaded = profiles[-1][1], profiles[-1][2]
+        unexpected = sorted(loaded & forbidden)
+        ok = total <= budget and not unexpected
+        failed |= not ok
+        status = 'ok' if ok else 'FAIL'
+        if unexpected:
+            status += f"（加载了 {', '.join(unexpected)}）"
+        print(f"{module:<18} {total:9.1f} {budget:9.0f}  {status}")
+        if not ok:
+            for name, ms in sorted(self_ms.items(), key=lambda item: -item[1])[:args.top]:
+                print(f"{'':<20}{ms:8.1f}  {name}")
+        results[module] = {'import_ms': round(total, 3), 'budget_ms': budget, 'unexpected': unexpected, 'ok': ok}
+
+    interpreter = statistics.median(wall_ms(['-c', 'pass']) for _ in range(args.runs))
+    main_help = statistics.median(wall_ms(['main.py', '--help']) for _ in range(args.runs))
+    print(f"python main.py --help: {main_help:.1f} ms（空解释器 {interpreter:.1f} ms）")
+
+    commit = git_commit()
+    output = Path(args.output) if args.output else (
+        RESULTS_DIR / f"startup-{(commit or 'unknown')[:7]}-{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'commit': commit, 'python': sys.version.split()[0], 'runs': args.runs,
+                   'budget_scale': args.budget_scale, 'interpreter_ms': round(interpreter, 3),
+                   'main_help_ms': round(main_help, 3), 'entry_points': results}, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {output}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""增量上传基准：对比每天整体重新上传与只上传新增/变化的新闻
+
+用法:
+    python benchmarks/upload_bench.py [--days 30] [--articles 200] [--changed 0.05]
+                                      [--latency-ms 20] [--error-rate 0.02] [--concurrency 4]
+
+在临时目录中生成多日期的新闻存储（正文与 content_store_bench 相同），启动
+benchmarks/mock_doc_store.py 的文档库替身，依次运行:
+    initial   首次上传全部归档
+    noop      没有任何变化时再次上传
+    delta     新增一天的新闻、并修改最近一天 --changed 比例的新闻后上传
+    full      忽略上传记录重新上传全部归档（相当于原来每天整体重新导入）
+输出每次运行的耗时、请求数、发送字节数（gzip 压缩后）和上传的新闻数，
+并检查增量上传后文档库替身中的文档与存储中的新闻一致。
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cloud_upload import DeltaUploader, HttpUploadBackend, UploadLedger  # noqa: E402
+from content_store_bench import load_sentences, make_article  # noqa: E402
+from mock_doc_store import make_server  # noqa: E402
+from storage import NewsStore  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Delta vs full upload benchmark')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--articles', type=int, default=200, help='Articles per day')
+    parser.add_argument('--changed', type=float, default=0.05, help='Fraction of the latest day edited before delta')
+    parser.add_argument('--latency-ms', type=float, default=20.0, help='Mock server latency per bulk request')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of bulk requests that fail')
+    parser.add_argument('--batch-size', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    sentences = load_sentences()
+    dates = [f'2024-{10 + day // 28:02d}-{day % 28 + 1:02d}' for day in range(args.days + 1)]
+    new_date = dates.pop()
+
+    workdir = tempfile.mkdtemp(prefix='upload_bench_')
+    server = make_server(latency_ms=args.latency_ms, error_rate=args.error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    handler = server.RequestHandlerClass
+    url = f'http://127.0.0.1:{server.server_port}/news/_bulk'
+    try:
+        store = NewsStore(os.path.join(workdir, 'store'), os.path.join(workdir, 'json'))
+        for date in dates:
+            store.append([make_article(rng, sentences, date, i) for i in range(args.articles)], date)
+        ledger = UploadLedger(os.path.join(workdir, 'upload.sqlite'))
+        uploader = DeltaUploader(HttpUploadBackend(url, max_retries=5, pool_size=args.concurrency), store, ledger,
+                                 batch_size=args.batch_size, concurrency=args.concurrency)
+
+        def run(label, force=False):
+            with handler.lock:
+                requests_before, bytes_before = handler.stats['requests'], handler.stats['bytes']
+            start = time.perf_counter()
+            stats = uploader.upload(force=force)
+            elapsed = time.perf_counter() - start
+            with handler.lock:
+                requests = handler.stats['requests'] - requests_before
+                sent = handler.stats['bytes'] - bytes_before
+            results.append((label, elapsed, requests, sent, stats['uploaded'], stats['unchanged'], stats['failed']))
+
+        results = []
+        run('initial')
+        run('noop')
+        store.append([make_article(rng, sentences, new_date, i) for i in range(args.articles)], new_date)
+        edited = store.load(dates[-1])[:int(args.articles * args.changed)]
+        for news in edited:
+            news['title'] += '（更新）'
+        store.append(edited, dates[-1])
+        run('delta')
+        # 增量上传后文档库中的文档应与存储一致
+        expected = {news['_id']: news for date in dates + [new_date] for news in store.load(date)}
+        mismatched = sum(1 for news_id, news in expected.items() if handler.documents.get(news_id) != news)
+        documents = len(handler.documents)
+        run('full', force=True)
+
+        total = (len(dates) + 1) * args.articles
+        print(f"归档: {len(dates)} 天 + 新增1天, 共 {total} 篇文章, 修改 {len(edited)} 篇, "
+              f"批大小 {args.batch_size}, 并发 {args.concurrency}, 替身延迟 {args.latency_ms}ms")
+        print(f"{'':>8} {'耗时(s)':>9} {'请求数':>7} {'发送(MB)':>9} {'上传':>7} {'未变化':>7} {'失败':>5}")
+        for label, elapsed, requests, sent, uploaded, unchanged, failed in results:
+            print(f"{label:>8} {elapsed:9.3f} {requests:7d} {sent / 1e6:9.2f} {uploaded:7d} {unchanged:7d} {failed:5d}")
+        delta, full = results[2], results[3]
+        print(f"增量上传相对整体重新上传: 耗时减少 {full[1] / delta[1]:.1f} 倍, 发送字节减少 {full[3] / delta[3]:.1f} 倍")
+        print(f"增量上传后文档库中 {documents} 篇文档, 与存储不一致 {mismatched} 篇")
+        uploader.close()
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
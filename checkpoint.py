@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from config import CHECKPOINT_DIR, CHECKPOINT_FSYNC
+
+
+class CheckpointState:
+    """从检查点恢复的爬取进度"""
+
+    def __init__(self):
+        self.articles: Dict[str, Dict] = {}   # 已通过校验的新闻，URL -> 新闻数据
+        self.done_urls: Set[str] = set()      # 已抓取过详情页的URL（含未通过校验的）
+        self.listings: Dict[str, List[Dict]] = {}  # 入口URL -> 已处理的列表页记录（按顺序）
+
+    def pending_links(self, base_url: str) -> List[str]:
+        """入口下已记录的列表页中尚未抓取的文章链接"""
+        links = [link for record in self.listings.get(base_url, []) for link in record['links']]
+        return [link for link in dict.fromkeys(links) if link not in self.done_urls]
+
+
+class CrawlCheckpoint:
+    """一次爬取的检查点，追加写的 JSON Lines 日志
+
+    每处理一个列表页记录一行 listing（页上待抓取的链接和下一页页码），
+    每抓取一篇文章记录一行 article（通过校验时带上新闻数据），写入后立即 flush，
+    进程崩溃或被杀时已写入的记录不会丢失；CHECKPOINT_FSYNC 为 True 时每行还会
+    fsync，可以承受断电。整次运行保存完成后删除检查点。
+    """
+
+    def __init__(self, path: Path, fsync: bool = CHECKPOINT_FSYNC):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.fsync = fsync
+        self._file = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_range(cls, from_date: str, date: str, checkpoint_dir: str = CHECKPOINT_DIR) -> 'CrawlCheckpoint':
+        name = f'sina_{date}' if from_date == date else f'sina_{from_date}_{date}'
+        return cls(Path(checkpoint_dir) / f'{name}.jsonl')
+
+    def exists(self) -> bool:
+        return self.path.exists() and self.path.stat().st_size > 0
+
+    def load(self) -> CheckpointState:
+        """读取检查点，截掉崩溃时写了一半的最后一行
+
+        没有换行符的最后一行即使能解析也视为不完整：恢复后追加的记录会接在同一行，
+        下次读取时两条记录都会丢失。
+        """
+        state = CheckpointState()
+        if not self.path.exists():
+            return state
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                good_end += len(line)
+                if record['event'] == 'article':
+                    state.done_urls.add(record['url'])
+                    if record.get('news'):
+                        state.articles[record['url']] = record['news']
+                elif record['event'] == 'listing':
+                    state.listings.setdefault(record['base'], []).append(record)
+        if good_end < self.path.stat().st_size:
+            self.logger.warning(f"检查点末尾有不完整的记录，已截断: {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+        return state
+
+    def open(self, resume: bool = False):
+        """打开检查点准备写入，resume 为 False 时清空旧的记录"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'ab' if resume else 'wb')
+
+    def _write(self, record: Dict):
+        line = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def record_listing(self, base_url: str, url: str, page: int, start_page: int,
+                       links: List[str], next_page: Optional[int]):
+        """列表页已获取，links 为本页待抓取的文章，next_page 为None表示该入口不再翻页"""
+        self._write({'event': 'listing', 'base': base_url, 'url': url, 'page': page,
+                     'start': start_page, 'links': links, 'next': next_page})
+
+    def record_article(self, url: str, news: Optional[Dict]):
+        """文章已抓取，news 为None表示未通过校验"""
+        self._write({'event': 'article', 'url': url, 'news': news})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """运行成功结束后删除检查点"""
+        self.close()
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,318 @@
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import (UPLOAD_URL, UPLOAD_HEADERS, UPLOAD_LEDGER_PATH, UPLOAD_BATCH_SIZE, UPLOAD_MAX_BATCH_BYTES,
+                    UPLOAD_CONCURRENCY, UPLOAD_MAX_RETRIES, UPLOAD_TIMEOUT, UPLOAD_GZIP, STORE_DIR)
+from content_store import LazyNews, content_hash
+from rate_limiter import parse_retry_after
+from storage import NewsStore
+
+
+def document_hash(news: Dict) -> str:
+    """新闻的内容哈希，正文按其内容哈希计入
+
+    延迟加载的记录直接使用正文存储中的哈希，判断新闻是否变化时不必读取正文。
+    """
+    if isinstance(news, LazyNews):
+        digest = news.digest
+    elif isinstance(news.get('content'), str):
+        digest = content_hash(news['content'])
+    else:
+        digest = news.get('contentHash')
+    record = {key: value for key, value in news.items() if key not in ('content', 'contentHash')}
+    record['contentHash'] = digest
+    data = json.dumps(record, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class UploadError(Exception):
+    """批量请求重试后仍然失败"""
+
+
+class UploadLedger:
+    """已上传新闻的记录
+
+    docs 表记录每个 _id 最后一次上传成功时的内容哈希，cursors 表记录每个日期的
+    日志已读到的位置 (inode, 大小)，再次上传时只读取之后追加的记录。
+    """
+
+    def __init__(self, path: str = UPLOAD_LEDGER_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS docs (id TEXT PRIMARY KEY, hash TEXT, date TEXT) WITHOUT ROWID')
+        self._db.execute('CREATE TABLE IF NOT EXISTS cursors (date TEXT PRIMARY KEY, inode INTEGER, size INTEGER)')
+        self._db.commit()
+
+    def pushed_hash(self, news_id: str) -> Optional[str]:
+        row = self._db.execute('SELECT hash FROM docs WHERE id = ?', (news_id,)).fetchone()
+        return row[0] if row else None
+
+    def record(self, rows: Iterable[Tuple[str, str, str]]):
+        """记录上传成功的 (_id, 内容哈希, 日期)"""
+        self._db.executemany('INSERT OR REPLACE INTO docs VALUES (?, ?, ?)', rows)
+        self._db.commit()
+
+    def cursor(self, date: str) -> Optional[Tuple[int, int]]:
+        row = self._db.execute('SELECT inode, size FROM cursors WHERE date = ?', (date,)).fetchone()
+        return tuple(row) if row else None
+
+    def set_cursor(self, date: str, inode: int, size: int):
+        self._db.execute('INSERT OR REPLACE INTO cursors VALUES (?, ?, ?)', (date, inode, size))
+        self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        docs = self._db.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+        dates = self._db.execute('SELECT COUNT(*) FROM cursors').fetchone()[0]
+        return {'docs': docs, 'dates': dates}
+
+    def reset(self):
+        self._db.execute('DELETE FROM docs')
+        self._db.execute('DELETE FROM cursors')
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+class UploadBackend(ABC):
+    """批量写入下游文档库的后端
+
+    send() 接收一批已序列化为JSON的新闻，全部写入成功后返回实际发送的字节数，
+    失败时抛出 UploadError；同一批新闻可能被重复发送，下游需按 _id 覆盖写入。
+    """
+
+    @abstractmethod
+    def send(self, documents: List[bytes]) -> int:
+        """发送一批文档，返回发送的字节数"""
+
+    def close(self):
+        pass
+
+
+class HttpUploadBackend(UploadBackend):
+    """通过HTTP批量接口上传
+
+    每批发送一个 POST 请求，请求体为 {"documents": [...]}（可用gzip压缩），
+    2xx 表示整批写入成功。连接错误、超时、429 和 5xx 按指数退避重试（遵守
+    Retry-After），其余 4xx 不重试。
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = UPLOAD_TIMEOUT,
+                 max_retries: int = UPLOAD_MAX_RETRIES, compress: bool = UPLOAD_GZIP,
+                 pool_size: int = UPLOAD_CONCURRENCY):
+        # requests 只在使用HTTP后端时导入，stats/reset 等子命令不加载
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.logger = logging.getLogger(__name__)
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.compress = compress
+        self.session = requests.Session()
+        self.session.mount(url, HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size)))
+        self.session.headers.update({'Content-Type': 'application/json; charset=utf-8'})
+        self.session.headers.update(headers or {})
+        if compress:
+            self.session.headers['Content-Encoding'] = 'gzip'
+
+    def send(self, documents: List[bytes]) -> int:
+        from requests.exceptions import RequestException
+
+        body = b'{"documents":[' + b','.join(documents) + b']}'
+        if self.compress:
+            body = gzip.compress(body, compresslevel=6)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.session.post(self.url, data=body, timeout=self.timeout)
+            except RequestException as e:
+                error = str(e)
+            else:
+                if 200 <= response.status_code < 300:
+                    return len(body)
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code != 429 and response.status_code < 500:
+                    raise UploadError(error)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if attempt < self.max_retries:
+                delay = retry_after if retry_after is not None else 2 ** attempt
+                self.logger.warning(f"批量上传失败（{error}），{delay:.1f} 秒后第 {attempt + 1} 次重试")
+                time.sleep(delay)
+        raise UploadError(error)
+
+    def close(self):
+        self.session.close()
+
+
+# 上传后端按URL的scheme选择，新的后端在这里登记
+UPLOAD_BACKENDS: Dict[str, Callable[[str], UploadBackend]] = {
+    'http': lambda url: HttpUploadBackend(url, UPLOAD_HEADERS),
+    'https': lambda url: HttpUploadBackend(url, UPLOAD_HEADERS),
+}
+
+
+def open_backend(url: Optional[str] = UPLOAD_URL) -> UploadBackend:
+    if not url:
+        raise ValueError("未配置上传地址，请设置 config.UPLOAD_URL 或使用 --url")
+    scheme = urlparse(url).scheme
+    if scheme not in UPLOAD_BACKENDS:
+        raise ValueError(f"不支持的上传后端: {url}")
+    return UPLOAD_BACKENDS[scheme](url)
+
+
+class DeltaUploader:
+    """把新闻存储增量上传到下游文档库
+
+    每个日期只读取上次上传后追加到日志的记录（日志被压缩时从头读取），再按
+    _id 和内容哈希跳过已上传且未变化的新闻，正文只在需要上传时才读取。变化的
+    新闻按条数和字节数分批，最多 concurrency 个批量请求同时进行；某个日期的
+    所有批次都成功后才推进该日期的读取位置，失败的批次下次运行时重新上传。
+    """
+
+    def __init__(self, backend: UploadBackend, store: Optional[NewsStore] = None,
+                 ledger: Optional[UploadLedger] = None, batch_size: int = UPLOAD_BATCH_SIZE,
+                 max_batch_bytes: int = UPLOAD_MAX_BATCH_BYTES, concurrency: int = UPLOAD_CONCURRENCY):
+        self.logger = logging.getLogger(__name__)
+        self.backend = backend
+        self.store = store or NewsStore()
+        self.ledger = ledger or UploadLedger()
+        self.batch_size = max(1, batch_size)
+        self.max_batch_bytes = max_batch_bytes
+        self.concurrency = max(1, concurrency)
+        self._positions: Dict[str, Tuple[int, int]] = {}
+
+    def _changed(self, date: str, force: bool, stats: Dict) -> Iterable[Tuple[str, str, str, Dict]]:
+        """返回某日期需要上传的 (日期, _id, 内容哈希, 新闻)，并记录读取到的日志位置"""
+        cursor = None if force else self.ledger.cursor(date)
+        records, (inode, size) = self.store.load_since(date, cursor[1] if cursor else 0, lazy=True)
+        if cursor and (inode != cursor[0] or size < cursor[1]):
+            # 日志已被压缩，原来的偏移不再有效，从头读取（已上传的新闻按哈希跳过）
+            records, (inode, size) = self.store.load_since(date, lazy=True)
+        self._positions[date] = (inode, size)
+        for news in records:
+            stats['scanned'] += 1
+            news_id = news.get('_id') or news['url']
+            digest = document_hash(news)
+            if not force and self.ledger.pushed_hash(news_id) == digest:
+                stats['unchanged'] += 1
+                continue
+            yield date, news_id, digest, news
+
+    def _batches(self, items) -> Iterable[List[Tuple[str, str, str, bytes]]]:
+        batch, size = [], 0
+        for date, news_id, digest, news in items:
+            document = news.materialize() if isinstance(news, LazyNews) else news
+            data = json.dumps(document, ensure_ascii=False).encode('utf-8')
+            if batch and (len(batch) >= self.batch_size or size + len(data) > self.max_batch_bytes):
+                yield batch
+                batch, size = [], 0
+            batch.append((date, news_id, digest, data))
+            size += len(data)
+        if batch:
+            yield batch
+
+    def upload(self, dates: Optional[List[str]] = None, force: bool = False) -> Dict[str, int]:
+        """上传指定日期（默认存储中的全部日期）中新增或变化的新闻，返回统计
+
+        force 为 True 时忽略上传记录，重新上传全部新闻。
+        """
+        stats = {'scanned': 0, 'unchanged': 0, 'uploaded': 0, 'failed': 0, 'batches': 0, 'bytes': 0}
+        self._positions = {}
+        failed_dates = set()
+        dates = dates or self.store.dates()
+        items = (item for date in dates for item in self._changed(date, force, stats))
+        batches = self._batches(items)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            running = {}
+            exhausted = False
+            while running or not exhausted:
+                # 最多 concurrency 个批次在途，读取和序列化与上传重叠，内存不随归档大小增长
+                while not exhausted and len(running) < self.concurrency:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    future = executor.submit(self.backend.send, [data for _, _, _, data in batch])
+                    running[future] = batch
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = running.pop(future)
+                    stats['batches'] += 1
+                    try:
+                        stats['bytes'] += future.result()
+                    except UploadError as e:
+                        self.logger.error(f"{len(batch)} 条新闻上传失败: {str(e)}")
+                        stats['failed'] += len(batch)
+                        failed_dates.update(date for date, _, _, _ in batch)
+                        continue
+                    self.ledger.record((news_id, digest, date) for date, news_id, digest, _ in batch)
+                    stats['uploaded'] += len(batch)
+        for date, (inode, size) in self._positions.items():
+            if date not in failed_dates:
+                self.ledger.set_cursor(date, inode, size)
+        stats['seconds'] = round(time.perf_counter() - start, 3)
+        self.logger.info(f"上传 {stats['uploaded']} 条新闻（{stats['batches']} 个批次, {stats['bytes']} 字节），"
+                         f"跳过 {stats['unchanged']} 条未变化的新闻，失败 {stats['failed']} 条")
+        return stats
+
+    def close(self):
+        self.backend.close()
+        self.ledger.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upload new and changed articles to the downstream document store')
+    parser.add_argument('--store', default=STORE_DIR, help='News store directory')
+    parser.add_argument('--ledger', default=UPLOAD_LEDGER_PATH, help='Upload ledger path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    upload_parser = subparsers.add_parser('upload', help='Upload records added or changed since the last upload')
+    upload_parser.add_argument('--url', default=UPLOAD_URL, help='Bulk upsert endpoint')
+    upload_parser.add_argument('--date', action='append', help='Date to upload (yyyy-mm-dd), repeatable')
+    upload_parser.add_argument('--batch-size', type=int, default=UPLOAD_BATCH_SIZE, help='Articles per bulk request')
+    upload_parser.add_argument('--concurrency', type=int, default=UPLOAD_CONCURRENCY,
+                               help='Bulk requests in flight')
+    upload_parser.add_argument('--force', action='store_true', help='Re-upload every article')
+    subparsers.add_parser('stats', help='Show the number of uploaded articles and tracked dates')
+    subparsers.add_parser('reset', help='Forget what has been uploaded')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    ledger = UploadLedger(args.ledger)
+    if args.command == 'stats':
+        stats = ledger.stats()
+        print(f"已上传 {stats['docs']} 条新闻, 记录了 {stats['dates']} 个日期的读取位置")
+        ledger.close()
+    elif args.command == 'reset':
+        ledger.reset()
+        ledger.close()
+        print("已清空上传记录，下次上传将重新上传全部新闻")
+    else:
+        uploader = DeltaUploader(open_backend(args.url), NewsStore(args.store), ledger,
+                                 batch_size=args.batch_size, concurrency=args.concurrency)
+        try:
+            stats = uploader.upload(args.date, args.force)
+        finally:
+            uploader.close()
+        print(f"上传 {stats['uploaded']} 条, 未变化 {stats['unchanged']} 条, 失败 {stats['failed']} 条, "
+              f"{stats['batches']} 个批次, {stats['bytes']} 字节, 耗时 {stats['seconds']} 秒")
+        if stats['failed']:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import PARQUET_DIR, PARQUET_COMPRESSION, STORE_DIR
+from storage import NewsStore
+
+# 元数据列，按日期分区写入 meta/，正文单独写入 content/
+META_COLUMNS = ['_id', 'title', 'brief', 'createTime', 'url', 'imageUrl', 'isRecommend', 'hasImage', 'duplicateOf']
+_BOOL_COLUMNS = {'isRecommend', 'hasImage'}
+
+
+def _pyarrow():
+    """按需导入 pyarrow（可选依赖）"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet 导出需要安装 pyarrow: pip install pyarrow") from None
+    return pyarrow
+
+
+class ParquetExporter:
+    """把新闻存储导出为按日期分区的 Parquet 数据集
+
+    目录结构（Hive 分区，pyarrow/pandas/DuckDB/Spark 都能直接读取）：
+
+        res/parquet/meta/date=2025-03-01/part-00000.parquet     标题、摘要、URL 等元数据
+        res/parquet/content/date=2025-03-01/part-00000.parquet  _id 和正文
+
+    只需要标题和日期的分析只读 meta，不会读到正文。
+    每个日期在 _manifest.json 中记录已导出到的日志位置 (inode, 大小)，
+    再次导出时只把之后追加的记录写成新的 part 文件，不重写已有文件；
+    日志被压缩（inode 变化或变小）或使用 force 时重写该日期的分区。
+    同一 _id 出现在多个 part 中时以编号最大的 part 为准，compact 会合并为一个 part。
+    """
+
+    def __init__(self, output_dir: str = PARQUET_DIR, store: Optional[NewsStore] = None,
+                 compression: str = PARQUET_COMPRESSION):
+        self.logger = logging.getLogger(__name__)
+        self.output_dir = Path(output_dir)
+        self.store = store or NewsStore()
+        self.compression = compression
+        self.manifest_path = self.output_dir / '_manifest.json'
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.error(f"读取Parquet导出清单失败，将重新导出: {str(e)}")
+            return {}
+
+    def _save_manifest(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _partition(self, kind: str, date: str) -> Path:
+        return self.output_dir / kind / f'date={date}'
+
+    def _schemas(self):
+        pa = _pyarrow()
+        meta = pa.schema([(name, pa.bool_() if name in _BOOL_COLUMNS else pa.string()) for name in META_COLUMNS])
+        content = pa.schema([('_id', pa.string()), ('content', pa.large_string())])
+        return meta, content
+
+    def _write_part(self, kind: str, date: str, part: int, table):
+        pq = _pyarrow().parquet
+        directory = self._partition(kind, date)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f'part-{part:05d}.parquet'
+        tmp_path = directory / f'.part-{part:05d}.parquet.tmp'
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+
+    def _write(self, date: str, records: List[Dict], part: int):
+        pa = _pyarrow()
+        meta_schema, content_schema = self._schemas()
+        meta = {name: [] for name in META_COLUMNS}
+        content = {'_id': [], 'content': []}
+        for news in records:
+            for name in META_COLUMNS:
+                value = news.get(name)
+                meta[name].append(bool(value) if name in _BOOL_COLUMNS else value)
+            content['_id'].append(news.get('_id'))
+            content['content'].append(news.get('content'))
+        # 先写正文，元数据文件存在即表示该 part 完整
+        self._write_part('content', date, part, pa.table(content, schema=content_schema))
+        self._write_part('meta', date, part, pa.table(meta, schema=meta_schema))
+
+    def _remove_partition(self, date: str):
+        for kind in ('meta', 'content'):
+            shutil.rmtree(self._partition(kind, date), ignore_errors=True)
+
+    def export_date(self, date: str, force: bool = False) -> int:
+        """导出一个日期，返回本次写入的新闻数"""
+        with self._lock:
+            state = None if force else self._manifest.get(date)
+            records, (inode, size) = self.store.load_since(date, state['size'] if state else 0)
+            if state and (inode != state['inode'] or size < state['size']):
+                # 日志已被压缩，原来的偏移不再有效，重写该日期
+                state = None
+                records, (inode, size) = self.store.load_since(date)
+            if state is None:
+                self._remove_partition(date)
+            elif size == state['size']:
+                return 0
+            part = state['parts'] if state else 0
+            if records:
+                self._write(date, records, part)
+                part += 1
+            self._manifest[date] = {'inode': inode, 'size': size, 'parts': part}
+            self._save_manifest()
+        if records:
+            self.logger.info(f"已导出 {date} 的 {len(records)} 条新闻到 Parquet")
+        return len(records)
+
+    def export(self, dates: Optional[List[str]] = None, force: bool = False) -> int:
+        """导出指定日期（默认存储中的全部日期），返回写入的新闻数"""
+        return sum(self.export_date(date, force) for date in (dates or self.store.dates()))
+
+    def compact(self, date: str) -> int:
+        """把一个日期的多个 part 合并为一个，返回该日期的新闻数"""
+        return self.export_date(date, force=True)
+
+    def parts(self, date: str) -> int:
+        state = self._manifest.get(date)
+        return state['parts'] if state else 0
+
+
+_exporter: Optional[ParquetExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_parquet_exporter(store: Optional[NewsStore] = None) -> ParquetExporter:
+    """返回进程内共享的 Parquet 导出器"""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = ParquetExporter(store=store)
+        return _exporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the news store to a date-partitioned Parquet dataset')
+    parser.add_argument('--store', default=STORE_DIR, help='News store directory')
+    parser.add_argument('--output', default=PARQUET_DIR, help='Parquet dataset directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help='Append records saved since the last export')
+    export_parser.add_argument('--date', action='append', help='Date to export (yyyy-mm-dd), repeatable')
+    export_parser.add_argument('--force', action='store_true', help='Rewrite the partitions from scratch')
+    compact_parser = subparsers.add_parser('compact', help='Merge the parts of each date into one file')
+    compact_parser.add_argument('--date', action='append', help='Date to compact (yyyy-mm-dd), repeatable')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    exporter = ParquetExporter(args.output, NewsStore(args.store))
+    if args.command == 'export':
+        total = exporter.export(args.date, args.force)
+        print(f"本次导出 {total} 条新闻到 {args.output}")
+    else:
+        dates = args.date or [date for date in exporter.store.dates() if exporter.parts(date) > 1]
+        for date in dates:
+            exporter.compact(date)
+        print(f"已合并 {len(dates)} 个日期的分区")
+
+
+if __name__ == '__main__':
+    main()
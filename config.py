@@ -25,4 +25,134 @@ FILTER_KEYWORDS = [
 
 # 添加图片下载相关配置
 IMAGE_DOWNLOAD_TIMEOUT = 10  # 图片下载超时时间（秒）
-HTML_SAVE_DIR = 'res/html'   # HTML保存目录
\ No newline at end of file
+IMAGE_MAX_BYTES = 10 * 1024 * 1024  # 单张图片大小上限（字节），下载过程中超出即中止
+IMAGE_DOWNLOAD_WORKERS = 4   # 同时下载的图片数
+IMAGE_STORE_DIR = 'images/store'  # 按内容去重的共享图片存储
+HTML_SAVE_DIR = 'res/html'   # HTML保存目录
+
+# 并发抓取相关配置
+FETCH_MODES = ('serial', 'thread')  # 可选的抓取模式
+FETCH_MODE = 'serial'          # 抓取模式: serial(串行) / thread(线程池)
+MAX_WORKERS = 8                # 线程池最大工作线程数
+MAX_REQUESTS_PER_HOST = 2      # 每个主机同时进行的最大请求数
+
+# 请求频率自适应相关配置（按主机的令牌桶，AIMD 调整速率）
+RATE_LIMIT_INITIAL_RPS = 1.0   # 每个主机的初始请求速率（次/秒）
+RATE_LIMIT_MIN_RPS = 0.2       # 速率下限
+RATE_LIMIT_MAX_RPS = 10.0      # 速率上限
+RATE_LIMIT_INCREASE_RPS = 0.5  # 请求正常时速率每秒约增加的量（加性增加）
+RATE_LIMIT_DECREASE_FACTOR = 0.5  # 遇到429/503/超时时速率乘以的系数（乘性下降）
+RATE_LIMIT_BURST = 2           # 令牌桶容量，允许的瞬时突发请求数
+RATE_LIMIT_SLOW_LATENCY = 2.0  # 响应耗时超过该值（秒）时不再提高速率
+RATE_LIMIT_MAX_RETRY_AFTER = 60  # Retry-After 等待时间上限（秒）
+
+# HTTP连接池相关配置
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+HTTP_POOL_CONNECTIONS = 10     # 每个主机适配器缓存的连接池数量
+HTTP_POOL_MAXSIZE = 10         # 默认每个主机的最大keep-alive连接数
+HTTP_HOST_POOL_SIZES = {       # 按主机单独设置连接池大小
+    'tech.sina.com.cn': 4,
+    'finance.sina.com.cn': 4,
+    'n.sinaimg.cn': 8,
+}
+DNS_CACHE_TTL = 300            # DNS解析结果缓存时间（秒），0 表示不缓存
+
+# 对冲请求与熔断相关配置
+HEDGE_ENABLED = True           # 请求耗时过长时是否发出一个重复请求，采用先返回的响应
+HEDGE_PERCENTILE = 0.95        # 耗时超过该主机最近耗时的此分位数后发出对冲请求
+HEDGE_MIN_DELAY = 0.05         # 对冲请求的最短等待时间（秒）
+HEDGE_WINDOW = 200             # 每个主机参与计算分位数的最近请求数
+HEDGE_MIN_SAMPLES = 20         # 样本数不足时不对冲
+HEDGE_MAX_RATIO = 0.1          # 对冲请求数占总请求数的上限
+HEDGE_WORKERS = 32             # 执行对冲请求的线程数
+CIRCUIT_BREAKER_ENABLED = True  # 是否按主机熔断
+CIRCUIT_FAILURE_THRESHOLD = 5  # 连续失败多少次后熔断
+CIRCUIT_RESET_TIMEOUT = 30     # 熔断持续时间（秒），之后放行一个试探请求
+
+# HTTP响应缓存相关配置
+HTTP_CACHE_ENABLED = True               # 是否缓存列表页和文章页
+HTTP_CACHE_DIR = 'res/cache/http'       # 缓存目录
+HTTP_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 缓存容量上限（字节），超过后按LRU淘汰
+HTTP_CACHE_TTLS = {                     # 各类页面的缓存有效期（秒）
+    'listing': 5 * 60,                  # 首页和滚动列表页
+    'article': 7 * 24 * 3600,           # 文章详情页
+}
+
+# URL规范化相关配置（url_canon.py）
+URL_FORCE_HTTPS = True         # http 链接统一为 https
+URL_HOST_ALIASES = {           # 主机别名 -> 规范主机（手机版页面与PC版是同一篇文章）
+    'finance.sina.cn': 'finance.sina.com.cn',
+    'tech.sina.cn': 'tech.sina.com.cn',
+}
+URL_PATH_REWRITES = [          # (正则, 替换) 依次作用于路径
+    (r'/detail-(i[0-9a-z]+)\.d\.html$', r'/doc-\1.shtml'),  # 手机版文章页 -> PC版文章页
+]
+URL_TRACKING_PARAMS = ('utm_*', 'spm', 'from', 'vt', 'cre', 'mod', 'loc', 'r', 'tj', 'wm', 'sudaref', 'pos')  # 删除的查询参数（支持通配符）
+URL_REDIRECTS_PATH = 'res/index/redirects.sqlite'  # 已知的重定向（规范化后的来源URL -> 目标URL）
+
+# 已抓取URL索引相关配置
+SEEN_INDEX_PATH = 'res/index/seen.sqlite'  # 跨日期的已抓取URL索引
+SEEN_INDEX_BLOOM = True        # 是否在索引前使用布隆过滤器
+BLOOM_CAPACITY = 1000000       # 布隆过滤器预计容量
+BLOOM_ERROR_RATE = 0.01        # 布隆过滤器误判率
+
+# 近似重复检测相关配置（SimHash）
+NEAR_DUP_ENABLED = True        # 保存前是否检查近似重复（同一稿件换了URL重新发布）
+NEAR_DUP_INDEX_PATH = 'res/index/simhash.sqlite'  # 跨日期的指纹索引
+NEAR_DUP_MAX_DISTANCE = 3      # 指纹海明距离不超过该值视为重复（最大为3）
+NEAR_DUP_SHINGLE = 3           # 计算指纹时使用的字符 n-gram 长度
+NEAR_DUP_ACTION = 'reject'     # 发现重复时: reject(丢弃) / link(仍然保存，duplicateOf 字段记录原文URL)
+
+# 滚动新闻翻页相关配置
+ROLL_MAX_PAGES = 20            # 从起始页开始最多翻的页数
+ROLL_SEARCH_MAX_PAGE = 1000    # 回填旧日期时查找起始页的页码上限
+
+# 分布式工作队列相关配置
+WORK_QUEUE_URL = 'sqlite:///res/queue'  # 队列后端: sqlite:///目录（同一台机器）或 redis://主机:端口/库（需要安装 redis）
+WORK_QUEUE_LEASE_SECONDS = 120  # 领取的条目超过该时间未完成时重新分配给其他 worker
+WORK_QUEUE_MAX_ATTEMPTS = 3     # 同一条目最多被领取的次数，之后记为失败
+WORK_QUEUE_POLL_INTERVAL = 0.5  # 队列暂时没有可领取的条目时 worker 的等待间隔（秒）
+
+# 守护模式相关配置
+DAEMON_POLL_INTERVAL = 120     # 守护模式轮询间隔（秒）
+
+# 断点续爬相关配置
+CHECKPOINT_DIR = 'res/checkpoint'  # 爬取进度检查点目录，运行成功后自动删除
+CHECKPOINT_FSYNC = False       # 每条记录是否fsync（否则只flush，可承受进程崩溃但不能承受断电）
+
+# 结果存储相关配置
+STORE_DIR = 'res/store'        # 按日期追加写的新闻日志目录
+JSON_OUTPUT_DIR = 'res/res'    # 导出的合并JSON文件目录
+ENCODE_OUTPUT_DIR = 'res/encode'  # 2cloud.py 转换输出的JSON Lines目录
+STORE_EXPORT_ON_SAVE = True    # 每次保存后重新导出本次保存的日期的合并JSON（res/res，直接读取这些文件的下游依赖它）；
+                               # 关闭后只按需导出（storage.py export、2cloud.py）
+CONTENT_STORE_ENABLED = True   # 正文压缩后单独保存在 res/store/content（日志中只保留元数据）
+CONTENT_COMPRESSION = 'zlib'   # 正文压缩方式: zlib / zstd(需要安装 zstandard) / none
+CONTENT_COMPRESSION_LEVEL = 6  # 压缩级别
+
+# 列式导出相关配置（Parquet，需要安装 pyarrow）
+PARQUET_DIR = 'res/parquet'    # 按日期分区的 Parquet 数据集目录（meta/ 元数据，content/ 正文）
+PARQUET_COMPRESSION = 'zstd'   # Parquet 压缩算法: zstd / snappy / gzip / none
+PARQUET_EXPORT_ON_SAVE = False # 每次保存后是否立即追加导出到 Parquet（否则运行 columnar_export.py 按需导出）
+
+# 增量上传相关配置（cloud_upload.py）
+UPLOAD_URL = None              # 下游文档库的批量写入接口，如 https://docs.example.com/news/_bulk；None 表示未配置
+UPLOAD_HEADERS = {}            # 上传请求附加的请求头（如 {'Authorization': 'Bearer xxx'}）
+UPLOAD_LEDGER_PATH = 'res/index/upload.sqlite'  # 已上传的 _id 和内容哈希，以及各日期已读到的日志位置
+UPLOAD_BATCH_SIZE = 200        # 每个批量请求最多包含的新闻数
+UPLOAD_MAX_BATCH_BYTES = 4 * 1024 * 1024  # 每个批量请求的请求体上限（压缩前，字节）
+UPLOAD_CONCURRENCY = 4         # 同时进行的批量请求数
+UPLOAD_MAX_RETRIES = 3         # 批量请求失败（连接错误、超时、429、5xx）后的重试次数
+UPLOAD_TIMEOUT = 30            # 单个批量请求的超时时间（秒）
+UPLOAD_GZIP = True             # 请求体是否用 gzip 压缩（Content-Encoding: gzip）
+
+# 全文检索相关配置
+SEARCH_INDEX_ENABLED = True    # 保存新闻时是否同时更新全文检索索引
+SEARCH_INDEX_PATH = 'res/index/search.sqlite'  # 全文检索索引（SQLite FTS5）
+SEARCH_TOKENIZER = 'ngram'     # 分词器: ngram(中文按相邻两字切分) / jieba(需要安装 jieba)
+
+# 运行统计相关配置
+METRICS_REPORT_DIR = 'res/metrics'   # 每次运行结束时写入JSON运行报告的目录
+METRICS_PROMETHEUS_TEXTFILE = None   # Prometheus textfile 路径（如 /var/lib/node_exporter/ai_news.prom），None 表示不写
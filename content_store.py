@@ -0,0 +1,198 @@
+import argparse
+import fcntl
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from config import CONTENT_COMPRESSION, CONTENT_COMPRESSION_LEVEL, STORE_DIR
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _zstd():
+    """按需导入 zstandard（可选依赖）"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd 压缩需要安装 zstandard: pip install zstandard") from None
+    return zstandard
+
+
+def _compress(data: bytes, codec: str, level: int) -> bytes:
+    if codec == 'zlib':
+        return zlib.compress(data, level)
+    if codec == 'zstd':
+        return _zstd().ZstdCompressor(level=level).compress(data)
+    return data
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'zstd':
+        return _zstd().ZstdDecompressor().decompress(data)
+    return data
+
+
+CODECS = ('zlib', 'zstd', 'none')
+
+
+class ContentStore:
+    """内容寻址的压缩正文存储
+
+    正文按内容的SHA-256去重，压缩后追加写入 content.pack，SQLite 索引记录
+    哈希 -> (偏移, 长度, 压缩方式)，以及新闻 _id -> 哈希，按 _id 或哈希读取
+    正文只需一次索引查找和一次 pread。压缩方式按条记录，修改 CONTENT_COMPRESSION
+    后旧正文仍可读取。
+
+    pack 文件先落盘再提交索引，写入中途退出只会在 pack 末尾留下无人引用的字节。
+    """
+
+    def __init__(self, store_dir: str = os.path.join(STORE_DIR, 'content'),
+                 compression: str = CONTENT_COMPRESSION, level: int = CONTENT_COMPRESSION_LEVEL):
+        self.logger = logging.getLogger(__name__)
+        if compression not in CODECS:
+            raise ValueError(f"不支持的压缩方式: {compression}")
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.pack_path = self.store_dir / 'content.pack'
+        self.compression = compression
+        self.level = level
+        self._lock = threading.Lock()
+        self._pack = open(self.pack_path, 'a+b')
+        self._db = sqlite3.connect(str(self.store_dir / 'index.sqlite'), check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS blobs '
+                         '(hash TEXT PRIMARY KEY, offset INTEGER, length INTEGER, codec TEXT) WITHOUT ROWID')
+        self._db.execute('CREATE TABLE IF NOT EXISTS ids (id TEXT PRIMARY KEY, hash TEXT) WITHOUT ROWID')
+        self._db.commit()
+
+    def put_many(self, items: Iterable[Tuple[str, str]]) -> Dict[str, str]:
+        """保存一批 (_id, 正文)，返回 {_id: 内容哈希}；已有的正文不重复写入，整批只落盘一次"""
+        hashes = {}
+        with self._lock:
+            chunks = []
+            written = set()
+            for news_id, content in items:
+                digest = content_hash(content)
+                hashes[news_id] = digest
+                if digest in written or self._db.execute(
+                        'SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone():
+                    continue
+                chunks.append((digest, _compress(content.encode('utf-8'), self.compression, self.level)))
+                written.add(digest)
+            blobs = []
+            if chunks:
+                data = b''.join(chunk for _, chunk in chunks)
+                # 加文件锁写入，偏移取自写入后的实际位置，多个进程共用 pack 时不会错位
+                fcntl.flock(self._pack.fileno(), fcntl.LOCK_EX)
+                try:
+                    self._pack.write(data)
+                    self._pack.flush()
+                    os.fsync(self._pack.fileno())
+                    offset = self._pack.tell() - len(data)
+                finally:
+                    fcntl.flock(self._pack.fileno(), fcntl.LOCK_UN)
+                for digest, chunk in chunks:
+                    blobs.append((digest, offset, len(chunk), self.compression))
+                    offset += len(chunk)
+            self._db.executemany('INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?)', blobs)
+            self._db.executemany('INSERT OR REPLACE INTO ids VALUES (?, ?)', hashes.items())
+            self._db.commit()
+        return hashes
+
+    def get(self, digest: str) -> Optional[str]:
+        """按内容哈希读取正文"""
+        with self._lock:
+            row = self._db.execute('SELECT offset, length, codec FROM blobs WHERE hash = ?', (digest,)).fetchone()
+        if row is None:
+            return None
+        offset, length, codec = row
+        return _decompress(os.pread(self._pack.fileno(), length, offset), codec).decode('utf-8')
+
+    def get_by_id(self, news_id: str) -> Optional[str]:
+        """按新闻 _id 读取最近一次保存的正文"""
+        with self._lock:
+            row = self._db.execute('SELECT hash FROM ids WHERE id = ?', (news_id,)).fetchone()
+        return self.get(row[0]) if row else None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            blobs, stored = self._db.execute('SELECT COUNT(*), COALESCE(SUM(length), 0) FROM blobs').fetchone()
+            ids = self._db.execute('SELECT COUNT(*) FROM ids').fetchone()[0]
+        return {'ids': ids, 'blobs': blobs, 'stored_bytes': stored,
+                'pack_bytes': self.pack_path.stat().st_size}
+
+    def close(self):
+        with self._lock:
+            self._pack.close()
+            self._db.close()
+
+
+class LazyNews(dict):
+    """按需加载正文的新闻记录
+
+    只包含元数据，第一次访问 news['content'] 或 news.get('content') 时才从
+    正文存储读取。需要完整记录（如写JSON）时调用 materialize()。
+    """
+
+    def __init__(self, record: Dict, digest: str, loader: Callable[[str], Optional[str]]):
+        super().__init__(record)
+        self._digest = digest
+        self._loader = loader
+
+    @property
+    def digest(self) -> str:
+        """正文的内容哈希（不读取正文）"""
+        return self._digest
+
+    def __missing__(self, key):
+        if key != 'content':
+            raise KeyError(key)
+        content = self[key] = self._loader(self._digest)
+        return content
+
+    def get(self, key, default=None):
+        if key == 'content' or key in self:
+            return self[key]
+        return default
+
+    def materialize(self) -> Dict:
+        self.get('content')
+        return dict(self)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compressed article content store')
+    parser.add_argument('--dir', default=os.path.join(STORE_DIR, 'content'), help='Content store directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Show the number of stored bodies and their size')
+    show_parser = subparsers.add_parser('show', help='Print the content of an article')
+    show_parser.add_argument('news_id', help='Article _id')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = ContentStore(args.dir)
+    try:
+        if args.command == 'stats':
+            stats = store.stats()
+            print(f"新闻 {stats['ids']} 条, 正文 {stats['blobs']} 份, 压缩后 {stats['stored_bytes']} 字节, "
+                  f"pack 文件 {stats['pack_bytes']} 字节")
+        else:
+            content = store.get_by_id(args.news_id)
+            if content is None:
+                print(f"未找到 {args.news_id} 的正文")
+            else:
+                print(content)
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES, HTTP_CACHE_TTLS
+
+
+def classify_url(url: str) -> str:
+    """按页面类型对URL分类，用于选择缓存有效期
+
+    首页和滚动列表页更新频繁，归为 listing；其余归为 article。
+    """
+    path = urlparse(url).path
+    if path in ('', '/') or '/roll/' in path:
+        return 'listing'
+    return 'article'
+
+
+class HttpCache:
+    """基于磁盘的HTTP响应缓存
+
+    响应体按URL哈希保存为文件，元数据（ETag、Last-Modified、保存时间、
+    最近访问时间、大小）保存在 SQLite 索引中。超过 max_bytes 时按最近
+    访问时间淘汰（LRU）。
+    """
+
+    def __init__(self, cache_dir: str = HTTP_CACHE_DIR, max_bytes: int = HTTP_CACHE_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.ttls = dict(HTTP_CACHE_TTLS if ttls is None else ttls)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / 'index.sqlite'), check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'url TEXT PRIMARY KEY, key TEXT, etag TEXT, last_modified TEXT, '
+            'content_type TEXT, stored_at REAL, accessed_at REAL, size INTEGER)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_accessed ON entries(accessed_at)')
+        self._db.commit()
+        row = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()
+        self.total_bytes = row[0]
+        # 统计信息
+        self.hits = 0          # 在有效期内，直接从磁盘返回
+        self.revalidated = 0   # 过期后条件请求返回304
+        self.misses = 0        # 需要完整下载
+        self.bytes_fetched = 0
+        self.bytes_saved = 0
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / key
+
+    def ttl_for(self, url: str) -> float:
+        return self.ttls.get(classify_url(url), 0)
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """查找缓存条目，返回元数据和响应体；不存在或文件缺失时返回None"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT key, etag, last_modified, content_type, stored_at, size FROM entries WHERE url = ?',
+                (url,)
+            ).fetchone()
+        if not row:
+            return None
+        key, etag, last_modified, content_type, stored_at, size = row
+        try:
+            body = self._body_path(key).read_bytes()
+        except OSError:
+            self._delete(url)
+            return None
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': content_type,
+            'stored_at': stored_at,
+            'fresh': time.time() - stored_at < self.ttl_for(url),
+            'body': body,
+        }
+
+    def conditional_headers(self, entry: Dict) -> Dict[str, str]:
+        """根据缓存条目生成条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def touch(self, url: str, refreshed: bool = False):
+        """更新访问时间；refreshed 为 True 时同时重置有效期（304 之后）"""
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._db.execute('UPDATE entries SET accessed_at = ?, stored_at = ? WHERE url = ?', (now, now, url))
+            else:
+                self._db.execute('UPDATE entries SET accessed_at = ? WHERE url = ?', (now, url))
+            self._db.commit()
+
+    def store(self, url: str, body: bytes, headers):
+        """保存响应体及其校验头"""
+        key = hashlib.sha1(url.encode()).hexdigest()
+        path = self._body_path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            row = self._db.execute('SELECT size FROM entries WHERE url = ?', (url,)).fetchone()
+            if row:
+                self.total_bytes -= row[0]
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, key, headers.get('ETag'), headers.get('Last-Modified'),
+                 headers.get('Content-Type'), now, now, len(body))
+            )
+            self.total_bytes += len(body)
+            self._db.commit()
+        self._evict()
+
+    def _delete(self, url: str):
+        with self._lock:
+            row = self._db.execute('SELECT key, size FROM entries WHERE url = ?', (url,)).fetchone()
+            if not row:
+                return
+            self._db.execute('DELETE FROM entries WHERE url = ?', (url,))
+            self._db.commit()
+            self.total_bytes -= row[1]
+        try:
+            self._body_path(row[0]).unlink()
+        except OSError:
+            pass
+
+    def _evict(self):
+        """超过容量上限时按LRU顺序淘汰"""
+        while self.total_bytes > self.max_bytes:
+            with self._lock:
+                row = self._db.execute('SELECT url FROM entries ORDER BY accessed_at LIMIT 1').fetchone()
+            if not row:
+                break
+            self._delete(row[0])
+
+    def record(self, outcome: str, fetched: int = 0, saved: int = 0):
+        """记录一次缓存结果: hit / revalidated / miss"""
+        with self._lock:
+            if outcome == 'hit':
+                self.hits += 1
+            elif outcome == 'revalidated':
+                self.revalidated += 1
+            else:
+                self.misses += 1
+            self.bytes_fetched += fetched
+            self.bytes_saved += saved
+
+    def log_stats(self):
+        self.logger.info(
+            f"HTTP缓存统计: 命中 {self.hits} 次, 304重验证 {self.revalidated} 次, "
+            f"未命中 {self.misses} 次, 下载 {self.bytes_fetched} 字节, 节省 {self.bytes_saved} 字节"
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,319 @@
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from requests.structures import CaseInsensitiveDict
+
+from config import (DEFAULT_HEADERS, HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE,
+                    HTTP_HOST_POOL_SIZES, DNS_CACHE_TTL, HTTP_CACHE_ENABLED,
+                    HEDGE_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_DELAY, HEDGE_MAX_RATIO, HEDGE_WORKERS,
+                    CIRCUIT_BREAKER_ENABLED)
+from http_cache import HttpCache
+from metrics import get_metrics
+from resilience import CircuitBreaker, LatencyTracker
+
+
+class _DnsCache:
+    """带过期时间的 DNS 解析缓存，替换 socket.getaddrinfo"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._original = socket.getaddrinfo
+
+    def getaddrinfo(self, host, port, *args, **kwargs):
+        key = (host, port, args, tuple(sorted(kwargs.items())))
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > now:
+                self.hits += 1
+                return cached[1]
+        result = self._original(host, port, *args, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = (now + self.ttl, result)
+        return result
+
+
+_dns_cache: Optional[_DnsCache] = None
+
+
+def _install_dns_cache(ttl: float) -> _DnsCache:
+    """在进程内安装 DNS 缓存（只安装一次）"""
+    global _dns_cache
+    if _dns_cache is None:
+        _dns_cache = _DnsCache(ttl)
+        socket.getaddrinfo = _dns_cache.getaddrinfo
+    return _dns_cache
+
+
+class HttpClient:
+    """共享的 HTTP 客户端
+
+    持有一个 keep-alive 的 requests.Session，并按主机挂载独立的连接池，
+    爬虫和图片下载共用同一批连接，避免每次请求重新进行 TCP/TLS 握手。
+
+    所有实际发出的请求都经过按主机的熔断器；开启对冲时，请求耗时超过该主机
+    最近耗时的 HEDGE_PERCENTILE 分位数后再发出一个相同的请求，采用先返回的响应。
+    对冲请求数不超过总请求数的 HEDGE_MAX_RATIO。
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None,
+                 pool_connections: int = HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 host_pool_sizes: Optional[Dict[str, int]] = None,
+                 dns_ttl: float = DNS_CACHE_TTL,
+                 cache: Optional[HttpCache] = None,
+                 hedge: bool = HEDGE_ENABLED,
+                 circuit_breaker: bool = CIRCUIT_BREAKER_ENABLED):
+        self.logger = logging.getLogger(__name__)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.host_pool_sizes = dict(HTTP_HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes)
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+        self._adapters = {}
+        self._lock = threading.Lock()
+        self.dns_cache = _install_dns_cache(dns_ttl) if dns_ttl > 0 else None
+        self.cache = cache
+        self.breaker = CircuitBreaker() if circuit_breaker else None
+        self.latencies = LatencyTracker()
+        self.hedge = hedge
+        self._hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='hedge') if hedge else None
+        self.hedge_stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0}
+
+    def _ensure_adapter(self, url: str):
+        """为URL所属主机挂载独立的连接池"""
+        parsed = urlparse(url)
+        prefix = f"{parsed.scheme}://{parsed.netloc}/"
+        with self._lock:
+            if prefix in self._adapters:
+                return
+            adapter = HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.host_pool_sizes.get(parsed.hostname or '', self.pool_maxsize)
+            )
+            self.session.mount(prefix, adapter)
+            self._adapters[prefix] = adapter
+
+    def get(self, url: str, use_cache: bool = False, revalidate: bool = False,
+            acquire: Optional[Callable[..., Optional[ContextManager]]] = None, **kwargs) -> requests.Response:
+        """发送GET请求，参数与 requests.get 一致
+
+        use_cache 为 True 且客户端配置了缓存时，有效期内直接返回磁盘内容，
+        过期后发送条件请求，服务器返回304时同样使用磁盘内容。
+        revalidate 为 True 时即使缓存未过期也发送条件请求。
+        acquire(url, blocking=True) 只在实际发出网络请求时调用，调用方在其中占用主机
+        并发槽位和限速令牌，返回的上下文管理器在请求结束时释放，缓存命中不消耗请求预算。
+        对冲请求以 blocking=False 调用，返回None时不发出对冲请求。
+        """
+        if use_cache and self.cache is not None:
+            return self._get_cached(url, revalidate, acquire, **kwargs)
+        return self._send(url, acquire, **kwargs)
+
+    def _get_cached(self, url: str, revalidate: bool = False,
+                    acquire: Optional[Callable[..., Optional[ContextManager]]] = None, **kwargs) -> requests.Response:
+        entry = self.cache.lookup(url)
+        if entry and entry['fresh'] and not revalidate:
+            self.cache.touch(url)
+            self.cache.record('hit', saved=len(entry['body']))
+            return self._cached_response(url, entry)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry:
+            headers.update(self.cache.conditional_headers(entry))
+        response = self._send(url, acquire, headers=headers, **kwargs)
+
+        if entry and response.status_code == 304:
+            self.cache.touch(url, refreshed=True)
+            self.cache.record('revalidated', saved=len(entry['body']))
+            return self._cached_response(url, entry)
+
+        self.cache.record('miss', fetched=len(response.content))
+        if response.status_code == 200:
+            self.cache.store(url, response.content, response.headers)
+        return response
+
+    def _send(self, url: str, acquire: Optional[Callable[..., Optional[ContextManager]]] = None,
+              **kwargs) -> requests.Response:
+        """发出网络请求：先检查熔断器，再按需对冲"""
+        host = urlparse(url).netloc
+        probe = self.breaker.before_request(host) if self.breaker else False
+        try:
+            self._ensure_adapter(url)
+            gate = acquire(url) if acquire else nullcontext()
+            delay = self._hedge_delay(host) if self.hedge else None
+            if delay is None:
+                return self._gated_attempt(gate, host, url, kwargs)
+            return self._hedged(host, url, kwargs, delay, gate, acquire)
+        finally:
+            if probe:
+                self.breaker.end_probe(host)
+
+    def _attempt(self, host: str, url: str, kwargs: Dict) -> requests.Response:
+        """发出一次请求，记录耗时并更新熔断器"""
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, **kwargs)
+        except RequestException:
+            if self.breaker:
+                self.breaker.record_failure(host)
+            raise
+        self.latencies.record(host, time.perf_counter() - start)
+        if self.breaker:
+            if response.status_code >= 500:
+                self.breaker.record_failure(host)
+            else:
+                self.breaker.record_success(host)
+        return response
+
+    def _hedge_delay(self, host: str) -> Optional[float]:
+        """返回发出对冲请求前的等待时间；样本不足或超出对冲预算时返回None"""
+        with self._lock:
+            self.hedge_stats['requests'] += 1
+            if self.hedge_stats['hedged'] >= HEDGE_MAX_RATIO * self.hedge_stats['requests']:
+                return None
+        delay = self.latencies.percentile(host, HEDGE_PERCENTILE)
+        return None if delay is None else max(delay, HEDGE_MIN_DELAY)
+
+    def _gated_attempt(self, gate: ContextManager, host: str, url: str, kwargs: Dict) -> requests.Response:
+        with gate:
+            return self._attempt(host, url, kwargs)
+
+    def _hedged(self, host: str, url: str, kwargs: Dict, delay: float, gate: ContextManager,
+                acquire: Optional[Callable[..., Optional[ContextManager]]] = None) -> requests.Response:
+        # 原请求的槽位在它自己结束时释放：对冲请求先返回时原请求仍占用槽位
+        primary = self._hedge_pool.submit(self._gated_attempt, gate, host, url, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        with self._lock:
+            # 等待期间其他请求可能已用完对冲预算
+            within_budget = self.hedge_stats['hedged'] < HEDGE_MAX_RATIO * self.hedge_stats['requests']
+            if within_budget:
+                self.hedge_stats['hedged'] += 1
+        if not within_budget:
+            return primary.result()
+        # 对冲请求同样占用主机并发槽位和限速令牌，没有立即可用的槽位或令牌时不对冲
+        hedge_gate = acquire(url, blocking=False) if acquire else nullcontext()
+        if hedge_gate is None:
+            with self._lock:
+                self.hedge_stats['hedged'] -= 1
+            get_metrics().inc('hedges_skipped')
+            return primary.result()
+        get_metrics().inc('hedged_requests')
+        hedge = self._hedge_pool.submit(self._gated_attempt, hedge_gate, host, url, kwargs)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None or not pending:
+                break
+        for future in {primary, hedge} - {winner}:
+            # 落后的响应到达后关闭，释放连接（stream=True 时尤其需要）
+            future.add_done_callback(_close_response)
+        if winner is None:
+            return primary.result()  # 两个请求都失败，抛出原请求的异常
+        if winner is hedge:
+            with self._lock:
+                self.hedge_stats['hedge_wins'] += 1
+            get_metrics().inc('hedge_wins')
+        return winner.result()
+
+    @staticmethod
+    def _cached_response(url: str, entry: Dict) -> requests.Response:
+        """用缓存内容构造一个 Response 对象"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = entry['body']
+        response.from_cache = True
+        response.headers = CaseInsensitiveDict()
+        if entry.get('content_type'):
+            response.headers['Content-Type'] = entry['content_type']
+        if entry.get('etag'):
+            response.headers['ETag'] = entry['etag']
+        if entry.get('last_modified'):
+            response.headers['Last-Modified'] = entry['last_modified']
+        return response
+
+    def connection_stats(self) -> Dict[str, Dict[str, int]]:
+        """返回每个主机的连接复用统计
+
+        requests 为发出的请求数，connections 为新建的连接数，
+        两者之差即为复用已有连接（省去握手）的次数。
+        """
+        stats = {}
+        with self._lock:
+            adapters = list(self._adapters.items())
+        for prefix, adapter in adapters:
+            requests_count = 0
+            connections = 0
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_count += pool.num_requests
+                connections += pool.num_connections
+            stats[prefix] = {
+                'requests': requests_count,
+                'connections': connections,
+                'reused': max(0, requests_count - connections),
+            }
+        return stats
+
+    def log_stats(self):
+        """将连接复用和DNS缓存统计写入日志"""
+        for prefix, item in self.connection_stats().items():
+            self.logger.info(
+                f"连接池统计 {prefix}: 请求 {item['requests']} 次, "
+                f"新建连接 {item['connections']} 个, 复用 {item['reused']} 次"
+            )
+        if self.dns_cache:
+            self.logger.info(f"DNS缓存统计: 命中 {self.dns_cache.hits} 次, 未命中 {self.dns_cache.misses} 次")
+        if self.hedge_stats['hedged']:
+            self.logger.info(f"对冲请求 {self.hedge_stats['hedged']} 次, "
+                             f"对冲请求先返回 {self.hedge_stats['hedge_wins']} 次")
+        if self.breaker:
+            for host, item in self.breaker.stats().items():
+                self.logger.info(f"熔断统计 {host}: 熔断 {item['opened']} 次, 拒绝请求 {item['rejected']} 次")
+        if self.cache:
+            self.cache.log_stats()
+
+    def close(self):
+        self.session.close()
+        if self._hedge_pool:
+            self._hedge_pool.shutdown(wait=False)
+        if self.cache:
+            self.cache.close()
+
+
+def _close_response(future):
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """获取进程内共享的 HttpClient"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient(cache=HttpCache() if HTTP_CACHE_ENABLED else None)
+        return _client
@@ -0,0 +1,246 @@
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from requests.exceptions import RequestException, Timeout
+
+from config import IMAGE_STORE_DIR, IMAGE_MAX_BYTES, IMAGE_DOWNLOAD_WORKERS, IMAGE_DOWNLOAD_TIMEOUT
+from http_client import get_client
+from metrics import get_metrics
+from resilience import CircuitOpenError
+
+KNOWN_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
+
+
+def image_extension(url: str) -> str:
+    """从URL获取文件扩展名，无法识别时使用.jpg"""
+    path = url.split('?')[0]  # 移除查询参数
+    ext = os.path.splitext(path)[1].lower()
+    return ext if ext in KNOWN_EXTENSIONS else '.jpg'
+
+
+def normalize_image_url(src: str) -> str:
+    if src.startswith('//'):
+        return 'https:' + src
+    return src
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class ImageStore:
+    """跨文章、跨日期共享的图片存储
+
+    图片按内容的SHA-256保存在 objects/ 下，同一张图只存一份；
+    SQLite 索引记录 URL 的MD5到内容哈希的映射，已下载过的URL无需再次请求。
+    文章目录和日期目录中的图片是指向共享对象的硬链接（不支持时退回复制）。
+    """
+
+    def __init__(self, store_dir: str = IMAGE_STORE_DIR, max_bytes: int = IMAGE_MAX_BYTES,
+                 max_workers: int = IMAGE_DOWNLOAD_WORKERS, timeout: int = IMAGE_DOWNLOAD_TIMEOUT):
+        self.logger = logging.getLogger(__name__)
+        self.store_dir = Path(store_dir)
+        self.objects_dir = self.store_dir / 'objects'
+        self.tmp_dir = self.store_dir / 'tmp'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.store_dir / 'index.sqlite'), check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS urls '
+                         '(url_hash BLOB PRIMARY KEY, content_hash TEXT, ext TEXT) WITHOUT ROWID')
+        self._db.commit()
+        self._in_flight: Dict[str, Future] = {}  # 正在下载的URL，同一URL的并发请求共用一次下载
+        self.stats = {'downloaded': 0, 'url_hits': 0, 'content_dedup': 0, 'failed': 0}
+
+    def _object_path(self, content_hash: str, ext: str) -> Path:
+        return self.objects_dir / content_hash[:2] / f'{content_hash}{ext}'
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def lookup(self, url: str) -> Optional[Path]:
+        """返回URL已下载过的共享对象路径"""
+        with self._lock:
+            row = self._db.execute('SELECT content_hash, ext FROM urls WHERE url_hash = ?',
+                                   (hashlib.md5(url.encode()).digest(),)).fetchone()
+        if row is None:
+            return None
+        path = self._object_path(*row)
+        return path if path.exists() else None
+
+    def fetch(self, url: str, retries: int = 3) -> Optional[Path]:
+        """下载图片到共享存储并返回对象路径，失败返回None"""
+        url = normalize_image_url(url)
+        if not url.startswith(('http://', 'https://')):
+            self.logger.error(f"Invalid image URL format: {url}")
+            return None
+        path = self.lookup(url)
+        if path is not None:
+            self._count('url_hits')
+            return path
+
+        with self._lock:
+            future = self._in_flight.get(url)
+            owner = future is None
+            if owner:
+                future = self._in_flight[url] = Future()
+        if not owner:
+            self._count('url_hits')
+            return future.result()
+        try:
+            path = self._download(url, retries)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[url]
+
+    def _download(self, url: str, retries: int) -> Optional[Path]:
+        with get_metrics().timer('image_download'):
+            return self._download_with_retries(url, retries)
+
+    def _download_with_retries(self, url: str, retries: int) -> Optional[Path]:
+        for i in range(retries):
+            if i:
+                get_metrics().inc('retries')
+            tmp_path = self.tmp_dir / uuid.uuid4().hex
+            try:
+                content_hash = self._stream_to_file(url, tmp_path)
+                if content_hash is None:
+                    self._count('failed')
+                    return None
+                ext = image_extension(url)
+                path = self._object_path(content_hash, ext)
+                if path.exists():
+                    self._count('content_dedup')
+                else:
+                    path.parent.mkdir(exist_ok=True)
+                    os.replace(tmp_path, path)
+                    self._count('downloaded')
+                with self._lock:
+                    self._db.execute('INSERT OR REPLACE INTO urls (url_hash, content_hash, ext) VALUES (?, ?, ?)',
+                                     (hashlib.md5(url.encode()).digest(), content_hash, ext))
+                    self._db.commit()
+                self.logger.info(f"Successfully downloaded image: {url} -> {path}")
+                return path
+
+            except ImageTooLarge as e:
+                self.logger.error(str(e))
+                self._count('failed')
+                return None
+
+            except CircuitOpenError as e:
+                self.logger.warning(str(e))
+                get_metrics().inc('circuit_rejected')
+                self._count('failed')
+                return None
+
+            except Timeout:
+                self.logger.warning(f"Download timeout ({i+1}/{retries}): {url}")
+
+            except RequestException as e:
+                self.logger.warning(f"Download failed ({i+1}/{retries}): {url}, error: {str(e)}")
+
+            except Exception as e:
+                self.logger.error(f"Unexpected error while downloading image: {url}, error: {str(e)}")
+                self._count('failed')
+                return None
+
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+        self._count('failed')
+        return None
+
+    def _stream_to_file(self, url: str, tmp_path: Path) -> Optional[str]:
+        """分块写入临时文件并计算内容哈希；累计大小超过上限时立即中止"""
+        response = get_client().get(url, timeout=self.timeout, stream=True)
+        try:
+            response.raise_for_status()
+
+            # 验证内容类型
+            content_type = response.headers.get('content-type', '')
+            if not content_type.startswith('image/'):
+                self.logger.error(f"Invalid content type: {content_type} for URL: {url}")
+                return None
+
+            # Content-Length 可能缺失或不准确，仍需在下载过程中检查
+            file_size = int(response.headers.get('content-length', 0) or 0)
+            if file_size > self.max_bytes:
+                raise ImageTooLarge(f"Image too large ({file_size} bytes): {url}")
+
+            sha256 = hashlib.sha256()
+            received = 0
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if not chunk:
+                        continue
+                    received += len(chunk)
+                    get_metrics().inc('bytes_transferred', len(chunk))
+                    if received > self.max_bytes:
+                        raise ImageTooLarge(f"Image too large (over {self.max_bytes} bytes): {url}")
+                    sha256.update(chunk)
+                    f.write(chunk)
+            return sha256.hexdigest()
+        finally:
+            response.close()
+
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, Optional[Path]]:
+        """并行下载多张图片（线程数不超过 max_workers），返回 URL -> 对象路径"""
+        unique = list(dict.fromkeys(urls))
+        if len(unique) <= 1 or self.max_workers <= 1:
+            return {url: self.fetch(url) for url in unique}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique))) as executor:
+            return dict(zip(unique, executor.map(self.fetch, unique)))
+
+    @staticmethod
+    def link(object_path: Path, dest_path: Path) -> Path:
+        """在 dest_path 创建指向共享对象的硬链接，跨文件系统等情况下退回复制"""
+        if dest_path.exists():
+            return dest_path
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(object_path, dest_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(object_path, dest_path)
+        return dest_path
+
+    def log_stats(self):
+        self.logger.info(
+            f"图片下载 {self.stats['downloaded']} 张，URL命中 {self.stats['url_hits']} 次，"
+            f"内容重复 {self.stats['content_dedup']} 张，失败 {self.stats['failed']} 张"
+        )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_store: Optional[ImageStore] = None
+_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    """返回进程内共享的图片存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ImageStore()
+        return _store
@@ -0,0 +1,113 @@
+import re
+from typing import Dict, Iterable, Optional, Set
+
+_END = ''  # 前缀树中表示关键词结束的键
+
+_FANOUT = 16  # 根节点按首字符分组的扇出
+
+
+def _root_pattern(trie: Dict) -> str:
+    """生成根节点的正则表达式
+
+    正则引擎在每个候选位置会逐个尝试根节点的分支，关键词很多时开销较大。
+    这里先用首字符集合定位候选位置，再用单字符后向断言把分支分组成树，
+    每个位置最多只需检查约 2 * _FANOUT 个断言。
+    """
+    def branch(ch):
+        sub = _trie_pattern(trie[ch])
+        return f'(?<={re.escape(ch)})' + (sub or '')
+
+    def grouped(chars):
+        if len(chars) <= _FANOUT:
+            return '(?:' + '|'.join(branch(ch) for ch in chars) + ')'
+        size = -(-len(chars) // _FANOUT)
+        groups = []
+        for i in range(0, len(chars), size):
+            chunk = chars[i:i + size]
+            groups.append('(?<=[' + ''.join(re.escape(ch) for ch in chunk) + '])' + grouped(chunk))
+        return '(?:' + '|'.join(groups) + ')'
+
+    chars = sorted(trie)
+    if len(chars) <= _FANOUT:
+        return _trie_pattern(trie)
+    return '[' + ''.join(re.escape(ch) for ch in chars) + ']' + grouped(chars)
+
+
+def _trie_pattern(node: Dict) -> Optional[str]:
+    """将前缀树转换为正则表达式，返回None表示叶子节点"""
+    terminal = _END in node
+    branches = []
+    singles = []
+    for ch in sorted(key for key in node if key != _END):
+        sub = _trie_pattern(node[ch])
+        if sub is None:
+            singles.append(ch)
+        else:
+            branches.append(re.escape(ch) + sub)
+
+    if not branches and not singles:
+        return None
+    if singles:
+        if len(singles) == 1:
+            branches.append(re.escape(singles[0]))
+        else:
+            branches.append('[' + ''.join(re.escape(ch) for ch in singles) + ']')
+
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    if terminal:
+        pattern += '?'
+    return pattern
+
+
+class KeywordMatcher:
+    """大小写不敏感的多关键词匹配器
+
+    关键词在构建时统一转为小写并组织成前缀树，再编译为一个正则表达式，
+    匹配时只需对文本扫描一遍（扫描在正则引擎中完成），
+    耗时不再随关键词数量线性增长。
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = [keyword for keyword in keywords if keyword]
+        # 小写关键词 -> 原始关键词
+        self._originals: Dict[str, Set[str]] = {}
+        trie: Dict = {}
+        for keyword in self.keywords:
+            lowered = keyword.lower()
+            self._originals.setdefault(lowered, set()).add(keyword)
+            node = trie
+            for ch in lowered:
+                node = node.setdefault(ch, {})
+            node[_END] = True
+
+        # 同一位置只会匹配到最长的关键词，预先记录每个关键词包含的较短前缀关键词
+        self._prefix_hits: Dict[str, Set[str]] = {}
+        for lowered in self._originals:
+            hits = set()
+            for i in range(1, len(lowered) + 1):
+                hits.update(self._originals.get(lowered[:i], ()))
+            self._prefix_hits[lowered] = hits
+
+        pattern = _root_pattern(trie) if trie else None
+        self._search_re = re.compile(pattern) if pattern else None
+
+    def search(self, text: str) -> bool:
+        """文本中是否包含任一关键词"""
+        if self._search_re is None or not text:
+            return False
+        return self._search_re.search(text.lower()) is not None
+
+    def find_all(self, text: str) -> Set[str]:
+        """返回文本中命中的全部关键词（原始写法）"""
+        if self._search_re is None or not text:
+            return set()
+        text = text.lower()
+        hits = set()
+        # 每次命中后从下一个字符继续查找，以免漏掉与之重叠的关键词
+        match = self._search_re.search(text)
+        while match:
+            hits.update(self._prefix_hits[match.group()])
+            match = self._search_re.search(text, match.start() + 1)
+        return hits
@@ -1,24 +1,158 @@
 import argparse
+import time
 from datetime import datetime
-from ai_news_crawler import AiNewsCrawler
-from utils import setup_logging
+from config import (FETCH_MODE, FETCH_MODES, MAX_WORKERS, MAX_REQUESTS_PER_HOST, METRICS_PROMETHEUS_TEXTFILE,
+                    DAEMON_POLL_INTERVAL, WORK_QUEUE_URL)
+
+# 爬虫及其依赖（requests、BeautifulSoup、lxml）、schedule 和工作队列在用到时才导入，
+# --help、参数错误时不加载；启动耗时见 benchmarks/startup_bench.py
+
+def run_daemon(crawler, interval, logger):
+    """常驻运行：按固定间隔增量轮询，跨过零点时切换到新的日期"""
+    import schedule
+
+    def job():
+        try:
+            today = datetime.now().strftime('%Y-%m-%d')
+            if today != crawler.date:
+                # 先对前一天做最后一次轮询，收录零点前刚发布的新闻
+                crawler.poll()
+                crawler.set_date(today)
+            crawler.poll()
+        except Exception as e:
+            logger.error(f"Polling failed: {str(e)}")
+
+    logger.info(f"Daemon started, polling every {interval} seconds")
+    job()
+    schedule.every(interval).seconds.do(job)
+    try:
+        while True:
+            schedule.run_pending()
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Daemon stopped")
+    finally:
+        crawler.http.log_stats()
+
+def queue_worker(crawler_kwargs, queue_url):
+    """工作队列 worker 进程的入口"""
+    from ai_news_crawler import AiNewsCrawler
+    from utils import setup_logging
+    from work_queue import open_queue, queue_name
+
+    setup_logging()
+    crawler = AiNewsCrawler(**crawler_kwargs)
+    queue = open_queue(queue_name(crawler.from_date, crawler.date), queue_url)
+    try:
+        crawler.work(queue)
+    finally:
+        queue.close()
+        crawler.http.log_stats()
+
+def start_queue_workers(crawler_kwargs, queue_url, count):
+    """启动 count 个 worker 进程，返回进程列表"""
+    import multiprocessing
+
+    # 使用 spawn，子进程不继承当前进程的连接池和线程
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=queue_worker, args=(crawler_kwargs, queue_url)) for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+def run_queue(crawler_kwargs, args):
+    """分布式模式：--queue-role worker 只处理队列，否则作为协调进程并启动本机的 worker"""
+    from ai_news_crawler import AiNewsCrawler
+    from work_queue import open_queue, queue_name
+
+    if args.queue_role == 'worker':
+        if args.queue_workers <= 1:
+            queue_worker(crawler_kwargs, args.queue_url)
+            return
+        for process in start_queue_workers(crawler_kwargs, args.queue_url, args.queue_workers):
+            process.join()
+        return
+    crawler = AiNewsCrawler(**crawler_kwargs)
+    queue = open_queue(queue_name(crawler.from_date, crawler.date), args.queue_url)
+    try:
+        crawler.run_queue(queue, lambda: start_queue_workers(crawler_kwargs, args.queue_url, args.queue_workers),
+                          resume=args.resume)
+    finally:
+        queue.close()
 
 def main():
     # 设置命令行参数
     parser = argparse.ArgumentParser(description='AI News Crawler')
     parser.add_argument('--date', type=str, help='Date to crawl (yyyy-mm-dd)',
                        default=datetime.now().strftime('%Y-%m-%d'))
+    parser.add_argument('--fetch-mode', choices=FETCH_MODES, default=FETCH_MODE,
+                       help='Article fetch mode: serial or thread pool')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                       help='Maximum worker threads in thread mode')
+    parser.add_argument('--per-host', type=int, default=MAX_REQUESTS_PER_HOST,
+                       help='Maximum in-flight requests per host')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Bypass the on-disk HTTP response cache')
+    parser.add_argument('--prom-textfile', default=METRICS_PROMETHEUS_TEXTFILE,
+                       help='Write run metrics to this Prometheus textfile')
+    parser.add_argument('--from', dest='from_date', type=str,
+                       help='Backfill from this date (yyyy-mm-dd) up to --to')
+    parser.add_argument('--to', dest='to_date', type=str,
+                       help='Last date of the backfill range (defaults to --date)')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Keep running and poll the homepage and roll feed for new articles')
+    parser.add_argument('--interval', type=int, default=DAEMON_POLL_INTERVAL,
+                       help='Polling interval in seconds for --daemon')
+    parser.add_argument('--resume', action='store_true',
+                       help='Continue an interrupted crawl of the same date range from its checkpoint')
+    parser.add_argument('--queue-workers', type=int, default=0,
+                       help='Spread the crawl over this many worker processes through a shared work queue')
+    parser.add_argument('--queue-role', choices=['coordinator', 'worker'], default='coordinator',
+                       help='With a shared queue backend, run only a worker (e.g. on another machine)')
+    parser.add_argument('--queue-url', default=WORK_QUEUE_URL,
+                       help='Work queue backend: sqlite:///DIR or redis://HOST:PORT/DB')
     args = parser.parse_args()
+    if args.to_date and not args.from_date:
+        parser.error('--to requires --from')
+    end_date = args.to_date or args.date
+    if args.from_date and args.from_date > end_date:
+        parser.error('--from must not be later than --to')
+    if args.daemon and args.from_date:
+        parser.error('--daemon cannot be combined with --from/--to')
+    if args.daemon and args.resume:
+        parser.error('--daemon cannot be combined with --resume')
+    queue_mode = args.queue_workers > 0 or args.queue_role == 'worker'
+    if args.daemon and queue_mode:
+        parser.error('--daemon cannot be combined with the work queue mode')
+
+    from ai_news_crawler import AiNewsCrawler
+    from utils import setup_logging
 
     # 设置日志
     logger = setup_logging()
     
     try:
+        crawler_kwargs = dict(date=end_date, fetch_mode=args.fetch_mode,
+                              max_workers=args.workers,
+                              max_requests_per_host=args.per_host,
+                              use_cache=not args.no_cache,
+                              prometheus_textfile=args.prom_textfile,
+                              from_date=args.from_date)
+        if queue_mode:
+            run_queue(crawler_kwargs, args)
+            logger.info(f"Queue crawling completed for dates: {args.from_date or end_date} to {end_date}")
+            return
         # 初始化爬虫
-        crawler = AiNewsCrawler(args.date)
+        crawler = AiNewsCrawler(**crawler_kwargs)
+        if args.daemon:
+            run_daemon(crawler, args.interval, logger)
+            return
         # 开始爬取
-        crawler.run()
-        logger.info(f"Crawling completed for date: {args.date}")
+        crawler.run(resume=args.resume)
+        if args.from_date:
+            logger.info(f"Crawling completed for dates: {args.from_date} to {end_date}")
+        else:
+            logger.info(f"Crawling completed for date: {end_date}")
     except Exception as e:
         logger.error(f"Crawling failed: {str(e)}")
         raise
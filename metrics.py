@@ -0,0 +1,169 @@
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# 耗时直方图的桶上界（秒）
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# 爬虫记录耗时的阶段: listing_fetch（列表页请求）、detail_fetch（详情页请求）、
+# request_queue（请求前等待主机并发槽位和限速令牌，不计入以上两项）、
+# parse（解析与正文清理）、validation（数据校验，含关键词过滤）、keyword_filter（关键词过滤）、
+# near_dup（近似重复检查）、image_download（图片下载）、save（结果保存）、search_index（全文索引更新）
+
+
+class Histogram:
+    """累计型直方图（与 Prometheus 的 histogram 语义一致）"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def subtract(self, other: 'Histogram') -> 'Histogram':
+        result = Histogram(self.buckets)
+        result.counts = [a - b for a, b in zip(self.counts, other.counts)]
+        result.count = self.count - other.count
+        result.sum = self.sum - other.sum
+        return result
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶估算分位数（返回所在桶的上界，落在 +Inf 桶时返回None）"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': {str(bound): count for bound, count in zip(self.buckets + ('+Inf',), self.counts)},
+        }
+
+
+class Metrics:
+    """进程内的计数器和各阶段耗时直方图
+
+    计数器和直方图在进程内持续累计；run() 开始时记录快照，结束时
+    用 report(since=快照) 得到本次运行的增量。
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """记录代码块耗时到 stage 的直方图（异常退出也会记录）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self) -> 'Metrics':
+        with self._lock:
+            snapshot = Metrics()
+            snapshot.counters = dict(self.counters)
+            snapshot.histograms = copy.deepcopy(self.histograms)
+        return snapshot
+
+    def report(self, since: Optional['Metrics'] = None) -> Dict:
+        """返回计数器和直方图的汇总，指定 since 时只统计之后的增量"""
+        current = self.snapshot()
+        counters = current.counters
+        histograms = current.histograms
+        if since is not None:
+            counters = {name: value - since.counters.get(name, 0) for name, value in counters.items()}
+            histograms = {stage: (histogram.subtract(since.histograms[stage]) if stage in since.histograms
+                                  else histogram)
+                          for stage, histogram in histograms.items()}
+        return {
+            'counters': {name: round(value, 6) for name, value in sorted(counters.items())},
+            'stages': {stage: histogram.to_dict() for stage, histogram in sorted(histograms.items())},
+        }
+
+    def write_prometheus(self, path: str, prefix: str = 'ai_news_crawler'):
+        """写入 Prometheus node_exporter 的 textfile 格式（先写临时文件再替换）"""
+        current = self.snapshot()
+        lines = []
+        for name, value in sorted(current.counters.items()):
+            metric = f'{prefix}_{name}_total'
+            lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric} {value}')
+        if current.histograms:
+            metric = f'{prefix}_stage_duration_seconds'
+            lines.append(f'# HELP {metric} 各阶段耗时')
+            lines.append(f'# TYPE {metric} histogram')
+            for stage, histogram in sorted(current.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        tmp_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        os.replace(tmp_path, path)
+
+
+def write_run_report(report: Dict, report_dir: str) -> Path:
+    """将一次运行的报告写入 report_dir/run_<开始时间>[_<worker>].json"""
+    name = f"run_{report['started_at'].replace(':', '').replace('-', '')}"
+    if report.get('worker'):
+        name += f"_{report['worker']}"
+    path = Path(report_dir) / f"{name}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logging.getLogger(__name__).info(f"运行报告已写入 {path}")
+    return path
+
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """获取进程内共享的 Metrics"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
@@ -0,0 +1,197 @@
+import argparse
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import NEAR_DUP_INDEX_PATH, NEAR_DUP_MAX_DISTANCE, NEAR_DUP_SHINGLE
+from storage import NewsStore
+
+FINGERPRINT_BITS = 64
+_BANDS = 4
+_BAND_BITS = FINGERPRINT_BITS // _BANDS
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def fingerprint_text(news: Dict) -> str:
+    """用于计算指纹的文本：标题加正文（去掉HTML标签、空白和标点）"""
+    text = f"{news.get('title') or ''} {_TAG_RE.sub(' ', news.get('content') or '')}"
+    return _NON_WORD_RE.sub('', text).lower()
+
+
+def simhash(text: str, shingle: int = NEAR_DUP_SHINGLE) -> int:
+    """64位 SimHash：字符 n-gram 按出现次数加权
+
+    每个 n-gram 的哈希按字节累加到 8x256 的计数表，最后再按位汇总，
+    每个 n-gram 只需 8 次加法而不是 64 次。
+    """
+    if len(text) < shingle:
+        shingles = Counter([text])
+    else:
+        shingles = Counter(text[i:i + shingle] for i in range(len(text) - shingle + 1))
+    byte_weights = [[0] * 256 for _ in range(FINGERPRINT_BITS // 8)]
+    for gram, weight in shingles.items():
+        digest = hashlib.blake2b(gram.encode('utf-8'), digest_size=FINGERPRINT_BITS // 8).digest()
+        for position, value in enumerate(digest):
+            byte_weights[position][value] += weight
+    total = sum(shingles.values())
+    fingerprint = 0
+    for position, weights in enumerate(byte_weights):
+        for bit in range(8):
+            ones = sum(weight for value, weight in enumerate(weights) if value >> bit & 1)
+            if 2 * ones > total:
+                fingerprint |= 1 << (position * 8 + bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def _bands(fingerprint: int) -> List[int]:
+    mask = (1 << _BAND_BITS) - 1
+    return [(fingerprint >> (band * _BAND_BITS)) & mask for band in range(_BANDS)]
+
+
+class NearDuplicateIndex:
+    """跨日期的近似重复新闻索引
+
+    每篇新闻保存一个64位 SimHash 指纹。指纹按16位切成4段，分别建立索引；
+    海明距离不超过3的两个指纹至少有一段完全相同，因此查询只需4次索引查找，
+    再对少量候选计算海明距离。
+
+    本次运行中已接受但尚未保存的新闻先登记在内存中（reserve），
+    保存成功后再写入数据库（commit），运行中断时不会留下未保存新闻的指纹。
+    """
+
+    def __init__(self, path: str = NEAR_DUP_INDEX_PATH, max_distance: int = NEAR_DUP_MAX_DISTANCE):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.is_new = not self.path.exists()
+        # 分段索引只能保证找到距离小于段数的指纹
+        self.max_distance = min(max_distance, _BANDS - 1)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS fingerprints '
+                         '(id TEXT PRIMARY KEY, fingerprint BLOB, url TEXT, date TEXT) WITHOUT ROWID')
+        self._db.execute('CREATE TABLE IF NOT EXISTS bands '
+                         '(band INTEGER, value INTEGER, id TEXT, PRIMARY KEY (band, value, id)) WITHOUT ROWID')
+        self._db.commit()
+        self._pending: Dict[str, Tuple[int, str]] = {}  # _id -> (指纹, URL)
+
+    def _find_stored(self, fingerprint: int, news_id: str) -> Optional[Tuple[str, str, int]]:
+        for band, value in enumerate(_bands(fingerprint)):
+            rows = self._db.execute(
+                'SELECT f.id, f.url, f.fingerprint FROM bands b JOIN fingerprints f ON f.id = b.id '
+                'WHERE b.band = ? AND b.value = ?', (band, value)).fetchall()
+            for other_id, url, blob in rows:
+                distance = hamming_distance(fingerprint, int.from_bytes(blob, 'big'))
+                if other_id != news_id and distance <= self.max_distance:
+                    return other_id, url, distance
+        return None
+
+    def find(self, fingerprint: int, news_id: str = '') -> Optional[Tuple[str, str, int]]:
+        """查找近似重复的新闻，返回 (_id, url, 海明距离)，同一 _id 不算重复"""
+        with self._lock:
+            return self._find_locked(fingerprint, news_id)
+
+    def _find_locked(self, fingerprint: int, news_id: str) -> Optional[Tuple[str, str, int]]:
+        for other_id, (other, url) in self._pending.items():
+            distance = hamming_distance(fingerprint, other)
+            if other_id != news_id and distance <= self.max_distance:
+                return other_id, url, distance
+        return self._find_stored(fingerprint, news_id)
+
+    def check_and_reserve(self, news: Dict) -> Optional[Tuple[str, str, int]]:
+        """检查新闻是否与已有新闻近似重复；不重复时在内存中登记，返回None"""
+        fingerprint = simhash(fingerprint_text(news))
+        with self._lock:
+            match = self._find_locked(fingerprint, news['_id'])
+            if match is None:
+                self._pending[news['_id']] = (fingerprint, news['url'])
+        return match
+
+    def _insert(self, entries: Iterable[Tuple[str, int, str, str]]):
+        rows = list(entries)
+        self._db.executemany('INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?)',
+                             [(news_id, fingerprint.to_bytes(8, 'big'), url, date)
+                              for news_id, fingerprint, url, date in rows])
+        self._db.executemany('INSERT OR IGNORE INTO bands VALUES (?, ?, ?)',
+                             [(band, value, news_id) for news_id, fingerprint, _, _ in rows
+                              for band, value in enumerate(_bands(fingerprint))])
+        self._db.commit()
+
+    def commit(self, news_list: Iterable[Dict], date: str):
+        """新闻保存成功后，把它们的指纹写入数据库"""
+        with self._lock:
+            entries = []
+            for news in news_list:
+                pending = self._pending.pop(news['_id'], None)
+                fingerprint = pending[0] if pending else simhash(fingerprint_text(news))
+                entries.append((news['_id'], fingerprint, news['url'], date))
+            self._insert(entries)
+
+    def release(self, news_ids: Iterable[str]):
+        """撤销未保存的新闻在内存中的登记（被丢弃或保存失败时调用）"""
+        with self._lock:
+            for news_id in news_ids:
+                self._pending.pop(news_id, None)
+
+    def add_many(self, news_list: Iterable[Dict], date: str):
+        """直接登记已保存的新闻（重建索引时使用）"""
+        with self._lock:
+            self._insert((news['_id'], simhash(fingerprint_text(news)), news['url'], date)
+                         for news in news_list if news.get('_id'))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM fingerprints').fetchone()[0]
+
+    def rebuild(self, store_dir: Optional[str] = None) -> int:
+        """清空索引并从新闻存储重建，返回登记的条数"""
+        with self._lock:
+            self._db.execute('DELETE FROM fingerprints')
+            self._db.execute('DELETE FROM bands')
+            self._db.commit()
+        store = NewsStore(store_dir) if store_dir else NewsStore()
+        total = 0
+        for date in store.dates():
+            news_list = store.load(date)
+            self.add_many(news_list, date)
+            total += len(news_list)
+        self.logger.info(f"已重建近似重复索引，共 {total} 条")
+        return total
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Near-duplicate (SimHash) index maintenance')
+    parser.add_argument('--index', default=NEAR_DUP_INDEX_PATH, help='Index file path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('rebuild', help='Rebuild the index from the news store')
+    subparsers.add_parser('stats', help='Show the number of indexed articles')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = NearDuplicateIndex(args.index)
+    try:
+        if args.command == 'rebuild':
+            index.rebuild()
+        else:
+            print(f"已索引新闻数量: {index.count()}")
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
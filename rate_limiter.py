@@ -0,0 +1,240 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from config import (RATE_LIMIT_INITIAL_RPS, RATE_LIMIT_MIN_RPS, RATE_LIMIT_MAX_RPS, RATE_LIMIT_INCREASE_RPS,
+                    RATE_LIMIT_DECREASE_FACTOR, RATE_LIMIT_BURST, RATE_LIMIT_SLOW_LATENCY,
+                    RATE_LIMIT_MAX_RETRY_AFTER)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    from email.utils import parsedate_to_datetime  # 只有HTTP日期格式才需要
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class _HostBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate              # 当前允许的请求速率（次/秒）
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0      # Retry-After 要求的最早发送时间
+        self.throttled = 0
+        self.peak_rate = rate
+        self.last_decrease = 0.0
+
+
+class AdaptiveRateLimiter:
+    """按主机的令牌桶限速器，速率按 AIMD 自适应
+
+    每个主机一个令牌桶，acquire() 为请求预约一个令牌，令牌不足时在锁外等待。
+    请求成功且响应耗时正常时速率加性增加（约每秒增加 increase 次/秒），
+    遇到 429、503 或超时时速率乘性下降（同一秒内的多次限流只降一次），
+    并遵守 Retry-After 指定的等待时间，因此速率会稳定在主机能接受的最快速率附近。
+    """
+
+    def __init__(self, initial_rate: float = RATE_LIMIT_INITIAL_RPS,
+                 min_rate: float = RATE_LIMIT_MIN_RPS, max_rate: float = RATE_LIMIT_MAX_RPS,
+                 increase: float = RATE_LIMIT_INCREASE_RPS, decrease: float = RATE_LIMIT_DECREASE_FACTOR,
+                 burst: float = RATE_LIMIT_BURST, slow_latency: float = RATE_LIMIT_SLOW_LATENCY,
+                 max_retry_after: float = RATE_LIMIT_MAX_RETRY_AFTER):
+        self.logger = logging.getLogger(__name__)
+        self.min_rate = min_rate
+        self.max_rate = max(min_rate, max_rate)
+        self.initial_rate = min(max(initial_rate, self.min_rate), self.max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = max(1.0, burst)
+        self.slow_latency = slow_latency
+        self.max_retry_after = max_retry_after
+        self._buckets: Dict[str, _HostBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host: str) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _HostBucket(self.initial_rate, self.burst)
+        return bucket
+
+    def acquire(self, host: str) -> float:
+        """为一次请求预约令牌，必要时等待，返回等待的秒数"""
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            bucket.tokens -= 1
+            # 令牌为负表示已被之前的请求预约，按当前速率排队
+            wait = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+            wait = max(wait, bucket.blocked_until - now)
+        if wait > 0:
+            time.sleep(wait)
+        return max(0.0, wait)
+
+    def try_acquire(self, host: str) -> bool:
+        """有可用令牌且不在 Retry-After 暂停期内时取走一个令牌，否则不等待直接返回False"""
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+            bucket.updated = now
+            if bucket.tokens < 1 or bucket.blocked_until > now:
+                return False
+            bucket.tokens -= 1
+            return True
+
+    def on_success(self, host: str, latency: float):
+        """请求成功：响应耗时正常时加性增加速率"""
+        if latency > self.slow_latency:
+            return
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase / bucket.rate)
+            bucket.peak_rate = max(bucket.peak_rate, bucket.rate)
+
+    def on_throttle(self, host: str, reason: str, retry_after: Optional[float] = None):
+        """被限流（429/503）或超时：乘性降低速率，有 Retry-After 时暂停该主机"""
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            old_rate = bucket.rate
+            # 并发请求同时收到的限流响应属于同一次拥塞，只降一次速率
+            if now - bucket.last_decrease >= 1.0:
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                bucket.last_decrease = now
+            new_rate = bucket.rate
+            # 已预约的令牌按新速率重新排队
+            bucket.tokens = min(bucket.tokens, 0.0)
+            bucket.throttled += 1
+            if retry_after is not None:
+                retry_after = min(retry_after, self.max_retry_after)
+                bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+        message = f"主机 {host} {reason}，请求速率 {old_rate:.2f} -> {new_rate:.2f} 次/秒"
+        if retry_after is not None:
+            message += f"，按 Retry-After 暂停 {retry_after:.1f} 秒"
+        self.logger.warning(message)
+
+    def rate(self, host: str) -> float:
+        with self._lock:
+            return self._bucket(host).rate
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """返回每个主机的当前速率、峰值速率和被限流次数"""
+        with self._lock:
+            return {host: {'rate': round(bucket.rate, 3), 'peak_rate': round(bucket.peak_rate, 3),
+                           'throttled': bucket.throttled}
+                    for host, bucket in self._buckets.items()}
+
+    def log_stats(self):
+        for host, item in self.stats().items():
+            self.logger.info(f"请求速率 {host}: 当前 {item['rate']} 次/秒, 峰值 {item['peak_rate']} 次/秒, "
+                             f"被限流 {item['throttled']} 次")
+
+
+class SharedRateLimiter(AdaptiveRateLimiter):
+    """多个进程共享速率预算的限速器（分布式工作队列模式使用）
+
+    每个主机的速率、下一次可发送时间和 Retry-After 保存在工作队列的共享状态中，
+    通过 store.update_host() 原子更新，所有 worker 合计的请求速率不超过该主机
+    的速率；AIMD 调整与 AdaptiveRateLimiter 相同，任一 worker 被限流都会降低
+    全部 worker 的速率。时间使用墙上时钟，各进程之间可以比较。
+    """
+
+    def __init__(self, store, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+
+    @classmethod
+    def from_limiter(cls, limiter: AdaptiveRateLimiter, store) -> 'SharedRateLimiter':
+        """使用与 limiter 相同的参数"""
+        return cls(store, initial_rate=limiter.initial_rate, min_rate=limiter.min_rate, max_rate=limiter.max_rate,
+                   increase=limiter.increase, decrease=limiter.decrease, burst=limiter.burst,
+                   slow_latency=limiter.slow_latency, max_retry_after=limiter.max_retry_after)
+
+    def _state(self, state: Dict) -> Dict:
+        if 'rate' not in state:
+            state.update(rate=self.initial_rate, next_at=0.0, blocked_until=0.0, throttled=0,
+                         peak_rate=self.initial_rate, last_decrease=0.0)
+        return state
+
+    def acquire(self, host: str) -> float:
+        def reserve(state):
+            self._state(state)
+            now = time.time()
+            # 允许 burst 个请求的突发：发送时间最多可以落后当前时间 (burst-1)/rate
+            slot = max(state['next_at'], now - (self.burst - 1) / state['rate'], state['blocked_until'])
+            state['next_at'] = slot + 1 / state['rate']
+            return slot - now
+
+        wait = self.store.update_host(host, reserve)
+        if wait > 0:
+            time.sleep(wait)
+        return max(0.0, wait)
+
+    def try_acquire(self, host: str) -> bool:
+        def reserve(state):
+            self._state(state)
+            now = time.time()
+            slot = max(state['next_at'], now - (self.burst - 1) / state['rate'], state['blocked_until'])
+            if slot > now:
+                return False
+            state['next_at'] = slot + 1 / state['rate']
+            return True
+
+        return self.store.update_host(host, reserve)
+
+    def on_success(self, host: str, latency: float):
+        if latency > self.slow_latency:
+            return
+
+        def increase(state):
+            self._state(state)
+            state['rate'] = min(self.max_rate, state['rate'] + self.increase / state['rate'])
+            state['peak_rate'] = max(state['peak_rate'], state['rate'])
+
+        self.store.update_host(host, increase)
+
+    def on_throttle(self, host: str, reason: str, retry_after: Optional[float] = None):
+        if retry_after is not None:
+            retry_after = min(retry_after, self.max_retry_after)
+
+        def decrease(state):
+            self._state(state)
+            now = time.time()
+            old_rate = state['rate']
+            if now - state['last_decrease'] >= 1.0:
+                state['rate'] = max(self.min_rate, state['rate'] * self.decrease)
+                state['last_decrease'] = now
+            # 已预约的发送时间按新速率重新排队
+            state['next_at'] = max(state['next_at'], now + 1 / state['rate'])
+            state['throttled'] += 1
+            if retry_after is not None:
+                state['blocked_until'] = max(state['blocked_until'], now + retry_after)
+            return old_rate, state['rate']
+
+        old_rate, new_rate = self.store.update_host(host, decrease)
+        message = f"主机 {host} {reason}，共享请求速率 {old_rate:.2f} -> {new_rate:.2f} 次/秒"
+        if retry_after is not None:
+            message += f"，按 Retry-After 暂停 {retry_after:.1f} 秒"
+        self.logger.warning(message)
+
+    def rate(self, host: str) -> float:
+        return self.store.update_host(host, lambda state: self._state(state)['rate'])
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {host: {'rate': round(state['rate'], 3), 'peak_rate': round(state['peak_rate'], 3),
+                       'throttled': state['throttled']}
+                for host, state in self.store.host_states().items() if 'rate' in state}
@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from requests.exceptions import RequestException
+
+from config import (HEDGE_WINDOW, HEDGE_MIN_SAMPLES, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+
+
+class CircuitOpenError(RequestException):
+    """主机处于熔断状态，请求未发出"""
+    pass
+
+
+class LatencyTracker:
+    """按主机记录最近若干次请求的耗时，用于计算对冲请求的触发时间"""
+
+    def __init__(self, window: int = HEDGE_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, host: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(host)
+            if samples is None:
+                samples = self._samples[host] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, host: str, q: float) -> Optional[float]:
+        """返回主机最近耗时的 q 分位数，样本不足时返回None"""
+        with self._lock:
+            samples = sorted(self._samples.get(host, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+class _Circuit:
+    def __init__(self):
+        self.failures = 0             # 连续失败次数
+        self.opened_at: Optional[float] = None
+        self.probing = False          # 半开状态下是否已有试探请求
+        self.rejected = 0
+        self.opened = 0
+
+
+class CircuitBreaker:
+    """按主机的熔断器
+
+    连续失败 failure_threshold 次（连接错误、超时、5xx）后熔断，reset_timeout
+    秒内对该主机的请求直接抛出 CircuitOpenError；之后进入半开状态，只放行一个
+    试探请求，成功则恢复，失败则重新熔断。
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_TIMEOUT):
+        self.logger = logging.getLogger(__name__)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, host: str) -> _Circuit:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = _Circuit()
+        return circuit
+
+    def before_request(self, host: str) -> bool:
+        """请求前检查，主机处于熔断状态时抛出 CircuitOpenError
+
+        返回本次请求是否为半开状态下的试探请求；是试探请求时，调用方在请求结束后
+        （无论以何种方式结束）必须调用 end_probe()。
+        """
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.opened_at is None:
+                return False
+            if time.monotonic() - circuit.opened_at >= self.reset_timeout and not circuit.probing:
+                circuit.probing = True
+                return True
+            circuit.rejected += 1
+        raise CircuitOpenError(f"主机 {host} 已熔断，跳过请求")
+
+    def end_probe(self, host: str):
+        """试探请求结束；未记录成功或失败就结束时（如调用方抛出其他异常），允许下一个试探请求"""
+        with self._lock:
+            self._circuit(host).probing = False
+
+    def record_success(self, host: str):
+        with self._lock:
+            circuit = self._circuit(host)
+            recovered = circuit.opened_at is not None
+            circuit.failures = 0
+            circuit.opened_at = None
+            circuit.probing = False
+        if recovered:
+            self.logger.info(f"主机 {host} 已恢复，关闭熔断")
+
+    def record_failure(self, host: str):
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.opened_at is not None and not circuit.probing:
+                # 熔断前已发出的请求迟到的失败，不再延长熔断时间
+                return
+            circuit.failures += 1
+            if circuit.opened_at is None and circuit.failures < self.failure_threshold:
+                return
+            # 达到阈值，或半开状态下的试探请求失败
+            circuit.opened_at = time.monotonic()
+            circuit.probing = False
+            circuit.opened += 1
+            failures = circuit.failures
+        self.logger.warning(f"主机 {host} 连续失败 {failures} 次，熔断 {self.reset_timeout} 秒")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """返回熔断过或被拒绝过请求的主机统计"""
+        with self._lock:
+            return {host: {'open': circuit.opened_at is not None, 'opened': circuit.opened,
+                           'rejected': circuit.rejected}
+                    for host, circuit in self._circuits.items() if circuit.opened or circuit.rejected}
@@ -0,0 +1,322 @@
+import argparse
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import SEARCH_INDEX_PATH, SEARCH_TOKENIZER, STORE_DIR, JSON_OUTPUT_DIR
+from storage import NewsStore
+
+_TAG_RE = re.compile(r'<[^>]+>')
+# 连续的中日韩文字，或连续的字母数字
+_TOKEN_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]+|[0-9a-zA-Z]+')
+_CJK_RE = re.compile(r'[㐀-䶿一-鿿豈-﫿]')
+
+
+# 索引格式版本：2 起 ngram 分词在每段中文末尾额外写入最后一个字；
+# 3 起保存每篇新闻的词条，内容更新时删除旧词条
+INDEX_FORMAT = 3
+
+
+def ngram_tokens(text: str, query: bool = False) -> List[str]:
+    """中文按相邻两字切分，英文和数字按词切分并转为小写
+
+    建立索引时每段中文的最后一个字单独再写入一次，这样每个汉字都是某个词条的
+    开头，单字查询（前缀查询）也能找到只出现在末尾的字（如“华为”中的“为”）。
+    query 为 True 时查询词按原文顺序组成短语：中间各段同样写入末尾的单字，
+    与正文的词条位置保持一致（如“关键词49号”）；最后一段不写入，由前缀查询匹配。
+    """
+    tokens = []
+    runs = _TOKEN_RE.findall(text)
+    for position, run in enumerate(runs):
+        if _CJK_RE.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+                if not query or position < len(runs) - 1:
+                    tokens.append(run[-1])
+        else:
+            tokens.append(run.lower())
+    return tokens
+
+
+def jieba_tokens(text: str) -> List[str]:
+    """使用 jieba 分词（需要另外安装 jieba）"""
+    import jieba
+    return [token.lower() for token in jieba.cut_for_search(text) if _TOKEN_RE.match(token)]
+
+
+TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    'ngram': ngram_tokens,
+    'jieba': jieba_tokens,
+}
+# 查询词的分词器：ngram 不写入段末单字；jieba 与建立索引时切分方式相同，
+# 查询短语中各词条的相对位置才能与正文一致
+QUERY_TOKENIZERS: Dict[str, Callable[[str], List[str]]] = {
+    'ngram': lambda text: ngram_tokens(text, query=True),
+    'jieba': jieba_tokens,
+}
+
+
+def article_text(news: Dict) -> str:
+    """正文去掉HTML标签后的文本"""
+    return _TAG_RE.sub(' ', news.get('content') or '')
+
+
+class SearchIndex:
+    """新闻全文检索索引（SQLite FTS5 倒排索引）
+
+    标题和正文先由可替换的分词器切成词，以空格连接后写入 FTS5 表，
+    查询时用同一个分词器切分，每个查询词的切分结果作为一个短语匹配，
+    多个查询词之间为“与”关系，按 bm25 排序（标题权重更高）。
+    docs 表保存 _id、标题、日期和URL，查询结果无需读取JSON文件。
+
+    FTS5 表不保存原文（content=''），只有倒排索引。同一 _id 内容不变时跳过；
+    doc_terms 表保存每篇新闻写入的词条（压缩），内容变化时用 FTS5 的 delete
+    命令删除旧词条再写入新词条，索引不会随更新增长，bm25 统计也不含失效的行。
+    格式 3 之前建立的索引没有保存词条，其中更新过的新闻换用新的编号，旧词条
+    留在索引中，build --force 重建后清除。
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_PATH, tokenizer: str = SEARCH_TOKENIZER):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"不支持的分词器: {tokenizer}")
+        self.tokenizer = tokenizer
+        self.tokenize = TOKENIZERS[tokenizer]
+        self.tokenize_query = QUERY_TOKENIZERS[tokenizer]
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS docs '
+                         '(doc INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE, title TEXT, '
+                         'date TEXT, url TEXT, hash TEXT)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS docs_date ON docs (date)')
+        # 分词已在写入前完成，FTS5 只按空格切分
+        self._db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS terms USING fts5"
+                         "(title, body, content='', tokenize='unicode61 remove_diacritics 0')")
+        self._db.execute('CREATE TABLE IF NOT EXISTS doc_terms (doc INTEGER PRIMARY KEY, terms BLOB)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS sources (date TEXT PRIMARY KEY, path TEXT, size INTEGER, mtime_ns INTEGER)')
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'tokenizer'").fetchone()
+        if row is None:
+            self._db.execute("INSERT INTO meta VALUES ('tokenizer', ?)", (tokenizer,))
+        elif row[0] != tokenizer:
+            self._db.close()
+            raise ValueError(f"索引使用分词器 {row[0]} 建立，与当前的 {tokenizer} 不一致，"
+                             f"请删除 {self.path} 后重新构建")
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+        if row is None and self._db.execute('SELECT 1 FROM docs LIMIT 1').fetchone() is None:
+            self._set_format()
+        elif row is None or int(row[0]) < INDEX_FORMAT:
+            self.logger.warning("全文检索索引格式较旧（部分单字查询可能找不到结果，更新过的新闻会留下失效词条），"
+                                "请运行 python search_index.py build --force 重建")
+        self._db.commit()
+
+    def _set_format(self):
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('format', ?)", (str(INDEX_FORMAT),))
+
+    def _delete_terms(self, doc: int) -> bool:
+        """删除编号 doc 在倒排索引中的词条，没有保存词条（旧格式）时返回False"""
+        row = self._db.execute('SELECT terms FROM doc_terms WHERE doc = ?', (doc,)).fetchone()
+        if row is None:
+            return False
+        title, body = zlib.decompress(row[0]).decode('utf-8').split('\n', 1)
+        self._db.execute("INSERT INTO terms (terms, rowid, title, body) VALUES ('delete', ?, ?, ?)",
+                         (doc, title, body))
+        return True
+
+    def _upsert(self, news: Dict, date: str) -> bool:
+        content_hash = hashlib.md5(f"{news.get('title')}\n{news.get('content')}\n{date}\n{news.get('url')}"
+                                   .encode('utf-8')).hexdigest()
+        row = self._db.execute('SELECT doc, hash FROM docs WHERE id = ?', (news['_id'],)).fetchone()
+        doc = None
+        if row is not None:
+            if row[1] == content_hash:
+                return False
+            if self._delete_terms(row[0]):
+                doc = row[0]
+                self._db.execute('UPDATE docs SET title = ?, date = ?, url = ?, hash = ? WHERE doc = ?',
+                                 (news.get('title'), date, news.get('url'), content_hash, doc))
+            else:
+                # 旧格式的索引没有保存词条：换用新的编号，旧词条随之失效
+                self._db.execute('DELETE FROM docs WHERE doc = ?', (row[0],))
+        if doc is None:
+            doc = self._db.execute('INSERT INTO docs (id, title, date, url, hash) VALUES (?, ?, ?, ?, ?)',
+                                   (news['_id'], news.get('title'), date, news.get('url'), content_hash)).lastrowid
+        title = ' '.join(self.tokenize(news.get('title') or ''))
+        body = ' '.join(self.tokenize(article_text(news)))
+        self._db.execute('INSERT INTO terms (rowid, title, body) VALUES (?, ?, ?)', (doc, title, body))
+        # 词条中没有换行符，标题和正文的词条以换行分隔
+        self._db.execute('INSERT OR REPLACE INTO doc_terms VALUES (?, ?)',
+                         (doc, zlib.compress(f'{title}\n{body}'.encode('utf-8'))))
+        return True
+
+    def add_many(self, news_list: Iterable[Dict], date: str) -> int:
+        """写入或更新一批新闻（按 _id），返回实际写入的条数（内容未变的跳过）"""
+        count = 0
+        with self._lock:
+            for news in news_list:
+                if news.get('_id') and self._upsert(news, date):
+                    count += 1
+            self._db.commit()
+        return count
+
+    def _query_expression(self, query: str) -> Optional[str]:
+        phrases = []
+        for term in query.split():
+            tokens = self.tokenize_query(term)
+            if not tokens:
+                continue
+            phrase = '"' + ' '.join(token.replace('"', '""') for token in tokens) + '"'
+            if len(tokens[-1]) == 1 and _CJK_RE.match(tokens[-1]):
+                # 末尾的单个汉字是某个词条的开头（双字词或段末单字），用前缀查询
+                phrase += '*'
+            phrases.append(phrase)
+        return ' AND '.join(phrases) or None
+
+    def search(self, query: str, limit: int = 20, from_date: Optional[str] = None,
+               to_date: Optional[str] = None) -> List[Dict]:
+        """全文检索，返回 [{_id, title, date, url}]，按相关度排序"""
+        expression = self._query_expression(query)
+        if expression is None:
+            return []
+        sql = ('SELECT d.id, d.title, d.date, d.url FROM terms JOIN docs d ON d.doc = terms.rowid '
+               'WHERE terms MATCH ?')
+        params: List = [expression]
+        if from_date:
+            sql += ' AND d.date >= ?'
+            params.append(from_date)
+        if to_date:
+            sql += ' AND d.date <= ?'
+            params.append(to_date)
+        sql += ' ORDER BY bm25(terms, 10.0, 1.0), d.date DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [{'_id': news_id, 'title': title, 'date': date, 'url': url} for news_id, title, date, url in rows]
+
+    def _source_changed(self, date: str, path: Path) -> bool:
+        stat = path.stat()
+        with self._lock:
+            row = self._db.execute('SELECT path, size, mtime_ns FROM sources WHERE date = ?', (date,)).fetchone()
+        return row != (str(path), stat.st_size, stat.st_mtime_ns)
+
+    def _mark_source(self, date: str, path: Path):
+        stat = path.stat()
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)',
+                             (date, str(path), stat.st_size, stat.st_mtime_ns))
+            self._db.commit()
+
+    def build(self, store_dir: str = STORE_DIR, json_dir: str = JSON_OUTPUT_DIR, force: bool = False) -> int:
+        """从新闻存储和 json_dir 下的 sina_*.json 增量构建索引
+
+        每个日期记录来源文件的大小和修改时间，没有变化的日期跳过。
+        同一日期同时存在日志和JSON时以日志为准。返回本次写入的新闻数。
+        """
+        if force:
+            self.clear()
+        sources = {path.stem[len('sina_'):]: path for path in Path(json_dir).glob('sina_*.json')}
+        sources.update({path.stem[len('sina_'):]: path for path in Path(store_dir).glob('sina_*.jsonl')})
+        store = None
+        total = 0
+        for date, path in sorted(sources.items()):
+            if not force and not self._source_changed(date, path):
+                continue
+            if path.suffix == '.jsonl':
+                store = store or NewsStore(store_dir, json_dir)
+                news_list = store.load(date)
+            else:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        news_list = json.load(f)
+                except Exception as e:
+                    self.logger.error(f"读取JSON文件失败 {path}: {str(e)}")
+                    continue
+            total += self.add_many(news_list, date)
+            self._mark_source(date, path)
+            self.logger.info(f"已索引 {date} 的 {len(news_list)} 条新闻")
+        return total
+
+    def clear(self):
+        """清空索引（包括失效的词条）"""
+        with self._lock:
+            self._db.execute("INSERT INTO terms (terms) VALUES ('delete-all')")
+            self._db.execute('DELETE FROM docs')
+            self._db.execute('DELETE FROM doc_terms')
+            self._db.execute('DELETE FROM sources')
+            self._set_format()
+            self._db.commit()
+            self._db.execute('VACUUM')
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """返回进程内共享的全文检索索引"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Full-text search over saved news')
+    parser.add_argument('--index', default=SEARCH_INDEX_PATH, help='Index file path')
+    parser.add_argument('--tokenizer', choices=sorted(TOKENIZERS), default=SEARCH_TOKENIZER)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help='Index new or changed dates from the store and res/res')
+    build_parser.add_argument('--force', action='store_true', help='Rebuild the whole index')
+    query_parser = subparsers.add_parser('query', help='Search titles and contents')
+    query_parser.add_argument('terms', nargs='+', help='Terms that must all match')
+    query_parser.add_argument('--limit', type=int, default=20)
+    query_parser.add_argument('--from', dest='from_date', help='Earliest date (yyyy-mm-dd)')
+    query_parser.add_argument('--to', dest='to_date', help='Latest date (yyyy-mm-dd)')
+    query_parser.add_argument('--json', action='store_true', help='Print results as JSON lines')
+    subparsers.add_parser('stats', help='Show the number of indexed articles')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = SearchIndex(args.index, args.tokenizer)
+    try:
+        if args.command == 'build':
+            total = index.build(force=args.force)
+            print(f"本次索引 {total} 条新闻，共 {index.count()} 条")
+        elif args.command == 'query':
+            start = time.perf_counter()
+            results = index.search(' '.join(args.terms), args.limit, args.from_date, args.to_date)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for item in results:
+                if args.json:
+                    print(json.dumps(item, ensure_ascii=False))
+                else:
+                    print(f"{item['date']}  {item['_id']}  {item['title']}  {item['url']}")
+            logging.info(f"找到 {len(results)} 条结果，耗时 {elapsed_ms:.1f} 毫秒")
+        else:
+            print(f"已索引新闻数量: {index.count()}")
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from config import SEEN_INDEX_PATH, SEEN_INDEX_BLOOM, BLOOM_CAPACITY, BLOOM_ERROR_RATE, STORE_DIR, JSON_OUTPUT_DIR
+from storage import NewsStore
+
+
+def url_key(url: str) -> bytes:
+    """URL的索引键，与新闻 _id（URL的MD5）一致"""
+    return hashlib.md5(url.encode()).digest()
+
+
+class BloomFilter:
+    """简单的布隆过滤器，位数组可保存到磁盘
+
+    generation 记录过滤器包含到数据库的哪一次写入，与数据库不一致时需要重建。
+    """
+
+    MAGIC = b'BLM2'
+
+    def __init__(self, capacity: int = BLOOM_CAPACITY, error_rate: float = BLOOM_ERROR_RATE):
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.generation = 0
+
+    def _positions(self, key: bytes):
+        # 双重哈希：由16字节摘要的两半生成 k 个位置
+        h1 = int.from_bytes(key[:8], 'little')
+        h2 = int.from_bytes(key[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: bytes):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def save(self, path: Path):
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(self.MAGIC)
+            f.write(self.generation.to_bytes(8, 'little'))
+            f.write(self.num_bits.to_bytes(8, 'little'))
+            f.write(self.num_hashes.to_bytes(4, 'little'))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['BloomFilter']:
+        """读取保存的过滤器；文件不存在、格式不对（包括旧版本没有 generation 的文件）时返回None"""
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        if not data.startswith(cls.MAGIC):
+            return None
+        data = data[len(cls.MAGIC):]
+        bloom = cls.__new__(cls)
+        bloom.generation = int.from_bytes(data[:8], 'little')
+        bloom.num_bits = int.from_bytes(data[8:16], 'little')
+        bloom.num_hashes = int.from_bytes(data[16:20], 'little')
+        bloom.bits = bytearray(data[20:])
+        if len(bloom.bits) != (bloom.num_bits + 7) // 8:
+            return None
+        return bloom
+
+
+class SeenIndex:
+    """跨日期的已抓取URL索引
+
+    以URL的MD5（即新闻 _id）作为16字节主键保存在 SQLite 中，查询为
+    主键查找；可选的布隆过滤器放在前面，绝大多数未见过的URL无需访问数据库。
+
+    每次写入数据库时在同一个事务中把 generation 加一，布隆过滤器文件头记录它
+    包含到的 generation。过滤器只在 flush()/close() 时落盘，进程在两次落盘之间
+    退出（或其他进程写入了数据库）时两者不一致，下次打开时从数据库重建过滤器，
+    不会出现漏判。
+    """
+
+    def __init__(self, path: str = SEEN_INDEX_PATH, use_bloom: bool = SEEN_INDEX_BLOOM):
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.is_new = not self.path.exists()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS seen (id BLOB PRIMARY KEY, date TEXT) WITHOUT ROWID')
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+        self._db.commit()
+        self.bloom_path = self.path.with_suffix('.bloom')
+        self.bloom = None
+        self._bloom_dirty = False
+        if use_bloom:
+            self.bloom = BloomFilter.load(self.bloom_path)
+            if self.bloom is None or self.bloom.generation != self._generation():
+                if self.bloom is not None:
+                    self.logger.info("布隆过滤器与URL索引不一致，从索引重建")
+                self._rebuild_bloom()
+
+    def _generation(self) -> int:
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def _bump_generation(self) -> int:
+        """在当前写事务中把 generation 加一，返回加一之前的值"""
+        before = self._generation()
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)", (before + 1,))
+        return before
+
+    def _rebuild_bloom(self):
+        self.bloom = BloomFilter()
+        # 先读 generation：扫描期间其他进程写入时，过滤器会在下次打开时再次重建
+        self.bloom.generation = self._generation()
+        for (key,) in self._db.execute('SELECT id FROM seen'):
+            self.bloom.add(key)
+        self._bloom_dirty = True
+
+    def contains_id(self, key: bytes) -> bool:
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        with self._lock:
+            row = self._db.execute('SELECT 1 FROM seen WHERE id = ?', (key,)).fetchone()
+        return row is not None
+
+    def contains(self, url: str) -> bool:
+        """URL是否已经被抓取并保存过"""
+        return self.contains_id(url_key(url))
+
+    def contains_news_id(self, news_id: str) -> bool:
+        """按新闻 _id（十六进制MD5）查询"""
+        return self.contains_id(bytes.fromhex(news_id))
+
+    def _insert(self, entries: Iterable[Tuple[str, str]]):
+        rows = [(url_key(url), date) for url, date in entries]
+        with self._lock:
+            self._db.executemany('INSERT OR REPLACE INTO seen VALUES (?, ?)', rows)
+            # 写事务已开始，读取和加一之间其他进程不能提交
+            before = self._bump_generation()
+            self._db.commit()
+            if self.bloom is not None:
+                for key, _ in rows:
+                    self.bloom.add(key)
+                # 其他进程在这之前写入过时，过滤器不完整，保留旧的 generation
+                if self.bloom.generation == before:
+                    self.bloom.generation = before + 1
+                self._bloom_dirty = True
+
+    def flush(self):
+        """把布隆过滤器写入磁盘（每次运行结束时调用一次，不必每次写入都保存）"""
+        with self._lock:
+            if self.bloom is not None and self._bloom_dirty:
+                self.bloom.save(self.bloom_path)
+                self._bloom_dirty = False
+
+    def add_many(self, entries: Iterable[Tuple[str, str]]):
+        """批量登记 (url, date)"""
+        self._insert(entries)
+
+    def add(self, url: str, date: str):
+        self.add_many([(url, date)])
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+    def rebuild(self, res_dir: str = JSON_OUTPUT_DIR, store_dir: str = STORE_DIR) -> int:
+        """清空索引并从 store_dir 下的新闻存储和 res_dir 下的 sina_*.json 文件重建，返回登记的条数"""
+        with self._lock:
+            self._db.execute('DELETE FROM seen')
+            self._bump_generation()
+            self._db.commit()
+            if self.bloom is not None:
+                self.bloom = BloomFilter()
+                self.bloom.generation = self._generation()
+        total = 0
+        store = NewsStore(store_dir, res_dir)
+        store_dates = set(store.dates())
+        for date in sorted(store_dates):
+            urls = store.urls(date)
+            self._insert((url, date) for url in urls)
+            total += len(urls)
+        for json_path in sorted(Path(res_dir).glob('sina_*.json')):
+            date = json_path.stem[len('sina_'):]
+            if date in store_dates:
+                continue
+            try:
+                with open(json_path, 'r', encoding='utf-8') as f:
+                    news_list = json.load(f)
+            except Exception as e:
+                self.logger.error(f"读取JSON文件失败 {json_path}: {str(e)}")
+                continue
+            self._insert((news['url'], date) for news in news_list if news.get('url'))
+            total += len(news_list)
+        self.flush()
+        self.logger.info(f"已从 {store_dir} 和 {res_dir} 重建URL索引，共 {total} 条")
+        return total
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seen-URL index maintenance')
+    parser.add_argument('--index', default=SEEN_INDEX_PATH, help='Index file path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subparsers.add_parser('rebuild', help='Rebuild the index from the news store and JSON results')
+    rebuild_parser.add_argument('--res-dir', default=JSON_OUTPUT_DIR, help='Directory of sina_*.json files')
+    rebuild_parser.add_argument('--store', default=STORE_DIR, help='News store directory')
+    subparsers.add_parser('stats', help='Show the number of indexed URLs')
+    check_parser = subparsers.add_parser('check', help='Check whether URLs are indexed')
+    check_parser.add_argument('urls', nargs='+')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    index = SeenIndex(args.index)
+    try:
+        if args.command == 'rebuild':
+            index.rebuild(args.res_dir, args.store)
+        elif args.command == 'stats':
+            print(f"已索引URL数量: {index.count()}")
+        else:
+            for url in args.urls:
+                print(f"{'seen' if index.contains(url) else 'new '}  {url}")
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
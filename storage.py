@@ -0,0 +1,410 @@
+import argparse
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import STORE_DIR, JSON_OUTPUT_DIR, CONTENT_STORE_ENABLED
+from content_store import ContentStore, LazyNews, content_hash
+
+
+def _fsync_write(path: Path, data: bytes, mode: str = 'ab'):
+    with open(path, mode) as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _externalize(news: Dict, digest: str) -> Dict:
+    """把记录中的正文替换为 contentHash（保持字段顺序）"""
+    return {('contentHash' if key == 'content' else key): (digest if key == 'content' else value)
+            for key, value in news.items()}
+
+
+class DateLog:
+    """单个日期的追加写日志
+
+    sina_{date}.jsonl 每行一条新闻记录，只追加不改写；同一URL以最后一条为准。
+    sina_{date}.idx 为旁路索引，每行 "偏移\\t长度\\tURL"，启动时只读索引即可
+    得到全部URL及其位置，无需解析正文。进程在写入中途退出时，日志末尾不完整的
+    记录会在下次打开时被截掉，索引缺失的部分会从日志尾部补齐。
+
+    追加、截尾、压缩和加载索引都持有 sina_{date}.lock 上的文件锁，多个进程可以
+    同时使用同一日期；日志的 inode 或大小与本进程记录的不一致时（其他进程追加或
+    压缩过），读写前重新加载索引。
+    """
+
+    def __init__(self, store_dir: Path, date: str):
+        self.logger = logging.getLogger(__name__)
+        self.date = date
+        self.log_path = store_dir / f'sina_{date}.jsonl'
+        self.idx_path = store_dir / f'sina_{date}.idx'
+        self.lock_path = store_dir / f'sina_{date}.lock'
+        # URL -> (偏移, 长度)，保持URL第一次出现的顺序
+        self.index: Dict[str, Tuple[int, int]] = {}
+        self._stat = (0, 0)  # 索引对应的日志 (inode, 大小)
+        self.lock = threading.Lock()  # 同一日期的写入串行，不同日期可并行
+        with self._file_lock():
+            self._load_index()
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程互斥（锁文件不会被压缩替换，锁住的始终是同一个文件）"""
+        with open(self.lock_path, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _log_stat(self) -> Tuple[int, int]:
+        try:
+            stat = self.log_path.stat()
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_ino, stat.st_size
+
+    def _refresh(self):
+        """持有文件锁时调用：日志已被其他进程追加或替换时重新加载索引"""
+        if self._log_stat() != self._stat:
+            self.index = {}
+            self._load_index()
+
+    def _load_index(self):
+        # 持有文件锁，没有进行中的追加，此时的大小即日志的实际大小
+        log_size = self._log_stat()[1]
+        indexed_end = 0
+        if self.idx_path.exists():
+            with open(self.idx_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip('\n').split('\t', 2)
+                    if len(parts) != 3 or not line.endswith('\n'):
+                        break
+                    offset, length = int(parts[0]), int(parts[1])
+                    if offset + length > log_size:
+                        break
+                    self.index[parts[2]] = (offset, length)
+                    indexed_end = max(indexed_end, offset + length)
+        if indexed_end < log_size:
+            self._recover_tail(indexed_end)
+        self._stat = self._log_stat()
+
+    def _recover_tail(self, start: int):
+        """从 start 开始扫描日志，补齐索引并截掉不完整的尾部记录"""
+        recovered = []
+        good_end = start
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    url = json.loads(line)['url']
+                except (ValueError, KeyError, TypeError):
+                    break
+                recovered.append((offset, len(line), url))
+                offset += len(line)
+                good_end = offset
+        if good_end < self.log_path.stat().st_size:
+            self.logger.warning(f"截掉日志 {self.log_path} 末尾不完整的记录")
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(good_end)
+        if recovered:
+            for offset, length, url in recovered:
+                self.index[url] = (offset, length)
+            self._append_index(recovered)
+
+    def _append_index(self, entries: Iterable[Tuple[int, int, str]]):
+        data = ''.join(f'{offset}\t{length}\t{url}\n' for offset, length, url in entries)
+        _fsync_write(self.idx_path, data.encode('utf-8'))
+
+    def append(self, news_list: List[Dict]):
+        """追加一批记录；整批数据一次写入并落盘
+
+        偏移取自持有文件锁时写入后的实际位置，多个进程同时追加同一日期时索引也不会错位。
+        """
+        if not news_list:
+            return
+        lines = [(json.dumps(news, ensure_ascii=False) + '\n').encode('utf-8') for news in news_list]
+        with self._file_lock():
+            self._refresh()
+            data = b''.join(lines)
+            with open(self.log_path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                offset = f.tell() - len(data)
+            entries = []
+            for news, line in zip(news_list, lines):
+                entries.append((offset, len(line), news['url']))
+                offset += len(line)
+            # 索引在锁内追加，保证与日志写入顺序一致
+            self._append_index(entries)
+            for start, length, url in entries:
+                self.index[url] = (start, length)
+            self._stat = self._log_stat()
+
+    def urls(self) -> List[str]:
+        with self._file_lock():
+            self._refresh()
+        return list(self.index)
+
+    def read(self, url: str) -> Optional[Dict]:
+        with self._file_lock():
+            self._refresh()
+        position = self.index.get(url)
+        if position is None:
+            return None
+        with open(self.log_path, 'rb') as f:
+            f.seek(position[0])
+            return json.loads(f.read(position[1]))
+
+    def iter_records(self, since: int = 0) -> Iterable[Dict]:
+        """按URL第一次出现的顺序返回每个URL的最新记录
+
+        since 大于0时只返回最新记录位于日志该偏移之后（即之后写入）的URL。
+        """
+        with self._file_lock():
+            self._refresh()
+            if not self.index:
+                return
+            # 在锁内取位置并打开：之后即使日志被压缩替换，读到的仍是与位置对应的旧文件
+            positions = list(self.index.values())
+            f = open(self.log_path, 'rb')
+        with f:
+            for offset, length in positions:
+                if offset < since:
+                    continue
+                f.seek(offset)
+                yield json.loads(f.read(length))
+
+    def compact(self, rewrite: Optional[Callable[[Dict], Dict]] = None) -> int:
+        """重写日志，只保留每个URL的最新记录，返回节省的字节数
+
+        rewrite 不为None时每条记录经它转换后再写入。持有文件锁进行，其他进程中打开的
+        DateLog 发现 inode 变化后会重新加载索引。
+        """
+        with self._file_lock():
+            self._refresh()
+            if not self.log_path.exists():
+                return 0
+            before = self.log_path.stat().st_size
+            tmp_log = self.log_path.with_suffix('.jsonl.tmp')
+            tmp_idx = self.idx_path.with_suffix('.idx.tmp')
+            new_index = {}
+            offset = 0
+            with open(tmp_log, 'wb') as out, open(self.log_path, 'rb') as f:
+                for url, (start, length) in self.index.items():
+                    f.seek(start)
+                    line = f.read(length)
+                    if rewrite is not None:
+                        line = (json.dumps(rewrite(json.loads(line)), ensure_ascii=False) + '\n').encode('utf-8')
+                    out.write(line)
+                    new_index[url] = (offset, len(line))
+                    offset += len(line)
+                out.flush()
+                os.fsync(out.fileno())
+            with open(tmp_idx, 'w', encoding='utf-8') as out:
+                out.write(''.join(f'{start}\t{length}\t{url}\n' for url, (start, length) in new_index.items()))
+                out.flush()
+                os.fsync(out.fileno())
+            # 先删除旧索引再替换日志：中途退出时索引缺失，下次打开会从头扫描日志重建
+            if self.idx_path.exists():
+                os.remove(self.idx_path)
+            os.replace(tmp_log, self.log_path)
+            os.replace(tmp_idx, self.idx_path)
+            self.index = new_index
+            self._stat = self._log_stat()
+            return before - offset
+
+
+class NewsStore:
+    """按日期存放新闻的追加写存储，可按需导出为合并后的JSON数组
+
+    每个日期的日志各有一把锁，不同日期的保存和导出可以并行进行。
+
+    separate_content 为 True 时正文压缩后保存在 content/ 下的正文存储中，日志里
+    只保留元数据和 contentHash，只读元数据时不需要解析正文；读取时默认补回正文，
+    load(date, lazy=True) 返回按需加载正文的 LazyNews。旧日志中内嵌的正文仍可
+    直接读取，compact 时会移入正文存储。
+    """
+
+    def __init__(self, store_dir: str = STORE_DIR, json_dir: str = JSON_OUTPUT_DIR,
+                 separate_content: bool = CONTENT_STORE_ENABLED):
+        self.logger = logging.getLogger(__name__)
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.json_dir = Path(json_dir)
+        content_dir = self.store_dir / 'content'
+        self.separate_content = separate_content
+        # 关闭后已移出的正文仍需读取
+        self.content = ContentStore(str(content_dir)) if separate_content or content_dir.exists() else None
+        self._logs: Dict[str, DateLog] = {}
+        self._lock = threading.Lock()
+
+    def json_path(self, date: str) -> Path:
+        return self.json_dir / f'sina_{date}.json'
+
+    def _log(self, date: str) -> DateLog:
+        with self._lock:
+            log = self._logs.get(date)
+            if log is not None:
+                return log
+            log = self._logs[date] = DateLog(self.store_dir, date)
+            # 导入旧文件完成前持有该日期的锁，其他线程拿到日志后会等待导入结束
+            log.lock.acquire()
+        try:
+            if not log.index:
+                self._import_legacy_json(log)
+        finally:
+            log.lock.release()
+        return log
+
+    def _import_legacy_json(self, log: DateLog):
+        """首次使用某日期时，导入已有的 sina_{date}.json 作为初始记录"""
+        json_path = self.json_path(log.date)
+        if not json_path.exists():
+            return
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                existing_news = json.load(f)
+        except Exception as e:
+            self.logger.error(f"读取现有JSON文件失败: {str(e)}")
+            return
+        log.append([news for news in existing_news if news.get('url')])
+        self.logger.info(f"已导入现有文件 {json_path} 中的 {len(existing_news)} 条新闻")
+
+    def dates(self) -> List[str]:
+        """存储中已有的全部日期"""
+        return sorted(path.stem[len('sina_'):] for path in self.store_dir.glob('sina_*.jsonl'))
+
+    def append(self, news_list: List[Dict], date: str):
+        if self.separate_content:
+            news_list = self._store_content(news_list)
+        log = self._log(date)
+        with log.lock:
+            log.append(news_list)
+
+    def _store_content(self, news_list: List[Dict]) -> List[Dict]:
+        """正文写入正文存储，返回日志中保存的记录（不修改传入的新闻）"""
+        inline = [news for news in news_list if isinstance(news.get('content'), str)]
+        hashes = self.content.put_many((news.get('_id') or news['url'], news['content']) for news in inline)
+        return [_externalize(news, hashes[news.get('_id') or news['url']])
+                if isinstance(news.get('content'), str) else news for news in news_list]
+
+    def _hydrate(self, record: Dict, lazy: bool = False) -> Dict:
+        """补回正文存储中的正文"""
+        digest = record.get('contentHash')
+        if digest is None or self.content is None:
+            return record
+        if lazy:
+            return LazyNews({key: value for key, value in record.items() if key != 'contentHash'},
+                            digest, self.content.get)
+        content = self.content.get(digest)
+        return {('content' if key == 'contentHash' else key): (content if key == 'contentHash' else value)
+                for key, value in record.items()}
+
+    def content_of(self, news_id: str) -> Optional[str]:
+        """按 _id 读取正文（只查正文存储，不扫描日志）"""
+        return self.content.get_by_id(news_id) if self.content else None
+
+    def urls(self, date: str) -> List[str]:
+        log = self._log(date)
+        with log.lock:
+            return log.urls()
+
+    def load(self, date: str, lazy: bool = False) -> List[Dict]:
+        """返回某日期合并后的新闻列表（与原 save_to_json 的合并结果一致）
+
+        lazy 为 True 时正文在第一次访问 content 时才读取。
+        """
+        log = self._log(date)
+        with log.lock:
+            return [self._hydrate(record, lazy) for record in log.iter_records()]
+
+    def load_since(self, date: str, since: int = 0,
+                   lazy: bool = False) -> Tuple[List[Dict], Tuple[int, int]]:
+        """返回日志偏移 since 之后写入的最新记录，以及日志当前的 (inode, 大小)
+
+        压缩会替换日志文件，inode 变化或大小变小时调用方应从头读取。
+        """
+        log = self._log(date)
+        with log.lock:
+            if not log.log_path.exists():
+                return [], (0, 0)
+            stat = log.log_path.stat()
+            return [self._hydrate(record, lazy) for record in log.iter_records(since)], (stat.st_ino, stat.st_size)
+
+    def compact(self, date: str) -> int:
+        log = self._log(date)
+        with log.lock:
+            rewrite = None
+            if self.separate_content:
+                inline = [news for news in log.iter_records() if isinstance(news.get('content'), str)]
+                if inline:
+                    # 正文先落盘，再重写日志
+                    self._store_content(inline)
+                    rewrite = self._externalize_inline
+            saved = log.compact(rewrite)
+        self.logger.info(f"已压缩 {date} 的日志，减少 {saved} 字节")
+        return saved
+
+    @staticmethod
+    def _externalize_inline(news: Dict) -> Dict:
+        if not isinstance(news.get('content'), str):
+            return news
+        return _externalize(news, content_hash(news['content']))
+
+    def export_json(self, date: str, force: bool = False) -> Optional[Path]:
+        """将合并结果写成 sina_{date}.json（先写临时文件再替换），日志未变化时跳过"""
+        log = self._log(date)
+        with log.lock:
+            if not log.log_path.exists():
+                return None
+            output_path = self.json_path(date)
+            if (not force and output_path.exists()
+                    and output_path.stat().st_mtime >= log.log_path.stat().st_mtime):
+                return output_path
+            self.json_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = output_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump([self._hydrate(record) for record in log.iter_records()], f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, output_path)
+        self.logger.info(f"已导出 {output_path}")
+        return output_path
+
+    def export_all(self, force: bool = False) -> List[Path]:
+        """导出所有日志有更新的日期"""
+        return [path for path in (self.export_json(date, force) for date in self.dates()) if path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Append-only news store maintenance')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help='Write merged sina_{date}.json files')
+    export_parser.add_argument('--date', help='Only export this date (yyyy-mm-dd)')
+    export_parser.add_argument('--force', action='store_true', help='Rewrite even if up to date')
+    compact_parser = subparsers.add_parser('compact', help='Drop superseded records and move inline contents '
+                                                           'to the content store')
+    compact_parser.add_argument('--date', help='Only compact this date (yyyy-mm-dd)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = NewsStore()
+    dates = [args.date] if args.date else store.dates()
+    for date in dates:
+        if args.command == 'export':
+            store.export_json(date, force=args.force)
+        else:
+            store.compact(date)
+
+
+if __name__ == '__main__':
+    main()
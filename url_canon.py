@@ -0,0 +1,150 @@
+import argparse
+import fnmatch
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from config import URL_HOST_ALIASES, URL_PATH_REWRITES, URL_TRACKING_PARAMS, URL_FORCE_HTTPS, URL_REDIRECTS_PATH
+
+# 列表页中相对链接的基准URL
+DEFAULT_BASE = 'https://tech.sina.com.cn/'
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+_PATH_REWRITES = [(re.compile(pattern), replacement) for pattern, replacement in URL_PATH_REWRITES]
+# 重定向链最多跟随的次数，防止记录中出现环
+_MAX_REDIRECT_HOPS = 5
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in URL_TRACKING_PARAMS)
+
+
+def canonicalize_url(link: str, base: str = DEFAULT_BASE) -> str:
+    """把列表页中的链接规范化为唯一的URL
+
+    补全相对链接和协议相对链接，scheme 统一为 https（URL_FORCE_HTTPS），主机名转为
+    小写并按 URL_HOST_ALIASES 把手机版等别名换成PC版主机，去掉默认端口、重复的
+    斜杠和片段（#...），按 URL_PATH_REWRITES 改写路径（如手机版文章页
+    detail-xxx.d.html -> doc-xxx.shtml），删除跟踪参数（URL_TRACKING_PARAMS）
+    并按参数名排序其余查询参数。非 http(s) 链接原样返回。
+    """
+    link = link.strip()
+    if not link:
+        return ''
+    url = urljoin(base, link)
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return url
+    try:
+        port = parts.port
+    except ValueError:
+        return url
+    host = parts.hostname.rstrip('.')
+    host = URL_HOST_ALIASES.get(host, host)
+    if URL_FORCE_HTTPS:
+        scheme = 'https'
+    netloc = host if port is None or port == _DEFAULT_PORTS.get(parts.scheme.lower()) else f'{host}:{port}'
+
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    for pattern, replacement in _PATH_REWRITES:
+        path = pattern.sub(replacement, path)
+
+    query = ''
+    if parts.query:
+        params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                  if not _is_tracking_param(name)]
+        query = urlencode(sorted(params))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+class UrlCanonicalizer:
+    """规范化链接，并记住已知的重定向
+
+    重定向的来源和目标都按规范化后的URL保存在 SQLite 中（跨运行、跨进程共享），
+    之后列表页上再出现来源URL时直接换成目标URL，已抓取过的目标不会再被请求。
+    """
+
+    def __init__(self, redirects_path: Optional[str] = URL_REDIRECTS_PATH, base: str = DEFAULT_BASE):
+        self.logger = logging.getLogger(__name__)
+        self.base = base
+        self._lock = threading.Lock()
+        self._redirects: Dict[str, str] = {}
+        self._db = None
+        if redirects_path:
+            Path(redirects_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(redirects_path, check_same_thread=False, timeout=30)
+            self._db.execute('CREATE TABLE IF NOT EXISTS redirects (source TEXT PRIMARY KEY, target TEXT) WITHOUT ROWID')
+            self._db.commit()
+            self._redirects = dict(self._db.execute('SELECT source, target FROM redirects'))
+
+    def resolve(self, link: str) -> Tuple[str, bool]:
+        """规范化链接，已知会重定向的URL换成最终的目标URL，返回 (URL, 是否按重定向改写)"""
+        url = canonicalize_url(link, self.base)
+        source = url
+        with self._lock:
+            for _ in range(_MAX_REDIRECT_HOPS):
+                target = self._redirects.get(url)
+                if target is None:
+                    break
+                url = target
+        return url, url != source
+
+    def canonical(self, link: str) -> str:
+        return self.resolve(link)[0]
+
+    def record_redirect(self, source: str, target: str) -> str:
+        """记录 source 重定向到 target，返回规范化后的目标URL"""
+        source = canonicalize_url(source, self.base)
+        target = canonicalize_url(target, self.base)
+        if source == target:
+            return target
+        with self._lock:
+            if self._redirects.get(source) == target:
+                return target
+            self._redirects[source] = target
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO redirects VALUES (?, ?)', (source, target))
+                self._db.commit()
+        self.logger.info(f"记录重定向: {source} -> {target}")
+        return target
+
+    def redirects(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._redirects)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='URL canonicalisation and known redirects')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    canonical_parser = subparsers.add_parser('canonical', help='Print the canonical form of URLs')
+    canonical_parser.add_argument('urls', nargs='+')
+    subparsers.add_parser('redirects', help='List the recorded redirects')
+    args = parser.parse_args()
+
+    canonicalizer = UrlCanonicalizer()
+    try:
+        if args.command == 'canonical':
+            for url in args.urls:
+                print(canonicalizer.canonical(url))
+        else:
+            redirects = canonicalizer.redirects()
+            for source, target in sorted(redirects.items()):
+                print(f"{source} -> {target}")
+            print(f"共 {len(redirects)} 条重定向")
+    finally:
+        canonicalizer.close()
+
+
+if __name__ == '__main__':
+    main()
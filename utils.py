@@ -1,15 +1,17 @@
 import os
 import logging
-import json
-import requests
 import hashlib
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict
-from requests.exceptions import RequestException, Timeout
-import csv
-import pandas as pd
-from bs4 import BeautifulSoup
+from typing import Optional
+from image_store import ImageStore, get_image_store, image_extension, normalize_image_url
+from storage import NewsStore
+from metrics import get_metrics
+from config import STORE_EXPORT_ON_SAVE, SEARCH_INDEX_ENABLED, PARQUET_EXPORT_ON_SAVE
+
+_store = None
+_store_lock = threading.Lock()
 
 def setup_logging():
     """设置日志配置"""
@@ -33,6 +35,9 @@ def download_image(url: str, date: str, retries: int = 3) -> Optional[str]:
     """
     下载图片并返回本地路径
     
+    图片保存在共享图片存储中，images/{date}/ 下的文件是指向共享对象的硬链接，
+    同一URL或相同内容的图片只下载、保存一次。
+    
     Args:
         url: 图片URL
         date: 日期字符串(yyyy-mm-dd)
@@ -44,203 +49,98 @@ def download_image(url: str, date: str, retries: int = 3) -> Optional[str]:
     logger = logging.getLogger(__name__)
     
     try:
-        # 验证URL格式
-        if not url.startswith(('http://', 'https://')):
-            logger.error(f"Invalid image URL format: {url}")
-            return None
-            
-        # 创建图片保存目录
-        image_dir = Path("images") / date
-        image_dir.mkdir(parents=True, exist_ok=True)
-        
         # 生成唯一文件名
         url_hash = hashlib.md5(url.encode()).hexdigest()
-        file_extension = _get_file_extension(url)
-        file_name = f"{url_hash}{file_extension}"
-        file_path = image_dir / file_name
+        file_path = Path("images") / date / f"{url_hash}{image_extension(url)}"
         
         # 如果文件已存在，直接返回路径
         if file_path.exists():
             logger.info(f"Image already exists: {file_path}")
             return str(file_path)
         
-        # 下载图片
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        for i in range(retries):
-            try:
-                response = requests.get(url, headers=headers, timeout=10, stream=True)
-                response.raise_for_status()
-                
-                # 验证内容类型
-                content_type = response.headers.get('content-type', '')
-                if not content_type.startswith('image/'):
-                    logger.error(f"Invalid content type: {content_type} for URL: {url}")
-                    return None
-                
-                # 获取文件大小
-                file_size = int(response.headers.get('content-length', 0))
-                if file_size > 10 * 1024 * 1024:  # 限制10MB
-                    logger.error(f"Image too large ({file_size} bytes): {url}")
-                    return None
-                
-                # 分块下载
-                with open(file_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                
-                logger.info(f"Successfully downloaded image: {url} -> {file_path}")
-                return str(file_path)
-                
-            except Timeout:
-                logger.warning(f"Download timeout ({i+1}/{retries}): {url}")
-                if i == retries - 1:
-                    return None
-                    
-            except RequestException as e:
-                logger.warning(f"Download failed ({i+1}/{retries}): {url}, error: {str(e)}")
-                if i == retries - 1:
-                    return None
-                    
-            except Exception as e:
-                logger.error(f"Unexpected error while downloading image: {url}, error: {str(e)}")
-                return None
+        object_path = get_image_store().fetch(url, retries)
+        if object_path is None:
+            return None
+        return str(ImageStore.link(object_path, file_path))
                 
     except Exception as e:
         logger.error(f"Failed to download image from {url}: {str(e)}")
         return None
 
-def _get_file_extension(url: str) -> str:
-    """从URL或内容类型获取文件扩展名"""
-    # 常见图片扩展名
-    known_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
-    
-    # 从URL中获取扩展名
-    path = url.split('?')[0]  # 移除查询参数
-    ext = os.path.splitext(path)[1].lower()
-    
-    if ext in known_extensions:
-        return ext
-    return '.jpg'  # 默认使用.jpg
+def get_store():
+    """返回进程内共享的新闻存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = NewsStore()
+        return _store
 
 def save_to_json(news_list, date):
-    """保存新闻数据到JSON文件，保留已有数据"""
-    # 确保 res/res 目录存在
-    if not os.path.exists('res/res'):
-        os.makedirs('res/res')
-    
-    output_path = f'res/res/sina_{date}.json'
-    
-    # 读取现有的JSON文件（如果存在）
-    existing_news = []
-    if os.path.exists(output_path):
-        try:
-            with open(output_path, 'r', encoding='utf-8') as f:
-                existing_news = json.load(f)
-            logging.info(f"从现有文件中读取到 {len(existing_news)} 条新闻")
-        except Exception as e:
-            logging.error(f"读取现有JSON文件失败: {str(e)}")
-    
-    # 使用URL作为唯一标识，合并现有数据和新数据
-    url_to_news = {news['url']: news for news in existing_news}
-    
-    # 更新或添加新的新闻
+    """保存新闻数据，保留已有数据
+
+    新闻追加写入 res/store 下按日期的日志，同一URL以最后一次保存为准；
+    STORE_EXPORT_ON_SAVE 为 True（默认）时随后重新导出该日期合并后的 res/res/sina_{date}.json，
+    关闭时通过 NewsStore.export_json 按需导出。
+    保存后同时更新全文检索索引（索引失败不影响保存）；
+    PARQUET_EXPORT_ON_SAVE 为 True 时把新追加的记录导出到 Parquet 数据集。
+    """
     for news in news_list:
         # 确保 hasImage 和 isRecommend 是布尔类型
         news['hasImage'] = bool(news['hasImage'])
         news['isRecommend'] = bool(news['isRecommend'])
-        url_to_news[news['url']] = news
-    
-    # 将合并后的数据转换为列表
-    merged_news = list(url_to_news.values())
-    
-    # 保存合并后的数据
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(merged_news, f, ensure_ascii=False, indent=2)
 
-def save_to_csv(news_list, date):
-    """保存新闻数据到CSV文件，保留已有数据"""
-    # 确保 res 目录存在
-    if not os.path.exists('res'):
-        os.makedirs('res')
-    
-    output_path = f'res/sina_{date}.csv'
-    
-    # 读取现有的CSV文件（如果存在）
-    existing_news = []
-    if os.path.exists(output_path):
+    store = get_store()
+    with get_metrics().timer('save'):
+        store.append(news_list, date)
+    get_metrics().inc('articles_saved', len(news_list))
+    logging.info(f"已追加保存 {len(news_list)} 条新闻")
+    if STORE_EXPORT_ON_SAVE:
+        store.export_json(date)
+    if SEARCH_INDEX_ENABLED:
         try:
-            df_existing = pd.read_csv(output_path)
-            # 将 hasImage 和 isRecommend 转换为布尔类型
-            if 'hasImage' in df_existing.columns:
-                df_existing['hasImage'] = df_existing['hasImage'].astype(bool)
-            if 'isRecommend' in df_existing.columns:
-                df_existing['isRecommend'] = df_existing['isRecommend'].astype(bool)
-            existing_news = df_existing.to_dict('records')
+            from search_index import get_search_index
+            with get_metrics().timer('search_index'):
+                get_search_index().add_many(news_list, date)
         except Exception as e:
-            logging.error(f"读取现有CSV文件失败: {str(e)}")
-    
-    # 合并现有数据和新数据
-    url_to_news = {news['url']: news for news in existing_news}
-    
-    # 更新或添加新的新闻
-    for news in news_list:
-        # 确保 hasImage 和 isRecommend 是布尔类型
-        news['hasImage'] = bool(news['hasImage'])
-        news['isRecommend'] = bool(news['isRecommend'])
-        url_to_news[news['url']] = news
-    
-    # 将合并后的数据转换为列表
-    merged_news = list(url_to_news.values())
-    
-    # 保存合并后的数据
-    df = pd.DataFrame(merged_news)
-    
-    # 确保这些列是布尔类型
-    df['hasImage'] = df['hasImage'].astype(bool)
-    df['isRecommend'] = df['isRecommend'].astype(bool)
-    
-    df.to_csv(output_path, index=False)
+            logging.error(f"更新全文检索索引失败: {str(e)}")
+    if PARQUET_EXPORT_ON_SAVE:
+        try:
+            from columnar_export import get_parquet_exporter
+            with get_metrics().timer('parquet_export'):
+                get_parquet_exporter(store).export_date(date)
+        except Exception as e:
+            logging.error(f"导出Parquet失败: {str(e)}")
 
 def save_context_with_images(context, news_id):
-    """保存新闻正文内容，包含图片"""
+    """保存新闻正文内容，包含图片
+    
+    正文中的图片并行下载到共享图片存储，再以内容哈希命名硬链接到文章目录。
+    """
     # 创建存储目录
     save_dir = os.path.join('res', 'html', news_id)
     os.makedirs(save_dir, exist_ok=True)
     
     # 处理图片
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(context, 'html.parser')
+    images = [img for img in soup.find_all('img') if img.get('src')]
     
-    # 处理图片下载
-    for i, img in enumerate(soup.find_all('img')):
-        if img.get('src'):
-            try:
-                # 下载图片
-                img_url = img['src']
-                if not img_url.startswith('http'):
-                    img_url = 'https:' + img_url if img_url.startswith('//') else img_url
-                    
-                img_data = requests.get(img_url, timeout=10).content
-                
-                # 生成本地图片文件名
-                img_filename = f'img_{i}.jpg'
-                img_path = os.path.join(save_dir, img_filename)
-                
-                # 保存图片
-                with open(img_path, 'wb') as f:
-                    f.write(img_data)
-                
-                # 更新图片源为本地路径
-                img['src'] = img_filename
-                
-            except Exception as e:
-                print(f"下载图片失败: {e}")
-                continue
+    # 并行下载所有图片（重复的URL只下载一次）
+    store = get_image_store()
+    object_paths = store.fetch_many(normalize_image_url(img['src']) for img in images)
+    
+    for img in images:
+        object_path = object_paths.get(normalize_image_url(img['src']))
+        if object_path is None:
+            print(f"下载图片失败: {img['src']}")
+            continue
+        
+        # 更新图片源为本地路径
+        img_filename = object_path.name
+        ImageStore.link(object_path, Path(save_dir) / img_filename)
+        img['src'] = img_filename
     
     # 保存HTML文件
     html_path = os.path.join(save_dir, 'content.html')
     with open(html_path, 'w', encoding='utf-8') as f:
-        f.write(str(soup))
\ No newline at end of file
+        f.write(str(soup))
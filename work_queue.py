@@ -0,0 +1,388 @@
+import argparse
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from config import WORK_QUEUE_URL, WORK_QUEUE_MAX_ATTEMPTS
+
+# 列表页优先领取，尽早展开后续的文章和翻页
+PRIORITIES = {'listing': 0, 'article': 1}
+
+
+def queue_name(from_date: str, date: str) -> str:
+    """一次爬取对应的队列名，与检查点的命名一致"""
+    return f'sina_{date}' if from_date == date else f'sina_{from_date}_{date}'
+
+
+class WorkQueue(ABC):
+    """多个进程共享的持久化工作队列
+
+    条目为 {'key', 'kind', 'payload'}，key 相同的条目只入队一次。worker 领取
+    (lease) 一批条目后处理，完成时 complete()，同时写入展开出的新条目和结果；
+    租约过期仍未完成的条目会被重新分配（至少处理一次），超过 max_attempts 次
+    记为失败。结果按新闻 _id 合并，重复处理同一条目不会产生重复结果。
+
+    update_host() 在队列中原子地更新按主机共享的状态，供跨进程的限速器使用。
+    """
+
+    @abstractmethod
+    def put_many(self, items: Iterable[Dict]) -> int:
+        """入队一批条目，返回实际新增的条数"""
+
+    @abstractmethod
+    def lease(self, worker: str, count: int, lease_seconds: float) -> List[Dict]:
+        """领取最多 count 个待处理条目"""
+
+    @abstractmethod
+    def complete(self, key: str, children: Iterable[Dict] = (), result: Optional[Dict] = None):
+        """条目处理完成：children 为展开出的新条目，result 为得到的新闻"""
+
+    @abstractmethod
+    def fail(self, key: str, error: str, worker: str, attempt: int) -> bool:
+        """条目处理失败，返回是否重新入队
+
+        worker 和 attempt（领取时返回的 attempts）用于确认租约仍属于调用方：
+        租约过期后条目可能已被其他 worker 重新领取，此时不修改条目状态。
+        """
+
+    @abstractmethod
+    def drained(self) -> bool:
+        """没有待处理和处理中的条目"""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """各状态（pending/leased/done/failed）的条目数，以及未收集的结果数"""
+
+    @abstractmethod
+    def pending_results(self) -> List[Dict]:
+        """尚未收集保存的结果"""
+
+    @abstractmethod
+    def mark_collected(self, ids: Iterable[str]):
+        """标记结果已收集保存"""
+
+    @abstractmethod
+    def update_host(self, host: str, func: Callable[[Dict], object]):
+        """原子地读取并修改主机的共享状态（func 原地修改状态字典），返回 func 的返回值"""
+
+    @abstractmethod
+    def host_states(self) -> Dict[str, Dict]:
+        """全部主机的共享状态"""
+
+    @abstractmethod
+    def clear(self):
+        """删除队列中的全部条目、结果和主机状态"""
+
+    def close(self):
+        pass
+
+
+class SqliteWorkQueue(WorkQueue):
+    """SQLite 队列（默认后端），同一台机器上的多个进程共享一个数据库文件"""
+
+    def __init__(self, path: str, max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # 事务由 _transaction 显式控制；写事务用 BEGIN IMMEDIATE，等待其他进程的写锁
+        self._db = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS items '
+                         '(key TEXT UNIQUE, kind TEXT, payload TEXT, priority INTEGER, state TEXT, '
+                         'lease_until REAL, attempts INTEGER DEFAULT 0, worker TEXT, error TEXT)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS items_ready ON items (state, priority)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS results (id TEXT PRIMARY KEY, news TEXT, collected INTEGER)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, state TEXT)')
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    @staticmethod
+    def _insert(db, items: Iterable[Dict]) -> int:
+        before = db.total_changes
+        db.executemany("INSERT OR IGNORE INTO items (key, kind, payload, priority, state) "
+                       "VALUES (?, ?, ?, ?, 'pending')",
+                       [(item['key'], item['kind'], json.dumps(item['payload'], ensure_ascii=False),
+                         PRIORITIES.get(item['kind'], 1)) for item in items])
+        return db.total_changes - before
+
+    def put_many(self, items: Iterable[Dict]) -> int:
+        with self._transaction() as db:
+            return self._insert(db, items)
+
+    def lease(self, worker: str, count: int, lease_seconds: float) -> List[Dict]:
+        now = time.time()
+        with self._transaction() as db:
+            db.execute("UPDATE items SET state = 'failed', error = '租约过期次数过多' "
+                       "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?", (now, self.max_attempts))
+            rows = db.execute("SELECT rowid, key, kind, payload, attempts FROM items "
+                              "WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) "
+                              "ORDER BY priority, rowid LIMIT ?", (now, count)).fetchall()
+            db.executemany("UPDATE items SET state = 'leased', lease_until = ?, attempts = attempts + 1, worker = ? "
+                           "WHERE rowid = ?", [(now + lease_seconds, worker, row[0]) for row in rows])
+        return [{'key': key, 'kind': kind, 'payload': json.loads(payload), 'attempts': attempts + 1}
+                for _, key, kind, payload, attempts in rows]
+
+    def complete(self, key: str, children: Iterable[Dict] = (), result: Optional[Dict] = None):
+        with self._transaction() as db:
+            self._insert(db, children)
+            if result is not None:
+                db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, 0)',
+                           (result['_id'], json.dumps(result, ensure_ascii=False)))
+            db.execute("UPDATE items SET state = 'done', error = NULL WHERE key = ?", (key,))
+
+    def fail(self, key: str, error: str, worker: str, attempt: int) -> bool:
+        with self._transaction() as db:
+            row = db.execute("SELECT attempts FROM items WHERE key = ? AND state = 'leased' AND worker = ? "
+                             "AND attempts = ?", (key, worker, attempt)).fetchone()
+            if row is None:
+                return False  # 租约已被其他 worker 重新领取
+            retry = row[0] < self.max_attempts
+            db.execute('UPDATE items SET state = ?, error = ? WHERE key = ?',
+                       ('pending' if retry else 'failed', error, key))
+        return retry
+
+    def drained(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM items WHERE state IN ('pending', 'leased') LIMIT 1").fetchone() is None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = dict(self._db.execute('SELECT state, COUNT(*) FROM items GROUP BY state').fetchall())
+            counts['results'] = self._db.execute('SELECT COUNT(*) FROM results WHERE collected = 0').fetchone()[0]
+        return {state: counts.get(state, 0) for state in ('pending', 'leased', 'done', 'failed', 'results')}
+
+    def pending_results(self) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute('SELECT news FROM results WHERE collected = 0 ORDER BY rowid').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def mark_collected(self, ids: Iterable[str]):
+        with self._transaction() as db:
+            db.executemany('UPDATE results SET collected = 1 WHERE id = ?', [(news_id,) for news_id in ids])
+
+    def update_host(self, host: str, func: Callable[[Dict], object]):
+        with self._transaction() as db:
+            row = db.execute('SELECT state FROM hosts WHERE host = ?', (host,)).fetchone()
+            state = json.loads(row[0]) if row else {}
+            result = func(state)
+            db.execute('INSERT OR REPLACE INTO hosts VALUES (?, ?)', (host, json.dumps(state)))
+        return result
+
+    def host_states(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {host: json.loads(state) for host, state in self._db.execute('SELECT host, state FROM hosts')}
+
+    def clear(self):
+        with self._transaction() as db:
+            for table in ('items', 'results', 'hosts'):
+                db.execute(f'DELETE FROM {table}')
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RedisWorkQueue(WorkQueue):
+    """Redis 队列，多台机器共享（需要安装 redis）
+
+    只使用基本的列表、哈希、集合和有序集合命令（不依赖 Lua 脚本），兼容 Redis
+    协议的其他服务也可以作为后端。与 SQLite 后端不同，领取条目和登记租约不在
+    同一个事务中，worker 恰好在两步之间崩溃时该条目不会被重新分配。
+    """
+
+    def __init__(self, client, prefix: str, max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS):
+        self.redis = client
+        self.max_attempts = max_attempts
+        self._keys = {name: f'{prefix}:{name}' for name in
+                      ('items', 'attempts', 'leases', 'done', 'failed', 'errors', 'results', 'collected', 'hosts')}
+        self._pending = [f'{prefix}:pending:{priority}' for priority in sorted(set(PRIORITIES.values()))]
+
+    @classmethod
+    def from_url(cls, url: str, name: str) -> 'RedisWorkQueue':
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("Redis 队列需要安装 redis: pip install redis") from None
+        return cls(redis.Redis.from_url(url, decode_responses=True), f'aidaily:{name}')
+
+    def _push(self, key: str, kind: str, front: bool = False):
+        pending = self._pending[PRIORITIES.get(kind, 1)]
+        if front:
+            self.redis.lpush(pending, key)
+        else:
+            self.redis.rpush(pending, key)
+
+    def put_many(self, items: Iterable[Dict]) -> int:
+        added = 0
+        for item in items:
+            record = json.dumps({'kind': item['kind'], 'payload': item['payload']}, ensure_ascii=False)
+            if self.redis.hsetnx(self._keys['items'], item['key'], record):
+                self._push(item['key'], item['kind'])
+                added += 1
+        return added
+
+    def _requeue_expired(self, now: float):
+        for key in self.redis.zrangebyscore(self._keys['leases'], '-inf', now):
+            # zrem 成功的 worker 负责重新入队，多个 worker 同时检查时只入队一次
+            if not self.redis.zrem(self._keys['leases'], key):
+                continue
+            if int(self.redis.hget(self._keys['attempts'], key) or 0) >= self.max_attempts:
+                self.redis.sadd(self._keys['failed'], key)
+                self.redis.hset(self._keys['errors'], key, '租约过期次数过多')
+            else:
+                self._push(key, json.loads(self.redis.hget(self._keys['items'], key))['kind'], front=True)
+
+    def lease(self, worker: str, count: int, lease_seconds: float) -> List[Dict]:
+        now = time.time()
+        self._requeue_expired(now)
+        leased = []
+        for pending in self._pending:
+            while len(leased) < count:
+                key = self.redis.lpop(pending)
+                if key is None:
+                    break
+                self.redis.zadd(self._keys['leases'], {key: now + lease_seconds})
+                attempts = self.redis.hincrby(self._keys['attempts'], key, 1)
+                record = json.loads(self.redis.hget(self._keys['items'], key))
+                leased.append({'key': key, 'kind': record['kind'], 'payload': record['payload'],
+                               'attempts': attempts})
+        return leased
+
+    def complete(self, key: str, children: Iterable[Dict] = (), result: Optional[Dict] = None):
+        self.put_many(children)
+        pipe = self.redis.pipeline()
+        if result is not None:
+            pipe.hset(self._keys['results'], result['_id'], json.dumps(result, ensure_ascii=False))
+            pipe.srem(self._keys['collected'], result['_id'])
+        pipe.sadd(self._keys['done'], key)
+        pipe.zrem(self._keys['leases'], key)
+        pipe.execute()
+
+    def fail(self, key: str, error: str, worker: str, attempt: int) -> bool:
+        # 每次领取 attempts 加一，不相等说明租约过期后已被重新领取（worker 不单独记录）
+        attempts = int(self.redis.hget(self._keys['attempts'], key) or 0)
+        if attempts != attempt:
+            return False
+        self.redis.hset(self._keys['errors'], key, error)
+        if not self.redis.zrem(self._keys['leases'], key):
+            return False  # 租约已过期，已由其他 worker 重新入队
+        if attempts >= self.max_attempts:
+            self.redis.sadd(self._keys['failed'], key)
+            return False
+        self._push(key, json.loads(self.redis.hget(self._keys['items'], key))['kind'])
+        return True
+
+    def drained(self) -> bool:
+        return not any(self.redis.llen(pending) for pending in self._pending) and not self.redis.zcard(self._keys['leases'])
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            'pending': sum(self.redis.llen(pending) for pending in self._pending),
+            'leased': self.redis.zcard(self._keys['leases']),
+            'done': self.redis.scard(self._keys['done']),
+            'failed': self.redis.scard(self._keys['failed']),
+            'results': self.redis.hlen(self._keys['results']) - self.redis.scard(self._keys['collected']),
+        }
+
+    def pending_results(self) -> List[Dict]:
+        collected = self.redis.smembers(self._keys['collected'])
+        return [json.loads(news) for news_id, news in self.redis.hgetall(self._keys['results']).items()
+                if news_id not in collected]
+
+    def mark_collected(self, ids: Iterable[str]):
+        ids = list(ids)
+        if ids:
+            self.redis.sadd(self._keys['collected'], *ids)
+
+    def update_host(self, host: str, func: Callable[[Dict], object]):
+        from redis.exceptions import WatchError
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self._keys['hosts'])
+                    raw = pipe.hget(self._keys['hosts'], host)
+                    state = json.loads(raw) if raw else {}
+                    result = func(state)
+                    pipe.multi()
+                    pipe.hset(self._keys['hosts'], host, json.dumps(state))
+                    pipe.execute()
+                    return result
+                except WatchError:
+                    continue
+
+    def host_states(self) -> Dict[str, Dict]:
+        return {host: json.loads(state) for host, state in self.redis.hgetall(self._keys['hosts']).items()}
+
+    def clear(self):
+        self.redis.delete(*self._keys.values(), *self._pending)
+
+    def close(self):
+        self.redis.close()
+
+
+def _open_sqlite(url: str, name: str) -> SqliteWorkQueue:
+    # sqlite:///相对目录 或 sqlite:////绝对目录，每个队列一个数据库文件
+    directory = urlparse(url).path[1:]
+    return SqliteWorkQueue(str(Path(directory) / f'{name}.sqlite'))
+
+
+# 队列后端按URL的scheme选择，新的后端在这里登记
+QUEUE_BACKENDS: Dict[str, Callable[[str, str], WorkQueue]] = {
+    'sqlite': _open_sqlite,
+    'redis': RedisWorkQueue.from_url,
+}
+
+
+def open_queue(name: str, url: str = WORK_QUEUE_URL) -> WorkQueue:
+    """按URL打开名为 name 的队列，如 sqlite:///res/queue 或 redis://localhost:6379/0"""
+    scheme = urlparse(url).scheme
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"不支持的队列后端: {url}")
+    return QUEUE_BACKENDS[scheme](url, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared crawl work queue maintenance')
+    parser.add_argument('--url', default=WORK_QUEUE_URL, help='Queue backend URL')
+    parser.add_argument('name', help='Queue name, e.g. sina_2024-11-14 or sina_2024-11-01_2024-11-30')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Show item counts by state')
+    subparsers.add_parser('clear', help='Delete all items, results and host states')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    queue = open_queue(args.name, args.url)
+    try:
+        if args.command == 'stats':
+            counts = queue.counts()
+            print(f"待处理 {counts['pending']}, 处理中 {counts['leased']}, 已完成 {counts['done']}, "
+                  f"失败 {counts['failed']}, 未保存的结果 {counts['results']}")
+            for host, state in queue.host_states().items():
+                print(f"{host}: 请求速率 {state.get('rate', 0):.2f} 次/秒, 被限流 {state.get('throttled', 0)} 次")
+        else:
+            queue.clear()
+            print(f"已清空队列 {args.name}")
+    finally:
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()